@@ -2,19 +2,9 @@
 
 import streamlit as st
 
-from modules.uploader import uploader_fichier
-from modules.settings import config_utilisateur
-from modules.preprocessing import calcul_ecarts_objectifs
-from modules.visualisations import (
-    afficher_treemaps_par_kpi,
-    afficher_radar_agent,
-    afficher_courbe_evolution,
-    afficher_tableau_detail,
-)
-from modules.analytics import afficher_synthese_analytique
-from modules.exports import export_excel
-from modules.synthese_rh import generer_rapport_rh
-from modules.pda_generator import generer_pda
+# Les modules métier (pandas, plotly, python-docx, xlsxwriter...) sont importés
+# après la connexion ou au moment de leur usage : l'écran de login ne charge que Streamlit.
+# Budget suivi : benchmarks/importtime.py
 
 
 # ============================================================
@@ -27,6 +17,9 @@ APP_FULL_TITLE = f"{APP_NAME} | {APP_TAGLINE} — {APP_CLIENT}"
 APP_PAGE_TITLE = APP_FULL_TITLE
 APP_FOOTER = "Developed by Yassine Mahamid"
 
+# Comptes ayant accès au panneau "⏱️ Perf" (sidebar)
+PERF_ADMINS = {"admin"}
+
 
 # ============================================================
 # 🎨 Intelcia Logo Colors (clear/vivid, no extra)
@@ -279,6 +272,7 @@ def login():
             if submitted:
                 if username == "admin" and password == "pass123":
                     st.session_state.auth = True
+                    st.session_state.utilisateur = username
                     st.success("Connexion réussie.")
                     st.rerun()
                 else:
@@ -291,17 +285,17 @@ def login():
 # ============================================================
 # Helpers
 # ============================================================
-def kpi_summary_cards(df_ecarts):
-    score_moy = round(df_ecarts["Score_Global"].mean() * 100, 2) if "Score_Global" in df_ecarts.columns else 0.0
-    agents_total = df_ecarts["Agent"].nunique() if "Agent" in df_ecarts.columns else 0
-    mois_total = df_ecarts["Mois"].nunique() if "Mois" in df_ecarts.columns else 0
+def kpi_summary_cards(df_ecarts, kpis):
+    cube = cube_agregats(df_ecarts, kpis)
+    score_moy = round(cube["global"]["score_moyen"] * 100, 2)
+    agents_total = cube["global"]["n_agents"]
+    mois_total = cube["global"]["n_mois"]
 
     best_agent, worst_agent = "-", "-"
-    if "Agent" in df_ecarts.columns and "Score_Global" in df_ecarts.columns:
-        g = df_ecarts.groupby("Agent")["Score_Global"].mean().sort_values(ascending=False)
-        if len(g) > 0:
-            best_agent = f"{g.index[0]} ({round(g.iloc[0]*100,2)}%)"
-            worst_agent = f"{g.index[-1]} ({round(g.iloc[-1]*100,2)}%)"
+    g = cube["par_agent"]["score_moyen"].sort_values(ascending=False)
+    if len(g) > 0:
+        best_agent = f"{g.index[0]} ({round(g.iloc[0]*100,2)}%)"
+        worst_agent = f"{g.index[-1]} ({round(g.iloc[-1]*100,2)}%)"
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
@@ -350,11 +344,138 @@ def kpi_summary_cards(df_ecarts):
         )
 
 
+def export_excel_a_la_demande(df_ecarts, cle_export):
+    from modules.exports import export_excel, export_memoise
+    from modules.pda_store import actions_version
+
+    with mesurer("export_excel"):
+        return export_memoise(
+            ("excel",) + cle_export + (actions_version(),),
+            lambda: export_excel(df_ecarts),
+        )
+
+
+def export_word_a_la_demande(df_ecarts, agent, params, cle_export):
+    from modules.exports import export_memoise
+    from modules.synthese_rh import generer_rapport_rh
+
+    with mesurer("export_word"):
+        return export_memoise(
+            ("word",) + cle_export + (agent,),
+            lambda: generer_rapport_rh(df_ecarts, agent, params) or b"",
+        )
+
+
+def export_zip_a_la_demande(df_ecarts, params, cle_export):
+    from modules.exports import export_memoise
+    from modules.synthese_rh import generer_rapports_rh_zip
+
+    with mesurer("export_zip"):
+        return export_memoise(
+            ("zip",) + cle_export,
+            lambda: generer_rapports_rh_zip(df_ecarts, params),
+        )
+
+
+# ============================================================
+# Vues (une seule exécutée par rerun)
+# ============================================================
+def vue_kpi(df_ecarts, params):
+    from modules.visualisations import afficher_treemaps_par_kpi
+
+    with mesurer("onglet_kpi"):
+        st.markdown("#### 🌳 Vue KPI — distribution des écarts")
+        st.caption("Taille = magnitude d’écart | Couleur = direction/valeur")
+        afficher_treemaps_par_kpi(df_ecarts, params["kpi"])
+
+
+def vue_agent(df_ecarts, params):
+    # pas de fragment : l'agent choisi alimente aussi l'export Word en bas de page
+    from modules.visualisations import afficher_courbe_evolution, afficher_radar_agent, afficher_tableau_detail
+
+    with mesurer("onglet_agent"):
+        st.markdown("#### 👤 Focus Agent — évolution & détail")
+        agents = index_lignes(df_ecarts)["agents"]
+        # le choix survit aux changements de vue (le widget n'existe que dans cette vue)
+        precedent = st.session_state.get("agent_for_word")
+        index = agents.index(precedent) if precedent in agents else 0
+        agent = st.selectbox("Sélectionner un agent", agents, index=index)
+        st.session_state["agent_for_word"] = agent
+        afficher_courbe_evolution(df_ecarts, agent, params["kpi"])
+        afficher_tableau_detail(df_ecarts, agent, params["kpi"])
+        agent_row = derniere_ligne_agent(df_ecarts, agent)
+        if agent_row is not None:
+            afficher_radar_agent(agent_row, params["kpi"])
+        else:
+            st.warning("Radar indisponible (données insuffisantes).")
+
+
+def vue_synthese(df_ecarts, params):
+    from modules.analytics import afficher_synthese_analytique
+
+    with mesurer("onglet_synthese"):
+        st.markdown("#### 🧠 Synthèse — lecture RH / TL")
+        afficher_synthese_analytique(df_ecarts, params)
+
+
+def vue_pda(df_ecarts, params):
+    # generer_pda est un fragment : ses widgets ne relancent que le PDA
+    from modules.pda_generator import generer_pda
+
+    with mesurer("onglet_pda"):
+        st.markdown("#### 🧩 PDA — plan TL actionnable")
+        st.caption("PDA chiffré + owners + timeline + management (centre d’appels Intelcia).")
+        generer_pda(df_ecarts, params)
+
+
+VUES = {"🌳 KPI": vue_kpi, "👤 Agent": vue_agent, "🧠 Synthèse": vue_synthese, "🧩 PDA": vue_pda}
+VUE_DEFAUT = "🌳 KPI"
+
+
+def afficher_panneau_perf(conteneur, debut_run):
+    """Temps par étape du run courant + p50/p95 des dernières 24 h (metrics.jsonl) + cache partagé."""
+    from datetime import datetime, timedelta
+
+    from modules.cache_memoire import DONNEES, EXPORTS
+    from modules.perf import mesures_run, resume_metriques
+
+    total_ms = (time.perf_counter() - debut_run) * 1000
+    with conteneur:
+        lignes = [{"Étape": e, "ms": round(ms, 1), "OK": ok} for e, ms, ok in mesures_run()]
+        lignes.append({"Étape": "run (total)", "ms": round(total_ms, 1), "OK": True})
+        st.dataframe(lignes, hide_index=True, use_container_width=True)
+
+        resume = resume_metriques(depuis=datetime.now() - timedelta(hours=24))
+        if resume:
+            st.caption("Dernières 24 h (data/metrics.jsonl)")
+            st.dataframe(
+                [{"Étape": e, **r} for e, r in resume.items()],
+                hide_index=True,
+                use_container_width=True,
+            )
+
+        st.caption("Caches partagés (toutes sessions) — budgets : CACHE_DONNEES_MO, CACHE_EXPORTS_MO")
+        st.dataframe([DONNEES.stats(), EXPORTS.stats()], hide_index=True, use_container_width=True)
+
+
 # ============================================================
 # Main
 # ============================================================
 login()
 
+import time
+
+from modules.perf import debut_run, mesurer
+
+debut_run()
+t_run = time.perf_counter()
+
+from modules.uploader import uploader_fichier
+from modules.settings import config_utilisateur
+from modules.preprocessing import calcul_ecarts_objectifs, mois_recalcules
+from modules.agregats import cube_agregats, derniere_ligne_agent, index_lignes
+from modules.empreintes import empreinte_cle, empreinte_df
+
 st.set_page_config(page_title=APP_PAGE_TITLE, page_icon="📊", layout="wide")
 inject_global_style()
 
@@ -378,65 +499,70 @@ with st.sidebar:
     if st.button("🚪 Se déconnecter"):
         st.session_state.auth = False
         st.rerun()
+    panneau_perf = None
+    if st.session_state.get("utilisateur") in PERF_ADMINS and st.toggle("⏱️ Perf", key="perf_panel"):
+        panneau_perf = st.container()
 
-df_resultats, df_objectifs = uploader_fichier()
+with mesurer("upload"):
+    df_resultats, df_objectifs = uploader_fichier()
 
 if df_resultats is None or df_objectifs is None:
     st.info("Importe les deux fichiers depuis la sidebar (ou le bloc d'import dans la page) pour démarrer.")
 else:
-    params = config_utilisateur(df_resultats)
-    df_ecarts = calcul_ecarts_objectifs(df_resultats, df_objectifs, params)
+    with mesurer("parametres"):
+        params = config_utilisateur(df_resultats)
+    with mesurer("ecarts"):
+        df_ecarts = calcul_ecarts_objectifs(df_resultats, df_objectifs, params)
+
+    # Seuls les mois nouveaux / modifiés sont recalculés (les autres viennent du cache)
+    recalcules = mois_recalcules(df_ecarts)
+    if recalcules:
+        st.sidebar.caption(
+            f"🔄 Écarts recalculés pour {len(recalcules)}/{len(params['mois'])} mois : {', '.join(map(str, recalcules))}"
+        )
 
-    kpi_summary_cards(df_ecarts)
+    with mesurer("cartes_kpi"):
+        kpi_summary_cards(df_ecarts, params["kpi"])
     st.write("")
 
-    tab1, tab2, tab3, tab4 = st.tabs(["🌳 KPI", "👤 Agent", "🧠 Synthèse", "🧩 PDA"])
-
-    with tab1:
-        st.markdown("#### 🌳 Vue KPI — distribution des écarts")
-        st.caption("Taille = magnitude d’écart | Couleur = direction/valeur")
-        afficher_treemaps_par_kpi(df_ecarts, params["kpi"])
-
-    with tab2:
-        st.markdown("#### 👤 Focus Agent — évolution & détail")
-        agent = st.selectbox("Sélectionner un agent", df_ecarts["Agent"].unique())
-        st.session_state["agent_for_word"] = agent
-        afficher_courbe_evolution(df_ecarts, agent, params["kpi"])
-        afficher_tableau_detail(df_ecarts, agent, params["kpi"])
-        try:
-            agent_row = df_ecarts[df_ecarts["Agent"] == agent].iloc[-1]
-            afficher_radar_agent(agent_row, params["kpi"])
-        except Exception:
-            st.warning("Radar indisponible (données insuffisantes).")
-
-    with tab3:
-        st.markdown("#### 🧠 Synthèse — lecture RH / TL")
-        afficher_synthese_analytique(df_ecarts, params)
-
-    with tab4:
-        st.markdown("#### 🧩 PDA — plan TL actionnable")
-        st.caption("PDA chiffré + owners + timeline + management (centre d’appels Intelcia).")
-        generer_pda(df_ecarts, params)
+    # Seule la vue choisie est exécutée (au lieu des quatre onglets à chaque rerun)
+    vue = st.segmented_control("Vue", list(VUES), default=VUE_DEFAUT, key="vue", label_visibility="collapsed")
+    VUES[vue or VUE_DEFAUT](df_ecarts, params)
 
     st.write("")
     st.divider()
 
-    left, right = st.columns([1, 1])
+    # Exports générés uniquement au clic, puis servis depuis le cache
+    # tant que (données, params, agent) ne changent pas.
+    cle_export = (empreinte_df(df_ecarts), empreinte_cle(params))
+
+    left, right, zip_col = st.columns([1, 1, 1])
     with left:
         st.download_button(
             "📥 Export Excel",
-            data=export_excel(df_ecarts),
+            data=lambda: export_excel_a_la_demande(df_ecarts, cle_export),
             file_name="PerformTrack360_rapport_kpi.xlsx",
             use_container_width=True,
         )
     with right:
-        default_agent = df_ecarts["Agent"].unique()[0]
+        default_agent = index_lignes(df_ecarts)["agents"][0]
         agent_for_word = st.session_state.get("agent_for_word", default_agent)
         st.download_button(
             "📄 Export Word (Agent)",
-            data=generer_rapport_rh(df_ecarts, agent_for_word, params),
+            data=lambda: export_word_a_la_demande(df_ecarts, agent_for_word, params, cle_export),
             file_name=f"PerformTrack360_rapport_{agent_for_word}.docx",
             use_container_width=True,
         )
+    with zip_col:
+        st.download_button(
+            "📦 Export Word (tous les agents)",
+            data=lambda: export_zip_a_la_demande(df_ecarts, params, cle_export),
+            file_name="PerformTrack360_rapports_agents.zip",
+            mime="application/zip",
+            use_container_width=True,
+        )
 
 st.markdown(f"<hr/><div class='footer'>{APP_FOOTER}</div>", unsafe_allow_html=True)
+
+if panneau_perf is not None:
+    afficher_panneau_perf(panneau_perf, t_run)
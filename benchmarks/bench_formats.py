@@ -0,0 +1,101 @@
+# benchmarks/bench_formats.py
+# Temps de parsing d'un même jeu de résultats selon le format importé (sans cache de parsing),
+# et des objectifs en CSV français (ligne "Type" textuelle dans les colonnes KPI).
+#   python -m benchmarks.bench_formats            → benchmarks/results/formats.json
+import argparse
+import importlib.util
+import io
+import json
+import os
+import statistics
+import time
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules.parse_cache import _parser_classeur
+from modules.validation import valider
+
+TAILLES = [1000, 10000]
+
+
+def _ecrire(df, fmt) -> bytes:
+    tampon = io.BytesIO()
+    if fmt == "xlsx":
+        df.to_excel(tampon, index=False)
+    elif fmt == "csv":
+        df.to_csv(tampon, index=False)
+    elif fmt == "csv_fr":
+        # comme Excel : virgule décimale aussi dans les colonnes mixtes (decimal="," n'y touche pas)
+        df = df.map(lambda v: str(v).replace(".", ",") if isinstance(v, float) and pd.notna(v) else v)
+        df.to_csv(tampon, index=False, sep=";", encoding="cp1252")
+    else:
+        df.to_parquet(tampon, index=False)
+    return tampon.getvalue()
+
+
+def _chrono(fn, repetitions):
+    temps = []
+    for _ in range(repetitions):
+        t = time.perf_counter()
+        fn()
+        temps.append(time.perf_counter() - t)
+    return statistics.median(temps)
+
+
+def bench_taille(n_agents, n_mois, repetitions):
+    df_r, df_o = generer_donnees(n_agents, n_mois)
+    cas = [("xlsx", "openpyxl"), ("csv", None), ("csv_fr", None), ("parquet", None)]
+    if importlib.util.find_spec("python_calamine"):
+        cas.insert(1, ("xlsx", "calamine"))
+
+    res = {"lignes": len(df_r)}
+    for fmt, moteur in cas:
+        contenu = _ecrire(df_r, fmt)
+        nom = f"{fmt}_{moteur}" if moteur else fmt
+        res[nom] = {
+            "octets": len(contenu),
+            "parse_s": round(_chrono(lambda: _parser_classeur(contenu, moteur_excel=moteur), repetitions), 4),
+        }
+
+    contenu = _ecrire(df_o, "csv_fr")
+    objectifs = _parser_classeur(contenu)["csv"]
+    res["csv_fr_objectifs"] = {
+        "octets": len(contenu),
+        "parse_s": round(_chrono(lambda: _parser_classeur(contenu), repetitions), 4),
+        # KPI relus en nombres : l'import passe la validation
+        "valide": not [p for p in valider(df_r, objectifs)[2] if p["gravite"] == "erreur"],
+    }
+    return res
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tailles", type=int, nargs="+", default=TAILLES)
+    ap.add_argument("--mois", type=int, default=12)
+    ap.add_argument("--repetitions", type=int, default=3)
+    ap.add_argument("--out", default=os.path.join("benchmarks", "results", "formats.json"))
+    args = ap.parse_args()
+
+    res = {
+        "date": date.today().isoformat(),
+        "pandas": pd.__version__,
+        "calamine": bool(importlib.util.find_spec("python_calamine")),
+        "mois": args.mois,
+        "tailles": {},
+    }
+    for n in args.tailles:
+        res["tailles"][str(n)] = r = bench_taille(n, args.mois, args.repetitions)
+        print(f"— {n} agents × {args.mois} mois ({r['lignes']} lignes)")
+        for nom, v in r.items():
+            if nom != "lignes":
+                print(f"  {nom:16s} {v['parse_s']:8.3f} s  {v['octets'] / 1024:10.0f} Ko" + ("" if v.get("valide", True) else "  INVALIDE"))
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
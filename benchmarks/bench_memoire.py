@@ -0,0 +1,112 @@
+# benchmarks/bench_memoire.py
+# Mémoire de df_ecarts par taille (octets par colonne avant / après compaction des types)
+# et estimation pour N sessions Streamlit simultanées.
+#   python -m benchmarks.bench_memoire            → benchmarks/results/memoire.{json,md}
+import argparse
+import json
+import os
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import preprocessing
+from modules.cache_memoire import DONNEES
+from modules.memoire import octets_par_colonne, rapport_memoire
+from modules.parametres import construire_params
+
+TAILLES = [100, 1000, 10000]
+SESSIONS = [10, 25, 50]
+MO = 1024 * 1024
+
+
+def mesurer(n_agents, n_mois):
+    df_r, df_o = generer_donnees(n_agents, n_mois)
+    params = construire_params(df_r)
+    DONNEES.vider()
+    df = preprocessing.calcul_ecarts_objectifs(df_r, df_o, params)
+
+    rapport = rapport_memoire(df)
+    # Partagé entre sessions (cache de base, mêmes données) : colonnes de base + matrices des écarts.
+    # Propre à chaque session : colonnes dépendant des pondérations (Pond_ / Score_Global).
+    par_session_cols = [c for c in df.columns if c.startswith("Pond_") or c == "Score_Global"]
+    octets = octets_par_colonne(df)
+    n_kpi = len(params["kpi"])
+    par_session = int(octets[par_session_cols].sum())
+    partage = int(octets.drop(par_session_cols).sum()) + 2 * len(df) * n_kpi * 8
+
+    return rapport, {
+        "agents": n_agents,
+        "mois": n_mois,
+        "lignes": len(df),
+        "avant_mo": round(rapport.loc["TOTAL", "octets_avant"] / MO, 2),
+        "apres_mo": round(rapport.loc["TOTAL", "octets_apres"] / MO, 2),
+        "gain_%": float(rapport.loc["TOTAL", "gain_%"]),
+        "partage_mo": round(partage / MO, 2),
+        "par_session_mo": round(par_session / MO, 2),
+        "sessions_mo": {str(n): round((partage + n * par_session) / MO, 1) for n in SESSIONS},
+    }
+
+
+def _markdown(resultats, rapport, n_agents):
+    lignes = [
+        "# Mémoire de df_ecarts",
+        "",
+        "| agents | lignes | avant (Mo) | après (Mo) | gain | partagé (Mo) | par session (Mo) | "
+        + " | ".join(f"{n} sessions (Mo)" for n in SESSIONS)
+        + " |",
+        "|---:|---:|---:|---:|---:|---:|---:|" + "---:|" * len(SESSIONS),
+    ]
+    for r in resultats:
+        lignes.append(
+            f"| {r['agents']} | {r['lignes']} | {r['avant_mo']} | {r['apres_mo']} | {r['gain_%']} % | "
+            f"{r['partage_mo']} | {r['par_session_mo']} | "
+            + " | ".join(str(r["sessions_mo"][str(n)]) for n in SESSIONS)
+            + " |"
+        )
+    lignes += [
+        "",
+        "Partagé : base des écarts en cache (une fois par processus pour un même jeu de données).",
+        "Par session : colonnes dépendant des pondérations (Pond_, Score_Global).",
+        "",
+        f"## Détail par colonne — {n_agents} agents",
+        "",
+        rapport.to_markdown() if _tabulate_dispo() else "```\n" + rapport.to_string() + "\n```",
+        "",
+    ]
+    return "\n".join(lignes)
+
+
+def _tabulate_dispo():
+    try:
+        import tabulate  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tailles", type=int, nargs="+", default=TAILLES)
+    ap.add_argument("--mois", type=int, default=12)
+    ap.add_argument("--sortie", default=os.path.join("benchmarks", "results"))
+    args = ap.parse_args()
+
+    resultats, rapport = [], None
+    for n in args.tailles:
+        rapport, r = mesurer(n, args.mois)
+        resultats.append(r)
+        print(f"{n:6d} agents : {r['avant_mo']:8.2f} Mo → {r['apres_mo']:8.2f} Mo ({r['gain_%']} %)")
+
+    os.makedirs(args.sortie, exist_ok=True)
+    with open(os.path.join(args.sortie, "memoire.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"resultats": resultats, "detail_colonnes": rapport.reset_index(names="colonne").to_dict("records")},
+            f,
+            indent=2,
+            ensure_ascii=False,
+            default=int,
+        )
+    with open(os.path.join(args.sortie, "memoire.md"), "w", encoding="utf-8") as f:
+        f.write(_markdown(resultats, rapport, args.tailles[-1]))
+
+
+if __name__ == "__main__":
+    main()
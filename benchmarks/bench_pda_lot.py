@@ -0,0 +1,58 @@
+# benchmarks/bench_pda_lot.py
+# PDA en lot pour N agents : séquentiel vs pool de processus.
+#   python -m benchmarks.bench_pda_lot --agents 5000
+import argparse
+import json
+import os
+import tempfile
+import time
+from datetime import date
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules.parametres import KPI_DISPONIBLES, construire_params
+from modules.pda_engine import ecrire_bundles_pda, generer_pda_lot
+from modules.preprocessing import calcul_ecarts_objectifs
+
+KPIS = KPI_DISPONIBLES
+
+
+def _df_ecarts(n_agents, n_mois, seed=0):
+    df_r, df_o = generer_donnees(n_agents, n_mois, seed)
+    return calcul_ecarts_objectifs(df_r, df_o, construire_params(df_r))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--agents", type=int, default=5000)
+    ap.add_argument("--mois", type=int, default=1)
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    ap.add_argument("--out", default=os.path.join("benchmarks", "results", "pda_lot.json"))
+    args = ap.parse_args()
+
+    df = _df_ecarts(args.agents, args.mois)
+    start = date.today()
+    res = {"agents": args.agents, "mois": args.mois, "lignes": len(df), "workers": args.workers}
+
+    t = time.perf_counter()
+    seq = generer_pda_lot(df, KPIS, start, workers=1)
+    res["sequentiel_s"] = round(time.perf_counter() - t, 3)
+
+    t = time.perf_counter()
+    par = generer_pda_lot(df, KPIS, start, workers=args.workers)
+    res["pool_s"] = round(time.perf_counter() - t, 3)
+    res["agents_avec_pda"] = len(par)
+    assert len(seq) == len(par)
+
+    with tempfile.TemporaryDirectory() as d:
+        t = time.perf_counter()
+        ecrire_bundles_pda(par, d)
+        res["ecriture_bundles_s"] = round(time.perf_counter() - t, 3)
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=2)
+    print(json.dumps(res, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# benchmarks/bench_pipeline.py
+# Temps des étapes du pipeline KPI sur données synthétiques, par taille (nombre d'agents).
+#   python -m benchmarks.bench_pipeline                        → 100 / 1000 / 10000 agents
+#   python -m benchmarks.bench_pipeline --tailles 100 1000 --reference benchmarks/results/pipeline.json
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+import pandas as pd
+
+from benchmarks.donnees_synthetiques import ecrire_classeurs, generer_donnees
+from modules import agregats, pda_store, preprocessing, visualisations
+from modules.cache_memoire import DONNEES
+from modules.exports import export_excel
+from modules.parametres import KPI_DISPONIBLES, construire_params, normaliser_ponderations
+from modules.synthese_rh import generer_rapport_rh, generer_rapports_rh_zip
+
+TAILLES = [100, 1000, 10000]
+SEUIL_REGRESSION = 1.25  # ratio courant / référence au-delà duquel une étape est signalée
+N_ECHANTILLON = 50  # opérations unitaires (rapport RH, requêtes PDA) mesurées par taille
+
+
+def _chrono(fn, repetitions=1):
+    """Médiane des temps (s) de `repetitions` appels ; retourne aussi le dernier résultat."""
+    temps, res = [], None
+    for _ in range(repetitions):
+        t = time.perf_counter()
+        res = fn()
+        temps.append(time.perf_counter() - t)
+    return statistics.median(temps), res
+
+
+def _vider_caches():
+    DONNEES.vider()
+    agregats._CUBES.vider()
+    agregats._INDEX.vider()
+    visualisations._FIGURES.vider()
+
+
+def _bench_store(agents, dossier):
+    """Opérations du store PDA (backend SQLite) sur une base vide dédiée."""
+    pda_store._backend_instance = pda_store._SqliteBackend(
+        os.path.join(dossier, "pda_actions.sqlite"), os.path.join(dossier, "pda_actions.json")
+    )
+    res = {}
+    payloads = [
+        {"agent": a, "kpi": KPI_DISPONIBLES[i % 5], "status": "À faire", "priority": "P2", "due_date": "2024-12-31"}
+        for i, a in enumerate(agents)
+    ]
+    t, ids = _chrono(lambda: [pda_store.add_action(p) for p in payloads])
+    res["pda_ajout_s"] = t
+    echantillon = agents[:N_ECHANTILLON]
+    res["pda_requete_agent_ms"] = _chrono(lambda: [pda_store.query_actions(agent=a) for a in echantillon])[0] / len(echantillon) * 1000
+    res["pda_valeurs_distinctes_s"] = _chrono(lambda: pda_store.distinct_values("agent"))[0]
+    res["pda_chargement_s"] = _chrono(pda_store.load_actions)[0]
+    res["pda_maj_ms"] = _chrono(lambda: [pda_store.update_action(i, {"status": "En cours"}) for i in ids[:N_ECHANTILLON]])[0] / N_ECHANTILLON * 1000
+    res["pda_suppression_ms"] = _chrono(lambda: [pda_store.delete_action(i) for i in ids[:N_ECHANTILLON]])[0] / N_ECHANTILLON * 1000
+    return res
+
+
+def bench_taille(n_agents, n_mois, repetitions, avec_xlsx, dossier):
+    res = {}
+    t, (df_r, df_o) = _chrono(lambda: generer_donnees(n_agents, n_mois))
+    res["generation_s"] = t
+
+    if avec_xlsx:
+        from modules.chargement import charger_fichiers
+
+        sous_dossier = os.path.join(dossier, f"xlsx_{n_agents}")
+        res["ecriture_xlsx_s"], (chemin_r, chemin_o) = _chrono(lambda: ecrire_classeurs(sous_dossier, n_agents, n_mois))
+        res["lecture_xlsx_s"] = _chrono(lambda: pd.read_excel(chemin_r))[0] + _chrono(lambda: pd.read_excel(chemin_o))[0]
+        df_r, df_o = charger_fichiers(chemin_r, chemin_o, workers=1)
+
+    params = construire_params(df_r)
+
+    def ecarts_froid():
+        _vider_caches()
+        return preprocessing.calcul_ecarts_objectifs(df_r.copy(deep=False), df_o.copy(deep=False), params)
+
+    res["ecarts_froid_s"], df = _chrono(ecarts_froid, repetitions)
+    autres_poids = dict(params, pondérations=normaliser_ponderations({k: i + 1 for i, k in enumerate(params["kpi"])}))
+    res["ecarts_repondere_s"] = _chrono(
+        lambda: preprocessing.calcul_ecarts_objectifs(df_r, df_o, autres_poids), repetitions
+    )[0]
+
+    def treemaps_froid():
+        agregats._CUBES.vider()
+        visualisations._FIGURES.vider()
+        return [visualisations.construire_treemap(df, k) for k in params["kpi"]]
+
+    res["treemaps_froid_s"] = _chrono(treemaps_froid, repetitions)[0]
+    res["treemaps_memo_s"] = _chrono(lambda: [visualisations.construire_treemap(df, k) for k in params["kpi"]])[0]
+
+    # vide : l'export embarque la feuille PDA du store courant
+    pda_store._backend_instance = pda_store._SqliteBackend(os.path.join(dossier, f"vide_{n_agents}.sqlite"))
+    res["export_excel_s"] = _chrono(lambda: export_excel(df), repetitions)[0]
+
+    agents = params["agents"]
+    echantillon = agents[:N_ECHANTILLON]
+    res["rapport_rh_ms"] = _chrono(lambda: [generer_rapport_rh(df, a, params) for a in echantillon])[0] / len(echantillon) * 1000
+    res["rapports_rh_zip_s"] = _chrono(lambda: generer_rapports_rh_zip(df, params, workers=1).close())[0]
+
+    res.update(_bench_store(agents, os.path.join(dossier, f"store_{n_agents}")))
+    return {k: round(v, 4) for k, v in res.items()}
+
+
+def comparer(res, reference):
+    """Étapes dont le temps dépasse SEUIL_REGRESSION × la référence : [(taille, étape, ref, courant)]."""
+    regressions = []
+    for taille, etapes in res["tailles"].items():
+        ref = reference.get("tailles", {}).get(taille, {})
+        for etape, v in etapes.items():
+            if etape in ref and ref[etape] > 0 and v / ref[etape] > SEUIL_REGRESSION:
+                regressions.append((taille, etape, ref[etape], v))
+    return regressions
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tailles", type=int, nargs="+", default=TAILLES)
+    ap.add_argument("--mois", type=int, default=12)
+    ap.add_argument("--repetitions", type=int, default=3)
+    ap.add_argument("--xlsx", action="store_true", help="passe aussi par l'écriture / lecture des classeurs")
+    ap.add_argument("--out", default=os.path.join("benchmarks", "results", "pipeline.json"))
+    ap.add_argument("--reference", help="résultats précédents (JSON) à comparer ; code retour 1 si régression")
+    args = ap.parse_args()
+
+    reference = None
+    if args.reference:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference = json.load(f)
+
+    res = {
+        "date": date.today().isoformat(),
+        "python": sys.version.split()[0],
+        "pandas": pd.__version__,
+        "cpu": os.cpu_count(),
+        "mois": args.mois,
+        "repetitions": args.repetitions,
+        "tailles": {},
+    }
+    with tempfile.TemporaryDirectory() as dossier:
+        for n in args.tailles:
+            print(f"— {n} agents × {args.mois} mois", flush=True)
+            res["tailles"][str(n)] = etapes = bench_taille(n, args.mois, args.repetitions, args.xlsx, dossier)
+            for etape, v in etapes.items():
+                print(f"  {etape:28s} {v:10.4f}")
+    pda_store._backend_instance = None
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=2)
+
+    if reference is not None:
+        regressions = comparer(res, reference)
+        for taille, etape, avant, apres in regressions:
+            print(f"Régression {taille} agents / {etape} : {avant} → {apres} (×{apres / avant:.2f})", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
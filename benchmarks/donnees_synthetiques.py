@@ -0,0 +1,77 @@
+# benchmarks/donnees_synthetiques.py
+# Jeux de données réalistes (N agents × M mois × 5 KPI) au format attendu par l'app.
+#   python -m benchmarks.donnees_synthetiques --agents 1000 --mois 12 --sortie data/synthetique
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from modules.parametres import KPI_DISPONIBLES
+
+# type (ligne "Type"), objectif de base, dispersion relative entre agents / d'un mois à l'autre, décimales
+PROFILS = {
+    "ABS (%)": ("min", 6.0, 0.45, 0.25, 2),
+    "Prod": ("max", 120.0, 0.12, 0.06, 0),
+    "Qualité (%)": ("max", 90.0, 0.05, 0.03, 2),
+    "DMT (sec)": ("min", 210.0, 0.15, 0.07, 0),
+    "TH prod (€)": ("target", 24.0, 0.10, 0.05, 2),
+}
+
+
+def liste_mois(n_mois, debut="2024-01"):
+    return pd.period_range(debut, periods=n_mois, freq="M").strftime("%Y-%m").tolist()
+
+
+def generer_donnees(n_agents, n_mois, seed=0, taux_manquants=0.01):
+    """
+    (df_resultats, df_objectifs) :
+    - résultats : une ligne par Agent × Mois, niveau propre à chaque agent + bruit mensuel ;
+    - objectifs : une ligne par Mois + la ligne "Type" (min / max / target).
+    """
+    rng = np.random.default_rng(seed)
+    mois = liste_mois(n_mois)
+    agents = [f"AG{i:05d}" for i in range(n_agents)]
+
+    df_resultats = pd.DataFrame({"Agent": np.repeat(agents, n_mois), "Mois": np.tile(mois, n_agents)})
+    objectifs = {"Mois": mois}
+    for kpi in KPI_DISPONIBLES:
+        _, base, disp_agent, disp_mois, dec = PROFILS[kpi]
+        obj_mois = base * (1 + rng.normal(0, 0.02, n_mois))
+        niveau_agent = rng.normal(1.0, disp_agent, n_agents)
+        valeurs = np.repeat(niveau_agent, n_mois) * np.tile(obj_mois, n_agents) * rng.normal(1.0, disp_mois, n_agents * n_mois)
+        valeurs = np.clip(valeurs, 0, 100 if "%" in kpi else None).round(dec)
+        valeurs[rng.random(len(valeurs)) < taux_manquants] = np.nan
+        df_resultats[kpi] = valeurs
+        objectifs[kpi] = obj_mois.round(dec)
+
+    df_objectifs = pd.DataFrame(objectifs)
+    ligne_type = pd.DataFrame([{"Mois": "Type", **{k: PROFILS[k][0] for k in KPI_DISPONIBLES}}])
+    df_objectifs = pd.concat([df_objectifs.astype(object), ligne_type], ignore_index=True)
+    return df_resultats, df_objectifs
+
+
+def ecrire_classeurs(dossier, n_agents, n_mois, seed=0):
+    """Écrit kpi_resultats.xlsx / kpi_objectifs.xlsx dans `dossier` et retourne leurs chemins."""
+    df_resultats, df_objectifs = generer_donnees(n_agents, n_mois, seed)
+    os.makedirs(dossier, exist_ok=True)
+    chemin_r = os.path.join(dossier, "kpi_resultats.xlsx")
+    chemin_o = os.path.join(dossier, "kpi_objectifs.xlsx")
+    df_resultats.to_excel(chemin_r, index=False)
+    df_objectifs.to_excel(chemin_o, index=False)
+    return chemin_r, chemin_o
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--agents", type=int, default=100)
+    ap.add_argument("--mois", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--sortie", default=os.path.join("data", "synthetique"))
+    args = ap.parse_args()
+    for chemin in ecrire_classeurs(args.sortie, args.agents, args.mois, args.seed):
+        print(chemin)
+
+
+if __name__ == "__main__":
+    main()
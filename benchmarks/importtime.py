@@ -0,0 +1,127 @@
+# benchmarks/importtime.py
+# Coût des imports par scénario (python -X importtime), médiane de N exécutions.
+#   python -m benchmarks.importtime            → écrit benchmarks/results/importtime.{json,md}
+#   python -m benchmarks.importtime --check    → code retour 1 si le budget login est dépassé
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Temps d'import cible avant l'affichage du formulaire de connexion (ms)
+BUDGET_LOGIN_MS = 800
+
+SOUS_MODULES_SUIVIS = {"plotly.express", "plotly.graph_objects"}
+
+SCENARIOS = {
+    # ce que app.py importe avant login()
+    "login": ["streamlit"],
+    # page principale après connexion, avant tout onglet
+    "page_import": [
+        "streamlit",
+        "modules.uploader",
+        "modules.settings",
+        "modules.preprocessing",
+        "modules.agregats",
+        "modules.empreintes",
+        "modules.perf",
+    ],
+    # tous les onglets + exports (ancien comportement de app.py au démarrage)
+    "app_complet": [
+        "streamlit",
+        "modules.uploader",
+        "modules.settings",
+        "modules.preprocessing",
+        "modules.agregats",
+        "modules.visualisations",
+        "plotly.express",
+        "modules.analytics",
+        "modules.pda_generator",
+        "modules.exports",
+        "modules.synthese_rh",
+    ],
+    # batch sans UI
+    "cli": ["modules.cli"],
+}
+
+
+def _mesurer(modules):
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    par_paquet = {}
+    total = 0
+    for ligne in proc.stderr.splitlines():
+        if not ligne.startswith("import time:") or "cumulative" in ligne:
+            continue
+        _, cumul, nom = ligne[len("import time:"):].split("|")
+        if not nom.startswith("  "):
+            total += int(cumul)  # import de premier niveau
+        # coût inclusif de chaque paquet racine (pandas, plotly...) et de chaque module du projet
+        nom = nom.strip()
+        if "." not in nom or nom.startswith("modules.") or nom in SOUS_MODULES_SUIVIS:
+            if not nom.startswith("_"):
+                par_paquet[nom] = int(cumul)
+    return total / 1000, {k: v / 1000 for k, v in par_paquet.items()}
+
+
+def mesurer(modules, repetitions=3):
+    mesures = [_mesurer(modules) for _ in range(repetitions)]
+    totaux = [m[0] for m in mesures]
+    median = statistics.median(totaux)
+    detail = mesures[totaux.index(median)][1]
+    top = dict(sorted(detail.items(), key=lambda kv: kv[1], reverse=True)[:12])
+    return {"total_ms": round(median, 1), "par_paquet_ms": {k: round(v, 1) for k, v in top.items()}}
+
+
+def _markdown(res):
+    lignes = [
+        "# Temps d'import par scénario",
+        "",
+        f"Python {res['python']} — budget login : {BUDGET_LOGIN_MS} ms.",
+        "Détail : coût inclusif de chaque paquet au moment de son premier import (les lignes se recouvrent).",
+        "",
+    ]
+    for nom, r in res["scenarios"].items():
+        lignes += [f"## {nom} — {r['total_ms']} ms", "", "| paquet | ms |", "|---|---:|"]
+        lignes += [f"| {k} | {v} |" for k, v in r["par_paquet_ms"].items()]
+        lignes.append("")
+    return "\n".join(lignes)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repetitions", type=int, default=3)
+    ap.add_argument("--sortie", default=os.path.join("benchmarks", "results"))
+    ap.add_argument("--check", action="store_true", help="échoue si le scénario login dépasse le budget")
+    args = ap.parse_args()
+
+    res = {
+        "python": sys.version.split()[0],
+        "budget_login_ms": BUDGET_LOGIN_MS,
+        "scenarios": {nom: mesurer(mods, args.repetitions) for nom, mods in SCENARIOS.items()},
+    }
+
+    os.makedirs(args.sortie, exist_ok=True)
+    with open(os.path.join(args.sortie, "importtime.json"), "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=2)
+    with open(os.path.join(args.sortie, "importtime.md"), "w", encoding="utf-8") as f:
+        f.write(_markdown(res))
+
+    for nom, r in res["scenarios"].items():
+        print(f"{nom:12s} {r['total_ms']:8.1f} ms")
+
+    login = res["scenarios"]["login"]["total_ms"]
+    if args.check and login > BUDGET_LOGIN_MS:
+        print(f"Budget login dépassé : {login} ms > {BUDGET_LOGIN_MS} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# modules/agregats.py
+# Agrégats agent / mois / agent×KPI calculés une fois par jeu de données,
+# partagés par toutes les vues (cartes KPI, synthèse, treemaps, détail agent).
+import numpy as np
+import pandas as pd
+
+from modules.cache_memoire import CacheLRU
+from modules.empreintes import empreinte_df
+
+SEUIL_TENDANCE = 0.05  # |Score_Global| au-delà duquel un agent-mois est en hausse / baisse
+
+# (empreinte données, KPI) -> cube ; partagé par les sessions (CacheLRU est thread-safe)
+_CUBES = CacheLRU("cubes", max_entrees=8)
+
+# empreinte données -> index des lignes par agent / (agent, mois)
+_INDEX = CacheLRU("index_lignes", max_entrees=8)
+
+
+def _construire(df, kpis):
+    score = df["Score_Global"].to_numpy(dtype="float64")
+    base = pd.DataFrame({
+        "Agent": df["Agent"].to_numpy(),
+        "Mois": df["Mois"].to_numpy(),
+        "score": score,
+        "hausse": score > SEUIL_TENDANCE,
+        "baisse": score < -SEUIL_TENDANCE,
+        "stable": (score >= -SEUIL_TENDANCE) & (score <= SEUIL_TENDANCE),
+    })
+    for kpi in kpis:
+        ecart = df[f"Ecart_{kpi}"].to_numpy(dtype="float64")
+        taille = np.abs(ecart) + 0.0001
+        base[f"E_{kpi}"] = ecart
+        base[f"T_{kpi}"] = taille
+        base[f"P_{kpi}"] = np.round(ecart, 2) * taille
+        base[f"R_{kpi}"] = np.round(ecart, 2)
+
+    g_agent = base.groupby("Agent", sort=False, observed=True)
+    par_agent = g_agent.agg(
+        score_moyen=("score", "mean"),
+        score_min=("score", "min"),
+        score_max=("score", "max"),
+        n=("score", "size"),
+        n_hausse=("hausse", "sum"),
+        n_baisse=("baisse", "sum"),
+        n_stable=("stable", "sum"),
+    )
+
+    par_mois = base.groupby("Mois", sort=True, observed=True).agg(
+        score_moyen=("score", "mean"),
+        score_min=("score", "min"),
+        score_max=("score", "max"),
+        n=("score", "size"),
+        n_agents=("Agent", "nunique"),
+    )
+
+    # Agent × KPI : moyennes, extrêmes, comptes + sommes utiles aux treemaps
+    cols = [c for k in kpis for c in (f"E_{k}", f"T_{k}", f"P_{k}")]
+    sommes = g_agent[cols].sum()
+    moyennes = g_agent[[f"E_{k}" for k in kpis]].mean()
+    minimums = g_agent[[f"E_{k}" for k in kpis]].min()
+    maximums = g_agent[[f"E_{k}" for k in kpis]].max()
+    comptes = g_agent[[f"E_{k}" for k in kpis]].count()
+
+    par_agent_kpi = {}
+    par_kpi = {}
+    for kpi in kpis:
+        e = f"E_{kpi}"
+        par_agent_kpi[kpi] = pd.DataFrame({
+            "moyenne": moyennes[e],
+            "min": minimums[e],
+            "max": maximums[e],
+            "n": comptes[e],
+            "taille": sommes[f"T_{kpi}"],
+            "pondere": sommes[f"P_{kpi}"],
+        })
+        par_kpi[kpi] = {
+            "moyenne": float(base[e].mean()),
+            "moyenne_arrondie": float(base[f"R_{kpi}"].mean()),
+            "min": float(base[e].min()),
+            "max": float(base[e].max()),
+        }
+
+    return {
+        "global": {
+            "score_moyen": float(np.mean(score)) if len(score) else float("nan"),
+            "n_lignes": len(df),
+            "n_agents": len(par_agent),
+            "n_mois": len(par_mois),
+        },
+        "par_agent": par_agent,
+        "par_mois": par_mois,
+        "par_agent_kpi": par_agent_kpi,
+        "par_kpi": par_kpi,
+    }
+
+
+def cube_agregats(df, kpis):
+    """Cube d'agrégats de df_ecarts, construit une seule fois par (données, KPI)."""
+    return _CUBES.obtenir((empreinte_df(df), tuple(kpis)), lambda: _construire(df, kpis))
+
+
+def index_lignes(df):
+    """
+    Positions des lignes de df par agent et par (agent, mois), construites une fois par jeu de données :
+    les vues agent / PDA / rapport sont des lookups au lieu de filtres booléens sur tout le tableau.
+    """
+    return _INDEX.obtenir(empreinte_df(df), lambda: _construire_index(df))
+
+
+def _construire_index(df):
+    mois = df["Mois"].to_numpy()
+    # première ligne de chaque couple (comme df[(Agent == a) & (Mois == m)].iloc[0])
+    premieres = np.flatnonzero(~df.duplicated(["Agent", "Mois"], keep="first").to_numpy())
+    par_agent = df.groupby("Agent", sort=False, observed=True).indices
+    return {
+        "agents": list(par_agent),  # ordre d'apparition
+        "agents_tries": sorted(par_agent),
+        "mois_tries": sorted(pd.unique(mois)),
+        "par_agent": par_agent,
+        "par_agent_mois": dict(
+            zip(zip(df["Agent"].to_numpy()[premieres].tolist(), mois[premieres].tolist()), premieres.tolist())
+        ),
+    }
+
+
+def lignes_agent(df, agent):
+    """Lignes de df pour un agent (dans l'ordre de df)."""
+    positions = index_lignes(df)["par_agent"].get(agent)
+    if positions is None:
+        return df.iloc[0:0]
+    return df.take(positions)
+
+
+def derniere_ligne_agent(df, agent):
+    """Dernière ligne de l'agent dans df (Series), ou None."""
+    positions = index_lignes(df)["par_agent"].get(agent)
+    return None if positions is None else df.iloc[positions[-1]]
+
+
+def ligne_agent_mois(df, agent, mois):
+    """Ligne (Series) du couple agent / mois, ou None."""
+    position = index_lignes(df)["par_agent_mois"].get((agent, mois))
+    return None if position is None else df.iloc[position]
+
+
+def synthese_analytique(df, params) -> dict:
+    """Synthèse RH (compteurs + tendance) lue dans le cube ; utilisée par l'UI et le batch."""
+    cube = cube_agregats(df, params["kpi"])
+    par_agent = cube["par_agent"]
+    score_moyen = round(cube["global"]["score_moyen"] * 100, 2)
+
+    if score_moyen > 5:
+        niveau, message = "success", "✅ Tendance très positive."
+    elif score_moyen > 0:
+        niveau, message = "info", "📈 Légère amélioration."
+    elif score_moyen > -5:
+        niveau, message = "warning", "⚠️ Baisse modérée à surveiller."
+    else:
+        niveau, message = "error", "🚨 Baisse significative : action recommandée."
+
+    # un agent compte dans chaque catégorie où il a au moins un mois
+    return {
+        "agents_hausse": int((par_agent["n_hausse"] > 0).sum()),
+        "agents_stables": int((par_agent["n_stable"] > 0).sum()),
+        "agents_baisse": int((par_agent["n_baisse"] > 0).sum()),
+        "score_moyen_pct": score_moyen,
+        "agents_total": cube["global"]["n_agents"],
+        "niveau": niveau,
+        "message": message,
+    }
@@ -0,0 +1,168 @@
+# modules/cache_memoire.py
+# Cache mémoire partagé par toutes les sessions du processus (sans dépendance UI) :
+# LRU borné en octets, thread-safe, avec compteurs hits / misses / évictions.
+# DONNEES garde les tableaux importés (parse_cache) et les écarts calculés (preprocessing),
+# indexés par empreinte de contenu + paramètres : dix sessions sur le même fichier partagent une copie.
+# EXPORTS garde les exports générés (Excel, Word, ZIP de campagne) en bytes, sur un budget séparé.
+#   CACHE_DONNEES_MO=1024  → budget de 1 Go (défaut : 512 Mo)
+#   CACHE_EXPORTS_MO=256   → budget des exports (défaut : 128 Mo)
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+MO = 1024 * 1024
+
+
+def taille_objet(valeur) -> int:
+    """Octets occupés (DataFrame, Series, ndarray, et leurs tuples / listes / dicts)."""
+    if isinstance(valeur, pd.DataFrame):
+        return int(valeur.memory_usage(index=True, deep=True).sum())
+    if isinstance(valeur, pd.Series):
+        return int(valeur.memory_usage(index=True, deep=True))
+    if isinstance(valeur, np.ndarray):
+        return int(valeur.nbytes)
+    if isinstance(valeur, dict):
+        return sum(taille_objet(v) for v in valeur.values())
+    if isinstance(valeur, (tuple, list)):
+        return sum(taille_objet(v) for v in valeur)
+    return sys.getsizeof(valeur)
+
+
+class CacheLRU:
+    """
+    LRU thread-safe borné en octets et / ou en nombre d'entrées ; l'entrée la plus récente (et son parent)
+    est toujours gardée.
+    budget_octets=None : pas de borne en octets (tailles non calculées), pour les mémos bornés par max_entrees.
+    Une entrée peut dépendre d'une entrée parent dont elle partage les données (parent=cle) : elle ne compte
+    que ses propres octets, garde son parent au moins aussi récent qu'elle, et sort du cache avec lui.
+    """
+
+    def __init__(self, nom: str, budget_octets=None, max_entrees=None):
+        self.nom = nom
+        self.budget_octets = budget_octets
+        self.max_entrees = max_entrees
+        self._entrees = OrderedDict()  # cle -> (valeur, octets, parent), du moins au plus récemment utilisé
+        self._enfants = {}  # cle parent -> {cles des entrées qui en dépendent}
+        self._octets = 0
+        self._lock = threading.Lock()
+        self._en_cours = {}  # cle -> verrou du calcul en cours (obtenir)
+        self.hits = self.misses = self.evictions = 0
+
+    def _lire(self, cle):
+        item = self._entrees.get(cle)
+        if item is None:
+            return None
+        self._entrees.move_to_end(cle)
+        if item[2] is not None:
+            self._entrees.move_to_end(item[2])
+        return item[0]
+
+    def get(self, cle, defaut=None):
+        with self._lock:
+            valeur = self._lire(cle)
+            if valeur is None:
+                self.misses += 1
+                return defaut
+            self.hits += 1
+            return valeur
+
+    def put(self, cle, valeur, octets=None, parent=None):
+        if parent is not None and parent not in self._entrees:
+            octets, parent = None, None  # sans son parent en cache, l'entrée porte seule toutes ses données
+        if self.budget_octets is None:
+            octets = 0
+        elif octets is None:
+            octets = taille_objet(valeur)  # hors verrou : peut être long
+        with self._lock:
+            if parent is not None and parent not in self._entrees:  # parent évincé entre-temps
+                octets, parent = (0 if self.budget_octets is None else taille_objet(valeur)), None
+            if cle in self._entrees:
+                self._retirer(cle, eviction=False)
+            self._entrees[cle] = (valeur, octets, parent)
+            self._octets += octets
+            if parent is not None:
+                self._enfants.setdefault(parent, set()).add(cle)
+                self._entrees.move_to_end(parent)
+            gardees = {cle, parent}
+            for ancienne in list(self._entrees):  # du moins au plus récemment utilisé
+                if not self._depasse():
+                    break
+                if ancienne not in gardees and ancienne in self._entrees:
+                    self._retirer(ancienne)
+        return valeur
+
+    def _retirer(self, cle, eviction=True):
+        _, octets, parent = self._entrees.pop(cle)
+        self._octets -= octets
+        self.evictions += eviction
+        if parent is not None and parent in self._enfants:
+            self._enfants[parent].discard(cle)
+        for enfant in self._enfants.pop(cle, ()):
+            if enfant in self._entrees:
+                self._retirer(enfant, eviction)
+
+    def _depasse(self) -> bool:
+        return (self.budget_octets is not None and self._octets > self.budget_octets) or (
+            self.max_entrees is not None and len(self._entrees) > self.max_entrees
+        )
+
+    def obtenir(self, cle, calcul, octets=None, parent=None):
+        """
+        Valeur en cache, sinon calcul() mis en cache. Des sessions qui demandent la même clé
+        en même temps attendent le premier calcul au lieu de le refaire.
+        octets(valeur) : taille à compter si elle diffère de taille_objet, avec parent (cle de l'entrée
+        dont elle partage les données) ; si le parent n'est plus en cache, la taille complète est comptée.
+        """
+        with self._lock:
+            valeur = self._lire(cle)
+            if valeur is not None:
+                self.hits += 1
+                return valeur
+            verrou = self._en_cours.setdefault(cle, threading.Lock())
+        with verrou:
+            with self._lock:
+                valeur = self._lire(cle)
+                if valeur is not None:  # calculé pendant l'attente
+                    self.hits += 1
+                    return valeur
+                self.misses += 1
+            try:
+                valeur = calcul()
+                return self.put(cle, valeur, octets(valeur) if octets else None, parent)
+            finally:
+                with self._lock:
+                    self._en_cours.pop(cle, None)
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+            self._enfants.clear()
+            self._octets = 0
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def __contains__(self, cle):
+        return cle in self._entrees
+
+    def stats(self) -> dict:
+        with self._lock:
+            demandes = self.hits + self.misses
+            return {
+                "cache": self.nom,
+                "entrees": len(self._entrees),
+                "mo": round(self._octets / MO, 1),
+                "budget_mo": None if self.budget_octets is None else round(self.budget_octets / MO, 1),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "taux_hit_%": round(100 * self.hits / demandes, 1) if demandes else None,
+            }
+
+
+DONNEES = CacheLRU("donnees", int(float(os.environ.get("CACHE_DONNEES_MO", 512)) * MO))
+EXPORTS = CacheLRU("exports", int(float(os.environ.get("CACHE_EXPORTS_MO", 128)) * MO))
@@ -0,0 +1,139 @@
+# modules/chargement.py
+# Lecture + contrôle des classeurs résultats / objectifs, sans dépendance UI.
+# Chaque côté accepte un fichier, plusieurs fichiers (un par mois) ou des ZIP, en .xlsx, .csv ou .parquet ;
+# toutes les feuilles (une par plateau) sont lues, contrôlées sur les mêmes colonnes puis concaténées.
+import io
+import os
+import zipfile
+
+import pandas as pd
+
+from modules.empreintes import empreinte_cle, empreinte_df, marquer_empreinte
+from modules.parse_cache import lire_classeurs_cache, lire_octets
+from modules.validation import valider
+
+EXTENSIONS = (".xlsx", ".csv", ".parquet")
+
+
+class ErreurChargement(ValueError):
+    def __init__(self, message, problemes=()):
+        super().__init__(message)
+        self.problemes = list(problemes)  # détail de la validation (modules.validation)
+
+
+def _nom(fichier) -> str:
+    if isinstance(fichier, (str, os.PathLike)):
+        return os.path.basename(fichier)
+    return getattr(fichier, "name", "fichier")
+
+
+def _est_archive(contenu: bytes) -> bool:
+    # un .xlsx est lui-même un zip : on le reconnaît à son [Content_Types].xml
+    if not zipfile.is_zipfile(io.BytesIO(contenu)):
+        return False
+    with zipfile.ZipFile(io.BytesIO(contenu)) as z:
+        return "[Content_Types].xml" not in z.namelist()
+
+
+def _sources(fichiers):
+    """[(nom, contenu)] : les ZIP sont dépliés (fichiers EXTENSIONS seulement, dans l'ordre des noms)."""
+    if not isinstance(fichiers, (list, tuple)):
+        fichiers = [fichiers]
+    sources = []
+    for fichier in fichiers:
+        nom, contenu = _nom(fichier), lire_octets(fichier)
+        if _est_archive(contenu):
+            with zipfile.ZipFile(io.BytesIO(contenu)) as z:
+                membres = sorted(
+                    m for m in z.namelist()
+                    if m.lower().endswith(EXTENSIONS) and not os.path.basename(m).startswith(("~$", "."))
+                )
+                if not membres:
+                    raise ErreurChargement(f"{nom} : aucun fichier .xlsx / .csv / .parquet dans l'archive.")
+                sources += [(f"{nom}/{m}", z.read(m)) for m in membres]
+        else:
+            sources.append((nom, contenu))
+    return sources
+
+
+def _assembler(sources, classeurs):
+    """
+    Feuilles non vides des classeurs, concaténées dans l'ordre (fichier puis feuille),
+    et leur provenance [("fichier / feuille", position de début)] pour citer les lignes fautives.
+    Lève ErreurChargement si une feuille n'a pas les mêmes colonnes que la première.
+    """
+    tables, provenance, debut, colonnes = [], [], 0, None
+    for (nom, _), feuilles in zip(sources, classeurs):
+        for feuille, df in feuilles.items():
+            if df.empty and len(df.columns) == 0:
+                continue
+            if colonnes is None:
+                colonnes, reference = list(df.columns), f"{nom} / {feuille}"
+            elif set(df.columns) != set(colonnes):
+                manquantes = [c for c in colonnes if c not in df.columns]
+                en_trop = [c for c in df.columns if c not in colonnes]
+                raise ErreurChargement(
+                    f"{nom} / {feuille} : colonnes différentes de {reference}"
+                    + (f" — manquantes : {', '.join(map(str, manquantes))}" if manquantes else "")
+                    + (f" — en trop : {', '.join(map(str, en_trop))}" if en_trop else "")
+                )
+            tables.append(df)
+            provenance.append((f"{nom} / {feuille}", debut))
+            debut += len(df)
+
+    if not tables:
+        raise ErreurChargement("Aucune donnée dans les fichiers importés.")
+    if len(tables) == 1:
+        return tables[0], provenance  # porte déjà l'empreinte (fichier, feuille)
+    df = pd.concat([t[colonnes] for t in tables], ignore_index=True)
+    return marquer_empreinte(df, empreinte_cle(*(empreinte_df(t) for t in tables))), provenance
+
+
+def _une_ligne_type(df_objectifs: pd.DataFrame) -> pd.DataFrame:
+    # un fichier d'objectifs par mois = une ligne "Type" chacun : la dernière fait foi, placée en fin
+    if "Mois" not in df_objectifs.columns:
+        return df_objectifs
+    est_type = (df_objectifs["Mois"] == "Type").to_numpy()
+    if est_type.sum() <= 1:
+        return df_objectifs
+    lignes = df_objectifs[~est_type]
+    df = pd.concat([lignes, df_objectifs[est_type].iloc[[-1]]], ignore_index=True)
+    return marquer_empreinte(df, empreinte_cle(empreinte_df(df_objectifs), "type"))
+
+
+def charger_et_valider(fichiers_resultats, fichiers_objectifs, workers=None, doublons="dedoublonner", processus=False):
+    """
+    Lit résultats et objectifs (chemin, fichier importé, liste de fichiers ou ZIP) via le cache de parsing,
+    puis les contrôle (modules.validation) avant tout calcul.
+    processus=True : classeurs parsés dans un pool de processus (batch) plutôt que de threads (interface).
+    Retourne (df_resultats, df_objectifs, avertissements).
+    Lève ErreurChargement si les feuilles n'ont pas les mêmes colonnes ou si la validation
+    trouve au moins une erreur (toutes les erreurs dans e.problemes).
+    """
+    sources_r, sources_o = _sources(fichiers_resultats), _sources(fichiers_objectifs)
+    # un seul passage : tous les classeurs (résultats + objectifs) sont parsés ensemble
+    classeurs = lire_classeurs_cache(
+        [contenu for _, contenu in sources_r + sources_o], workers=workers, processus=processus
+    )
+    df_resultats, provenance_r = _assembler(sources_r, classeurs[: len(sources_r)])
+    df_objectifs, provenance_o = _assembler(sources_o, classeurs[len(sources_r):])
+    # validation sur les lignes telles qu'importées (références de lignes exactes) ;
+    # elle retient, comme _une_ligne_type, la dernière ligne "Type"
+    df_resultats, df_objectifs, problemes = valider(
+        df_resultats, df_objectifs, doublons=doublons, provenance_r=provenance_r, provenance_o=provenance_o
+    )
+    erreurs = [p for p in problemes if p["gravite"] == "erreur"]
+    if erreurs:
+        raise ErreurChargement(
+            f"{len(erreurs)} problème(s) dans les fichiers importés : "
+            + " | ".join(f"{p['table']} — {p['colonne'] + ' : ' if p['colonne'] else ''}{p['message']}" for p in erreurs),
+            problemes,
+        )
+    return df_resultats, _une_ligne_type(df_objectifs), problemes
+
+
+def charger_fichiers(fichiers_resultats, fichiers_objectifs, workers=None, doublons="dedoublonner", processus=False):
+    """charger_et_valider sans les avertissements : (df_resultats, df_objectifs)."""
+    return charger_et_valider(
+        fichiers_resultats, fichiers_objectifs, workers=workers, doublons=doublons, processus=processus
+    )[:2]
@@ -0,0 +1,106 @@
+# modules/cli.py
+# Traitement batch sans Streamlit ni Plotly :
+#   python -m modules.cli --resultats kpi_resultats.xlsx --objectifs kpi_objectifs.xlsx \
+#       --params params.json --sortie sortie/
+import argparse
+import json
+import os
+import shutil
+import sys
+from datetime import date
+
+from modules.agregats import synthese_analytique
+from modules.chargement import ErreurChargement, charger_et_valider
+from modules.parametres import params_depuis_dict
+from modules.pda_engine import agents_a_pda, ecrire_bundles_pda, generer_pda_lot
+from modules.preprocessing import calcul_ecarts_objectifs
+
+
+def _lire_params(chemin):
+    if not chemin:
+        return {}
+    with open(chemin, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def executer(
+    resultats, objectifs, params_json=None, sortie="sortie", debut_pda=None, exports=True, workers=None,
+    doublons="dedoublonner",
+):
+    """Calcule écarts + synthèse + PDA (+ exports) et écrit tout dans `sortie`. Retourne la synthèse."""
+    df_resultats, df_objectifs, avertissements = charger_et_valider(
+        resultats, objectifs, workers=workers, doublons=doublons, processus=True
+    )
+    for p in avertissements:
+        print(f"Attention : {p['table']} — {p['message']} — {p['lignes']}", file=sys.stderr)
+    params = params_depuis_dict(df_resultats, _lire_params(params_json))
+    df_ecarts = calcul_ecarts_objectifs(df_resultats, df_objectifs, params)
+
+    os.makedirs(sortie, exist_ok=True)
+    df_ecarts.to_csv(os.path.join(sortie, "ecarts.csv"), index=False)
+
+    synthese = synthese_analytique(df_ecarts, params)
+    with open(os.path.join(sortie, "synthese.json"), "w", encoding="utf-8") as f:
+        json.dump({"params": params, "synthese": synthese}, f, ensure_ascii=False, indent=2, default=str)
+
+    a_pda = agents_a_pda(df_ecarts, params["kpi"])
+    a_pda.assign(KPI_a_traiter=a_pda["KPI_a_traiter"].map(" > ".join)).to_csv(
+        os.path.join(sortie, "agents_a_pda.csv"), index=False
+    )
+    par_agent = generer_pda_lot(df_ecarts, params["kpi"], debut_pda or date.today(), workers=workers)
+    ecrire_bundles_pda(par_agent, os.path.join(sortie, "pda"))
+
+    if exports:
+        # imports à la demande : xlsxwriter / python-docx seulement si besoin
+        from modules.exports import export_excel_stream
+        from modules.synthese_rh import generer_rapports_rh_zip
+
+        export_excel_stream(df_ecarts, chemin=os.path.join(sortie, "PerformTrack360_rapport_kpi.xlsx"))
+        with generer_rapports_rh_zip(df_ecarts, params, workers=workers) as zip_tmp, open(
+            os.path.join(sortie, "PerformTrack360_rapports_agents.zip"), "wb"
+        ) as f:
+            shutil.copyfileobj(zip_tmp, f)
+
+    return synthese
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m modules.cli", description="PerformTrack 360 — traitement batch")
+    ap.add_argument("--resultats", required=True, nargs="+", help="kpi_resultats.xlsx (plusieurs classeurs ou ZIP possibles)")
+    ap.add_argument("--objectifs", required=True, nargs="+", help="kpi_objectifs.xlsx (avec ligne 'Type' ; idem)")
+    ap.add_argument("--params", help="JSON : kpi, mois, agents, pondérations (tous optionnels)")
+    ap.add_argument("--sortie", default="sortie", help="dossier de sortie (défaut : sortie/)")
+    ap.add_argument("--debut-pda", type=date.fromisoformat, help="date de démarrage des PDA (AAAA-MM-JJ)")
+    ap.add_argument("--sans-exports", action="store_true", help="ne pas produire l'Excel ni les rapports Word")
+    ap.add_argument("--workers", type=int, help="processus pour la lecture des classeurs, les PDA et les rapports (défaut : nb de CPU)")
+    ap.add_argument(
+        "--doublons", choices=["dedoublonner", "rejeter"], default="dedoublonner",
+        help="lignes Agent/Mois en double : garder la dernière (défaut) ou refuser l'import",
+    )
+    args = ap.parse_args(argv)
+
+    try:
+        synthese = executer(
+            args.resultats,
+            args.objectifs,
+            params_json=args.params,
+            sortie=args.sortie,
+            debut_pda=args.debut_pda,
+            exports=not args.sans_exports,
+            workers=args.workers,
+            doublons=args.doublons,
+        )
+    except ErreurChargement as e:
+        if not e.problemes:
+            print(f"Erreur : {e}", file=sys.stderr)
+        for p in e.problemes:
+            print(f"{p['gravite'].capitalize()} : {p['table']} — {p['colonne'] + ' : ' if p['colonne'] else ''}"
+                  f"{p['message']} — {p['lignes']}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(synthese, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
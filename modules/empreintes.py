@@ -0,0 +1,50 @@
+# modules/empreintes.py
+import hashlib
+
+import pandas as pd
+
+_ATTR = "_empreinte"
+_ATTR_MOIS = "_empreintes_mois"
+
+
+def marquer_empreinte(df: pd.DataFrame, empreinte: str) -> pd.DataFrame:
+    """
+    Associe une empreinte de contenu connue (ex: sha256 du fichier importé) au DataFrame.
+    L'empreinte est liée à l'objet (id) : une copie / un filtre qui hérite des attrs
+    ne la réutilise pas par erreur.
+    """
+    df.attrs[_ATTR] = (id(df), empreinte)
+    return df
+
+
+def empreinte_df(df: pd.DataFrame) -> str:
+    """Empreinte stable du contenu (valeurs + index + colonnes), calculée une seule fois par objet."""
+    memo = df.attrs.get(_ATTR)
+    if memo and memo[0] == id(df):
+        return memo[1]
+
+    h = hashlib.sha1()
+    h.update(repr(list(df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    empreinte = h.hexdigest()
+    marquer_empreinte(df, empreinte)
+    return empreinte
+
+
+def empreinte_cle(*parts) -> str:
+    """Empreinte courte d'un tuple de paramètres (listes, dicts, chaînes...)."""
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def marquer_empreintes_mois(df: pd.DataFrame, empreintes: dict) -> pd.DataFrame:
+    """Empreinte de chaque tranche Mois de df (liée à l'objet, comme marquer_empreinte)."""
+    df.attrs[_ATTR_MOIS] = (id(df), empreintes)
+    return df
+
+
+def empreintes_mois(df: pd.DataFrame):
+    """{mois: empreinte} si df en porte (ex: données de l'entrepôt), sinon None."""
+    memo = df.attrs.get(_ATTR_MOIS)
+    if memo and memo[0] == id(df):
+        return memo[1]
+    return None
@@ -0,0 +1,285 @@
+# modules/entrepot.py
+# Historique KPI persistant (sans dépendance UI) : une partition Parquet par mois sous data/entrepot/.
+# Chaque site / plateau a son propre historique (data/entrepot/plateaux/<plateau>-<hash du nom>/) ; sans plateau,
+# l'historique commun est à la racine de data/entrepot/.
+#   resultats/<mois>.parquet   lignes Agent × Mois du mois (upsert par Agent ; .pkl si colonnes mixtes)
+#   objectifs.pkl              objectifs mensuels + ligne "Type" (upsert par Mois, refusé s'il contredit l'existant)
+#   manifeste.json             mois connus (empreinte de chaque partition), agents, imports déjà intégrés
+# Chaque import mensuel ne réécrit que les mois qu'il contient ; les mois inchangés gardent
+# leur empreinte et donc leurs écarts en cache (preprocessing).
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from modules.empreintes import empreinte_cle, empreinte_df, marquer_empreinte, marquer_empreintes_mois
+
+ENTREPOT_DIR = os.path.join("data", "entrepot")
+
+_lock = threading.Lock()
+
+# plateau -> (version du manifeste, (df_resultats, df_objectifs) relus depuis le disque)
+_charge = {}
+
+_ATTR_PLATEAU = "_entrepot_plateau"
+
+
+class ConflitObjectifs(ValueError):
+    """Objectifs importés différents de ceux déjà stockés pour les mêmes mois (rien n'est écrit)."""
+
+    def __init__(self, plateau, mois):
+        super().__init__(
+            f"Historique {libelle(plateau)} : objectifs différents de ceux déjà stockés pour {', '.join(map(str, mois))}"
+        )
+        self.plateau = plateau
+        self.mois = list(mois)
+
+
+def libelle(plateau) -> str:
+    return f"« {plateau} »" if plateau else "commun"
+
+
+def verifier_plateau(plateau):
+    """Lève ValueError pour un nom de site / plateau inutilisable ("" désigne l'historique commun)."""
+    if plateau and str(plateau).strip() in ("", ".", ".."):
+        raise ValueError(f"Nom de site / plateau invalide : '{plateau}'")
+
+
+def _dossier_plateau(plateau) -> str:
+    # lisible (sans "." : pas de remontée de dossier) + hash du nom exact : "Site A" et "Site_A"
+    # (ou "Casa/1" et "Casa 1") ont chacun leur dossier
+    verifier_plateau(plateau)
+    lisible = re.sub(r"[^\w-]+", "_", str(plateau)).strip("_")[:40] or "plateau"
+    return f"{lisible}-{hashlib.sha1(str(plateau).encode('utf-8')).hexdigest()[:10]}"
+
+
+def _chemin(plateau, *parties):
+    if plateau:
+        return os.path.join(ENTREPOT_DIR, "plateaux", _dossier_plateau(plateau), *parties)
+    return os.path.join(ENTREPOT_DIR, *parties)
+
+
+def _nom_partition(mois) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(mois))
+
+
+def _lire_partition(plateau, fichier):
+    chemin = _chemin(plateau, "resultats", fichier)
+    if fichier.endswith(".pkl"):
+        with open(chemin, "rb") as f:
+            return pickle.load(f)
+    return pd.read_parquet(chemin)
+
+
+def _ecrire_partition(plateau, mois, df):
+    nom = _nom_partition(mois)
+    try:
+        _ecrire_atomique(_chemin(plateau, "resultats", f"{nom}.parquet"), lambda tmp: df.to_parquet(tmp, index=False))
+        fichier, obsolete = f"{nom}.parquet", f"{nom}.pkl"
+    except (ImportError, TypeError, ValueError):
+        # colonnes mixtes (texte + nombres) : pas de parquet possible
+        _ecrire_atomique(_chemin(plateau, "resultats", f"{nom}.pkl"), lambda tmp: _pickle(df, tmp))
+        fichier, obsolete = f"{nom}.pkl", f"{nom}.parquet"
+    for ext in (obsolete, obsolete + ".tmp"):
+        if os.path.exists(_chemin(plateau, "resultats", ext)):
+            os.remove(_chemin(plateau, "resultats", ext))
+    return fichier
+
+
+def _pickle(obj, chemin):
+    with open(chemin, "wb") as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _texte_mois(serie: pd.Series) -> pd.Series:
+    # dates Excel → "AAAA-MM" : un libellé de mois stable pour les partitions et la jointure
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime("%Y-%m")
+    return serie.map(lambda m: m.strftime("%Y-%m") if hasattr(m, "strftime") else m)
+
+
+def _manifeste_vide():
+    return {"version": 0, "mois": {}, "agents": [], "types": {}, "imports": []}
+
+
+def lire_manifeste(plateau="") -> dict:
+    chemin = _chemin(plateau, "manifeste.json")
+    if not os.path.exists(chemin):
+        return _manifeste_vide()
+    with open(chemin, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ecrire_atomique(chemin, ecrire):
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    tmp = chemin + ".tmp"
+    ecrire(tmp)
+    os.replace(tmp, chemin)
+
+
+def _ecrire_manifeste(plateau, manifeste):
+    def ecrire(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifeste, f, ensure_ascii=False, indent=1)
+
+    _ecrire_atomique(_chemin(plateau, "manifeste.json"), ecrire)
+
+
+def _lire_objectifs(plateau):
+    chemin = _chemin(plateau, "objectifs.pkl")
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, "rb") as f:
+        return pickle.load(f)
+
+
+def _upsert_partition(plateau, mois, nouveau, manifeste):
+    """Fusionne les lignes d'un mois avec la partition existante ; retourne True si elle a changé."""
+    info = manifeste["mois"].get(str(mois))
+    if info is not None:
+        existant = _lire_partition(plateau, info["fichier"])
+        # les agents déjà présents gardent leur position, leurs valeurs sont remplacées
+        garde = existant[~existant["Agent"].isin(nouveau["Agent"])]
+        ordre = pd.concat([existant["Agent"], nouveau["Agent"][~nouveau["Agent"].isin(existant["Agent"])]])
+        fusion = pd.concat([garde, nouveau], ignore_index=True)
+        fusion = fusion.set_index("Agent").loc[ordre.to_numpy()].reset_index()
+        fusion = fusion[list(dict.fromkeys(list(existant.columns) + list(nouveau.columns)))]
+    else:
+        fusion = nouveau.reset_index(drop=True)
+
+    empreinte = empreinte_df(fusion)
+    if info is not None and info["empreinte"] == empreinte:
+        return False
+
+    fichier = _ecrire_partition(plateau, mois, fusion)
+    manifeste["mois"][str(mois)] = {"fichier": fichier, "empreinte": empreinte, "lignes": len(fusion)}
+    return True
+
+
+def ajouter(df_resultats: pd.DataFrame, df_objectifs: pd.DataFrame, plateau="", remplacer_objectifs=False) -> list:
+    """
+    Intègre un import (résultats + objectifs) dans l'historique du plateau, upsert par Agent/Mois.
+    Retourne la liste des mois ajoutés ou modifiés ([] si l'import était déjà intégré).
+    Lève ConflitObjectifs, sans rien écrire, si les objectifs (ou la ligne "Type") d'un mois déjà stocké
+    diffèrent de ceux importés, sauf remplacer_objectifs=True.
+    """
+    cle_import = empreinte_cle(empreinte_df(df_resultats), empreinte_df(df_objectifs))
+
+    with _lock:
+        manifeste = lire_manifeste(plateau)
+        if cle_import in manifeste["imports"]:
+            return []
+
+        # Objectifs : les mois importés remplacent les anciens, la ligne "Type" la plus récente fait foi
+        df_o = df_objectifs.assign(Mois=_texte_mois(df_objectifs["Mois"]))
+        est_type = df_o["Mois"] == "Type"
+        nouveaux = df_o[~est_type]
+        types = dict(manifeste["types"])
+        if est_type.any():
+            ligne_type = df_o[est_type].iloc[[0]]
+            types = {k: str(v) for k, v in ligne_type.iloc[0].items() if k != "Mois" and pd.notna(v)}
+        anciens = _lire_objectifs(plateau)
+        if anciens is not None:
+            anciens = anciens[anciens["Mois"] != "Type"]
+            if not remplacer_objectifs:
+                conflits = _objectifs_en_conflit(anciens, nouveaux)
+                if any(manifeste["types"].get(k, v) != v for k, v in types.items()):
+                    conflits.append("Type")
+                if conflits:
+                    raise ConflitObjectifs(plateau, conflits)
+            obj_modifies = _mois_objectifs_modifies(anciens, nouveaux)
+            nouveaux = pd.concat([anciens[~anciens["Mois"].isin(nouveaux["Mois"])], nouveaux], ignore_index=True)
+        else:
+            obj_modifies = nouveaux["Mois"].tolist()
+        manifeste["types"] = types
+        objectifs = pd.concat([nouveaux, pd.DataFrame([{"Mois": "Type", **types}])], ignore_index=True)
+
+        df_r = df_resultats.assign(Mois=_texte_mois(df_resultats["Mois"]))
+        df_r = df_r.drop_duplicates(["Agent", "Mois"], keep="last")
+        mois_modifies = [
+            m for m, lignes in df_r.groupby("Mois", sort=True) if _upsert_partition(plateau, m, lignes, manifeste)
+        ]
+
+        _ecrire_atomique(_chemin(plateau, "objectifs.pkl"), lambda tmp: _pickle(objectifs, tmp))
+
+        connus = set(manifeste["agents"])
+        manifeste["agents"] += [a for a in df_r["Agent"].unique().tolist() if a not in connus]
+        manifeste["imports"] = (manifeste["imports"] + [cle_import])[-50:]
+        manifeste["version"] += 1
+        _ecrire_manifeste(plateau, manifeste)
+
+    return sorted(set(mois_modifies) | {m for m in obj_modifies if str(m) in manifeste["mois"]})
+
+
+def _objectifs_en_conflit(anciens, nouveaux) -> list:
+    """Mois déjà stockés dont les objectifs importés diffèrent (comparaison numérique ; deux cellules vides sont égales)."""
+    kpis = [c for c in nouveaux.columns if c != "Mois" and c in anciens.columns]
+    avant = anciens.drop_duplicates("Mois", keep="last").set_index("Mois")
+    apres = nouveaux.drop_duplicates("Mois", keep="last").set_index("Mois")
+    mois = apres.index.intersection(avant.index)
+    if not len(mois) or not kpis:
+        return []
+    a = avant.loc[mois, kpis].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    n = apres.loc[mois, kpis].apply(pd.to_numeric, errors="coerce").to_numpy(dtype="float64")
+    egaux = np.isclose(a, n, rtol=1e-9, atol=0) | (np.isnan(a) & np.isnan(n))
+    return [str(m) for m in mois[~egaux.all(axis=1)]]
+
+
+def _mois_objectifs_modifies(anciens, nouveaux):
+    modifies = []
+    for mois, ligne in nouveaux.groupby("Mois", sort=False):
+        avant = anciens[anciens["Mois"] == mois]
+        if avant.empty or empreinte_df(avant.reset_index(drop=True)) != empreinte_df(ligne.reset_index(drop=True)):
+            modifies.append(mois)
+    return modifies
+
+
+def est_vide(plateau="") -> bool:
+    return not lire_manifeste(plateau)["mois"]
+
+
+def charger(plateau=""):
+    """
+    (df_resultats, df_objectifs) de tout l'historique du plateau, relus une fois par version du manifeste.
+    df_resultats porte l'empreinte de chaque mois (calcul incrémental des écarts).
+    """
+    manifeste = lire_manifeste(plateau)
+    version = manifeste["version"]
+    with _lock:
+        if plateau in _charge and _charge[plateau][0] == version:
+            return _charge[plateau][1]
+
+        mois = sorted(manifeste["mois"])
+        parties = [_lire_partition(plateau, manifeste["mois"][m]["fichier"]) for m in mois]
+        df_resultats = pd.concat(parties, ignore_index=True) if parties else pd.DataFrame(columns=["Agent", "Mois"])
+        empreintes_mois = {m: manifeste["mois"][m]["empreinte"] for m in mois}
+        # l'empreinte inclut le plateau : deux historiques identiques restent distincts
+        marquer_empreinte(df_resultats, empreinte_cle(plateau, tuple(empreintes_mois.items())))
+        marquer_empreintes_mois(df_resultats, empreintes_mois)
+        df_resultats.attrs[_ATTR_PLATEAU] = (id(df_resultats), plateau)
+
+        df_objectifs = _lire_objectifs(plateau)
+        empreinte_df(df_objectifs)
+
+        _charge[plateau] = (version, (df_resultats, df_objectifs))
+        return _charge[plateau][1]
+
+
+def plateau_de(df_resultats: pd.DataFrame):
+    """Plateau de l'historique dont vient df_resultats (None s'il ne vient pas de l'entrepôt)."""
+    marque = df_resultats.attrs.get(_ATTR_PLATEAU)
+    return marque[1] if marque and marque[0] == id(df_resultats) else None
+
+
+def perimetre(df_resultats: pd.DataFrame):
+    """(mois, agents) disponibles : lus dans le manifeste pour les données de l'entrepôt, sinon dans df."""
+    plateau = plateau_de(df_resultats)
+    if plateau is not None:
+        manifeste = lire_manifeste(plateau)
+        return sorted(manifeste["mois"]), list(manifeste["agents"])
+    return df_resultats["Mois"].unique().tolist(), df_resultats["Agent"].unique().tolist()
@@ -1,17 +1,135 @@
 # modules/exports.py
 import pandas as pd
 import io
+import os
+import re
+import tempfile
+
+import xlsxwriter
+
+from modules.cache_memoire import EXPORTS
 from modules.pda_store import load_actions
 
+TAILLE_BLOC = 10_000  # lignes converties à la fois (mémoire bornée)
+
+
+def _nom_feuille(nom, pris):
+    # Excel : 31 caractères max, sans []:*?/\ , noms uniques
+    base = re.sub(r"[\[\]:*?/\\]", "-", str(nom))[:31] or "Feuille"
+    nom, i = base, 2
+    while nom.lower() in pris:
+        suffixe = f" ({i})"
+        nom, i = base[: 31 - len(suffixe)] + suffixe, i + 1
+    pris.add(nom.lower())
+    return nom
+
+
+def _cellule(valeur):
+    # listes / dicts (ex. "tags" des actions PDA) : texte, comme le faisait pd.ExcelWriter
+    return valeur if valeur is None or pd.api.types.is_scalar(valeur) else str(valeur)
+
+
+def _ecrire_feuille(wb, nom, df, positions=None, taille_bloc=TAILLE_BLOC):
+    """Écrit df (ou les lignes `positions`) ligne à ligne, par blocs : compatible constant_memory."""
+    ws = wb.add_worksheet(nom)
+    entete = wb.add_format({"bold": True, "border": 1})
+    ws.write_row(0, 0, [str(c) for c in df.columns], entete)
+    # seules les colonnes objet peuvent contenir des valeurs non scalaires
+    colonnes_objet = [c for c, t in df.dtypes.items() if t == object]
+
+    n = len(df) if positions is None else len(positions)
+    ligne = 1
+    for debut in range(0, n, taille_bloc):
+        if positions is None:
+            bloc = df.iloc[debut:debut + taille_bloc]
+        else:
+            bloc = df.take(positions[debut:debut + taille_bloc])
+        bloc = bloc.astype(object)
+        if colonnes_objet:
+            bloc = bloc.assign(**{c: bloc[c].map(_cellule) for c in colonnes_objet})
+        for valeurs in bloc.where(bloc.notna(), None).itertuples(index=False, name=None):
+            ws.write_row(ligne, 0, valeurs)
+            ligne += 1
+
+
+def _kpis_de(df):
+    return [c[len("Ecart_"):] for c in df.columns if c.startswith("Ecart_")]
+
+
+def export_excel_stream(df, chemin=None, decoupage=None, taille_bloc=TAILLE_BLOC):
+    """
+    Export Excel en mémoire constante (xlsxwriter constant_memory), écrit directement dans un fichier.
+    decoupage : None (une feuille) | "kpi" (une feuille par KPI) | "mois" (une feuille par mois).
+    Retourne le chemin du fichier (temporaire si `chemin` n'est pas fourni ; à supprimer par l'appelant).
+    """
+    if chemin is None:
+        fd, chemin = tempfile.mkstemp(suffix=".xlsx", prefix="PerformTrack360_")
+        os.close(fd)
 
-def export_excel(df):
-    buffer = io.BytesIO()
     actions = load_actions()
     df_actions = pd.DataFrame(actions) if actions else pd.DataFrame()
 
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df.to_excel(writer, sheet_name="Données KPI", index=False)
-        df_actions.to_excel(writer, sheet_name="PDA", index=False)
+    wb = xlsxwriter.Workbook(
+        chemin,
+        {"constant_memory": True, "default_date_format": "yyyy-mm-dd", "nan_inf_to_errors": True},
+    )
+    pris = set()
+    try:
+        if decoupage is None:
+            _ecrire_feuille(wb, _nom_feuille("Données KPI", pris), df, taille_bloc=taille_bloc)
+
+        elif decoupage == "kpi":
+            for kpi in _kpis_de(df):
+                cols = ["Agent", "Mois"] + [
+                    f"{p}_{kpi}" for p in ("Val", "Obj", "Type", "Ecart", "Pond") if f"{p}_{kpi}" in df.columns
+                ]
+                if "Score_Global" in df.columns:
+                    cols.append("Score_Global")
+                _ecrire_feuille(wb, _nom_feuille(kpi, pris), df[cols], taille_bloc=taille_bloc)
+
+        elif decoupage == "mois":
+            for mois, positions in df.groupby("Mois", sort=False).indices.items():
+                _ecrire_feuille(wb, _nom_feuille(mois, pris), df, positions, taille_bloc)
+
+        else:
+            raise ValueError(f"Découpage inconnu : {decoupage} (attendu : None, 'kpi' ou 'mois')")
+
+        _ecrire_feuille(wb, _nom_feuille("PDA", pris), df_actions, taille_bloc=taille_bloc)
+    finally:
+        wb.close()
+
+    return chemin
+
+
+def export_excel(df, decoupage=None):
+    chemin = export_excel_stream(df, decoupage=decoupage)
+    try:
+        with open(chemin, "rb") as f:
+            buffer = io.BytesIO(f.read())
+    finally:
+        os.remove(chemin)
 
     buffer.seek(0)
     return buffer
+
+
+def export_memoise(cle, construire):
+    """
+    Contenu (bytes) d'un export, généré au premier appel par `construire()`
+    puis servi depuis le cache EXPORTS (borné en octets) tant que la clé ne change pas.
+    Un export plus gros que tout le budget est servi sans être gardé.
+    """
+    contenu = EXPORTS.get(cle)
+    if contenu is not None:
+        return contenu
+
+    contenu = construire()
+    if hasattr(contenu, "getvalue"):
+        contenu = contenu.getvalue()
+    elif hasattr(contenu, "read"):
+        with contenu:  # fichier temporaire (ZIP de campagne) : fermé dès la lecture
+            contenu = contenu.read()
+
+    if len(contenu) <= EXPORTS.budget_octets:
+        EXPORTS.put(cle, contenu, len(contenu))
+    return contenu
@@ -0,0 +1,41 @@
+# modules/memoire.py
+# Empreinte mémoire de df_ecarts (octets par colonne), avant / après compaction des types.
+import numpy as np
+import pandas as pd
+
+
+def types_larges(df: pd.DataFrame) -> pd.DataFrame:
+    """Équivalent de df avec les types d'avant compaction (chaînes objet, float64, int64)."""
+    larges = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            larges[col] = s.astype(s.cat.categories.dtype)
+        elif s.dtype.kind == "f" and s.dtype != np.float64:
+            larges[col] = s.astype(np.float64)
+        elif s.dtype.kind == "i" and s.dtype != np.int64:
+            larges[col] = s.astype(np.int64)
+    return df.assign(**larges) if larges else df
+
+
+def octets_par_colonne(df: pd.DataFrame) -> pd.Series:
+    return df.memory_usage(index=False, deep=True)
+
+
+def rapport_memoire(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Une ligne par colonne (+ TOTAL) : type et octets avant / après compaction, gain en %.
+    "Avant" est reconstruit avec types_larges(df).
+    """
+    avant, apres = types_larges(df), df
+    rapport = pd.DataFrame(
+        {
+            "type_avant": avant.dtypes.astype(str),
+            "octets_avant": octets_par_colonne(avant),
+            "type_apres": apres.dtypes.astype(str),
+            "octets_apres": octets_par_colonne(apres),
+        }
+    )
+    rapport.loc["TOTAL"] = ["", rapport["octets_avant"].sum(), "", rapport["octets_apres"].sum()]
+    rapport["gain_%"] = (100 * (1 - rapport["octets_apres"] / rapport["octets_avant"])).round(1)
+    return rapport
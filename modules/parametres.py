@@ -0,0 +1,38 @@
+# modules/parametres.py
+# Paramètres d'analyse (KPI, mois, agents, pondérations) sans dépendance UI.
+
+KPI_DISPONIBLES = ["ABS (%)", "Prod", "Qualité (%)", "DMT (sec)", "TH prod (€)"]
+POIDS_DEFAUT = 20
+
+
+def normaliser_ponderations(pond: dict) -> dict:
+    total = sum(pond.values())
+    return {k: v / total for k, v in pond.items()}
+
+
+def construire_params(df_resultats, kpi=None, mois=None, agents=None, ponderations=None) -> dict:
+    """
+    Params au format attendu par calcul_ecarts_objectifs.
+    Valeurs absentes → tous les KPI / mois / agents, poids égaux (POIDS_DEFAUT).
+    """
+    kpi = list(KPI_DISPONIBLES if kpi is None else kpi)
+    ponderations = ponderations or {}
+    pond = {k: ponderations.get(k, POIDS_DEFAUT) for k in kpi}
+
+    return {
+        "kpi": kpi,
+        "mois": df_resultats["Mois"].unique().tolist() if mois is None else list(mois),
+        "agents": df_resultats["Agent"].unique().tolist() if agents is None else list(agents),
+        "pondérations": normaliser_ponderations(pond),
+    }
+
+
+def params_depuis_dict(df_resultats, d: dict) -> dict:
+    """Params depuis un dict (ex: fichier JSON du batch) ; accepte 'pondérations' ou 'ponderations'."""
+    return construire_params(
+        df_resultats,
+        kpi=d.get("kpi"),
+        mois=d.get("mois"),
+        agents=d.get("agents"),
+        ponderations=d.get("pondérations", d.get("ponderations")),
+    )
@@ -0,0 +1,202 @@
+# modules/parse_cache.py
+# Tableaux importés, en cache par empreinte du contenu : RAM (cache_memoire.DONNEES, partagé
+# par toutes les sessions) → disque (data/cache_fichiers) → parsing.
+# Sur disque, un dossier par classeur : une feuille = un fichier Parquet (.pkl seulement si la feuille
+# mélange texte et nombres dans une colonne, ex. ligne "Type" des objectifs) + feuilles.json (ordre, noms).
+import csv
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import pickle
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from modules.cache_memoire import DONNEES
+from modules.empreintes import empreinte_cle, marquer_empreinte
+
+CACHE_DIR = os.path.join("data", "cache_fichiers")
+
+# calamine (Rust, python-calamine) lit les .xlsx bien plus vite qu'openpyxl ; optionnel
+MOTEUR_EXCEL = "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+
+def empreinte_octets(contenu: bytes) -> str:
+    return hashlib.sha256(contenu).hexdigest()
+
+
+def _memoire_get(cle):
+    return DONNEES.get(("fichier", cle))
+
+
+def _memoire_put(cle, df):
+    DONNEES.put(("fichier", cle), df)
+
+
+def _chemin(cle):
+    return os.path.join(CACHE_DIR, cle)
+
+
+def _lire_feuille(chemin):
+    if chemin.endswith(".pkl"):
+        with open(chemin, "rb") as f:
+            return pickle.load(f)
+    return pd.read_parquet(chemin)
+
+
+def _ecrire_feuille(dossier, position, nom, df) -> str:
+    base = os.path.join(dossier, f"{position}-" + re.sub(r"[^\w.-]+", "_", str(nom)))
+    try:
+        df.to_parquet(base + ".parquet", index=True)
+        return os.path.basename(base) + ".parquet"
+    except (ImportError, TypeError, ValueError):
+        # colonnes mixtes (texte + nombres) : pas de parquet possible
+        if os.path.exists(base + ".parquet"):
+            os.remove(base + ".parquet")
+        with open(base + ".pkl", "wb") as f:
+            pickle.dump(df, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return os.path.basename(base) + ".pkl"
+
+
+def _disque_get(cle):
+    dossier = _chemin(cle)
+    try:
+        with open(os.path.join(dossier, "feuilles.json"), encoding="utf-8") as f:
+            feuilles = json.load(f)
+    except FileNotFoundError:
+        return None
+    return {nom: _lire_feuille(os.path.join(dossier, fichier)) for nom, fichier in feuilles}
+
+
+def _disque_put(cle, classeur):
+    """Écrit {feuille: DataFrame} dans un dossier temporaire, renommé d'un coup (lecteurs concurrents sûrs)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=CACHE_DIR, prefix=f"{cle}.", suffix=".tmp")
+    try:
+        feuilles = [[nom, _ecrire_feuille(tmp, i, nom, df)] for i, (nom, df) in enumerate(classeur.items())]
+        with open(os.path.join(tmp, "feuilles.json"), "w", encoding="utf-8") as f:
+            json.dump(feuilles, f, ensure_ascii=False)
+        os.rename(tmp, _chemin(cle))
+    except OSError:
+        if not os.path.isdir(_chemin(cle)):
+            raise
+        # déjà écrit par une autre session / un autre processus
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def lire_octets(fichier) -> bytes:
+    """Contenu brut d'un chemin, d'un fichier importé (Streamlit), d'un objet avec read() ou de bytes."""
+    if isinstance(fichier, bytes):
+        return fichier
+    if isinstance(fichier, (str, os.PathLike)):
+        with open(fichier, "rb") as f:
+            return f.read()
+    return fichier.getvalue() if hasattr(fichier, "getvalue") else fichier.read()
+
+
+def format_contenu(contenu: bytes) -> str:
+    """"parquet", "xlsx" ou "csv", d'après les premiers octets (le nom du fichier n'est pas fiable)."""
+    if contenu[:4] == b"PAR1":
+        return "parquet"
+    if contenu[:4] == b"PK\x03\x04":
+        return "xlsx"
+    return "csv"
+
+
+def _lire_csv(contenu: bytes) -> pd.DataFrame:
+    try:
+        texte = contenu.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        texte = contenu.decode("cp1252")  # export Excel "CSV (séparateur : point-virgule)"
+    try:
+        sep = csv.Sniffer().sniff(texte[: texte.find("\n") + 1 or None], delimiters=";,\t").delimiter
+    except csv.Error:
+        sep = ","
+    # CSV français : point-virgule et virgule décimale
+    if sep != ";":
+        return pd.read_csv(io.StringIO(texte), sep=sep)
+    return _virgules_decimales(pd.read_csv(io.StringIO(texte), sep=sep, decimal=","))
+
+
+def _virgules_decimales(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    decimal="," ne s'applique qu'aux colonnes entièrement numériques : dans une colonne qui contient aussi
+    du texte (ligne "Type" des objectifs, "n/a"...), les "6,04" restent des chaînes. Ces valeurs-là sont
+    converties, le texte reste tel quel (comme une colonne lue par read_excel).
+    """
+    colonnes = {}
+    for col in df.columns:
+        serie = df[col]
+        if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+            continue
+        virgule = serie.str.contains(",", regex=False, na=False)
+        if not virgule.any():
+            continue
+        nombres = pd.to_numeric(
+            serie.where(virgule).str.replace(r"\s", "", regex=True).str.replace(",", ".", regex=False), errors="coerce"
+        )
+        if nombres.notna().any():
+            colonnes[col] = serie.astype(object).mask(nombres.notna(), nombres).infer_objects()
+    return df.assign(**colonnes) if colonnes else df
+
+
+def _parser_classeur(contenu: bytes, moteur_excel=None) -> dict:
+    """{feuille: DataFrame} ; un CSV / Parquet est une feuille unique nommée d'après son format."""
+    # fonction de module : exécutée dans les threads ou les processus du pool
+    fmt = format_contenu(contenu)
+    if fmt == "parquet":
+        return {fmt: pd.read_parquet(io.BytesIO(contenu))}
+    if fmt == "csv":
+        return {fmt: _lire_csv(contenu)}
+    return pd.read_excel(io.BytesIO(contenu), sheet_name=None, engine=moteur_excel or MOTEUR_EXCEL)
+
+
+def lire_classeurs_cache(fichiers, workers=None, processus=False) -> list:
+    """
+    Toutes les feuilles de plusieurs classeurs (.xlsx, .csv ou .parquet) : [{feuille: DataFrame}, ...] dans l'ordre de `fichiers`.
+    Cache RAM (DONNEES) → disque (un dossier par classeur) ; seuls les classeurs absents du cache
+    sont parsés, en parallèle (workers=1 → séquentiel) : pool de threads par défaut, sûr depuis une session
+    Streamlit ; processus=True (batch, modules.cli) pour un pool de processus.
+    Chaque feuille porte l'empreinte (fichier, feuille).
+    """
+    contenus = [lire_octets(f) for f in fichiers]
+    cles = [empreinte_cle(empreinte_octets(c), "feuilles") for c in contenus]
+
+    classeurs = {}
+    a_parser = {}
+    for cle, contenu in zip(cles, contenus):
+        if cle in classeurs or cle in a_parser:
+            continue
+        classeur = _memoire_get(cle)
+        if classeur is None:
+            classeur = _disque_get(cle)
+            if classeur is not None:
+                _memoire_put(cle, classeur)
+        if classeur is None:
+            a_parser[cle] = contenu
+        else:
+            classeurs[cle] = classeur
+
+    if a_parser:
+        if workers == 1 or len(a_parser) <= 1:
+            parses = map(_parser_classeur, a_parser.values())
+        else:
+            executeur = ProcessPoolExecutor if processus else ThreadPoolExecutor
+            with executeur(max_workers=min(workers or os.cpu_count() or 1, len(a_parser))) as pool:
+                parses = list(pool.map(_parser_classeur, a_parser.values()))
+        for cle, classeur in zip(a_parser, parses):
+            _disque_put(cle, classeur)
+            _memoire_put(cle, classeur)
+            classeurs[cle] = classeur
+
+    return [
+        {nom: marquer_empreinte(df.copy(deep=False), empreinte_cle(cle, nom)) for nom, df in classeurs[cle].items()}
+        for cle in cles
+    ]
@@ -3,7 +3,15 @@ import streamlit as st
 import pandas as pd
 from datetime import date
 
-from modules.pda_store import load_actions, add_action, update_action, delete_action
+from modules.agregats import index_lignes, ligne_agent_mois
+from modules.pda_store import (
+    add_action,
+    delete_action,
+    distinct_values,
+    get_action,
+    query_actions,
+    update_action,
+)
 
 ACTION_TYPES = [
     "Coaching 1:1 (écoute ciblée)",
@@ -32,7 +40,35 @@ def _kpi_blocking_rules(kpi: str, ecart: float):
     return None
 
 
+# Callbacks des boutons : exécutés avant le rerun du fragment,
+# le tableau affiché reflète donc déjà la modification.
+def _maj_action(action_id: str):
+    etat = st.session_state
+    ok = update_action(
+        action_id,
+        {
+            "status": etat[f"pda_status_{action_id}"],
+            "owner": etat[f"pda_owner_{action_id}"].strip(),
+            "priority": etat[f"pda_prio_{action_id}"],
+            "preuve": etat[f"pda_preuve_{action_id}"].strip(),
+            "expected_impact": etat[f"pda_expected_{action_id}"].strip(),
+        },
+    )
+    etat["pda_flash"] = (
+        ("success", "Action mise à jour.") if ok else ("error", "Impossible de mettre à jour l’action (id introuvable).")
+    )
+
+
+def _suppr_action(action_id: str):
+    ok = delete_action(action_id)
+    st.session_state["pda_flash"] = (
+        ("warning", "Action supprimée.") if ok else ("error", "Impossible de supprimer (id introuvable).")
+    )
+
+
+@st.fragment
 def afficher_pda(df_ecarts: pd.DataFrame, params: dict):
+    # fragment : contexte + création ne relancent que la section PDA
     st.subheader("🧩 PDA – Plan d’Action TL (création, suivi, mesure)")
 
     if df_ecarts is None or df_ecarts.empty:
@@ -40,20 +76,21 @@ def afficher_pda(df_ecarts: pd.DataFrame, params: dict):
         return
 
     # --- Contexte ---
+    index = index_lignes(df_ecarts)
     c1, c2, c3 = st.columns([2, 2, 2])
     with c1:
-        agent = st.selectbox("Agent", sorted(df_ecarts["Agent"].unique()))
+        agent = st.selectbox("Agent", index["agents_tries"])
     with c2:
         kpi = st.selectbox("KPI", params["kpi"])
     with c3:
-        mois_ref = st.selectbox("Mois de référence", sorted(df_ecarts["Mois"].unique()))
+        mois_ref = st.selectbox("Mois de référence", index["mois_tries"])
 
-    df_sel = df_ecarts[(df_ecarts["Agent"] == agent) & (df_ecarts["Mois"] == mois_ref)]
-    if df_sel.empty:
+    row = ligne_agent_mois(df_ecarts, agent, mois_ref)
+    if row is None:
         st.warning("Aucune donnée KPI pour ce couple Agent/Mois.")
         return
 
-    ecart = float(df_sel.iloc[0][f"Ecart_{kpi}"])
+    ecart = float(row[f"Ecart_{kpi}"])
     ecart_pct = round(ecart * 100, 2)
 
     hint = _kpi_blocking_rules(kpi, ecart)
@@ -109,35 +146,41 @@ def afficher_pda(df_ecarts: pd.DataFrame, params: dict):
                 add_action(payload)
                 st.success("Action PDA créée.")
 
-    # --- Suivi ---
+    _suivi_actions()
+
+
+@st.fragment
+def _suivi_actions():
+    # fragment imbriqué : filtres, mise à jour et suppression ne rafraîchissent que le tableau
     st.markdown("### 📌 Suivi des actions")
-    actions = load_actions()
-    df_actions = pd.DataFrame(actions) if actions else pd.DataFrame()
+    flash = st.session_state.pop("pda_flash", None)
+    if flash:
+        getattr(st, flash[0])(flash[1])
 
-    if df_actions.empty:
+    agents_actions = distinct_values("agent")
+
+    if not agents_actions:
         st.warning("Aucune action enregistrée pour le moment.")
         return
 
-    # Filtres
+    # Filtres (appliqués directement par le store, sans charger toutes les actions)
     f1, f2, f3, f4 = st.columns(4)
     with f1:
-        flt_agent = st.selectbox("Filtre Agent", ["Tous"] + sorted(df_actions["agent"].unique().tolist()))
+        flt_agent = st.selectbox("Filtre Agent", ["Tous"] + agents_actions)
     with f2:
         flt_status = st.selectbox("Filtre Statut", ["Tous"] + STATUSES)
     with f3:
-        flt_kpi = st.selectbox("Filtre KPI", ["Tous"] + sorted(df_actions["kpi"].unique().tolist()))
+        flt_kpi = st.selectbox("Filtre KPI", ["Tous"] + distinct_values("kpi"))
     with f4:
         flt_prio = st.selectbox("Filtre Priorité", ["Tous"] + PRIORITIES)
 
-    view = df_actions.copy()
-    if flt_agent != "Tous":
-        view = view[view["agent"] == flt_agent]
-    if flt_status != "Tous":
-        view = view[view["status"] == flt_status]
-    if flt_kpi != "Tous":
-        view = view[view["kpi"] == flt_kpi]
-    if flt_prio != "Tous":
-        view = view[view["priority"] == flt_prio]
+    actions = query_actions(
+        agent=None if flt_agent == "Tous" else flt_agent,
+        status=None if flt_status == "Tous" else flt_status,
+        kpi=None if flt_kpi == "Tous" else flt_kpi,
+        priority=None if flt_prio == "Tous" else flt_prio,
+    )
+    view = pd.DataFrame(actions, columns=None if actions else ["id"])
 
     cols = [
         "id",
@@ -156,10 +199,8 @@ def afficher_pda(df_ecarts: pd.DataFrame, params: dict):
     ]
     view = view[[c for c in cols if c in view.columns]]
 
-    st.dataframe(
-        view.sort_values(["priority", "due_date"], ascending=[True, True]),
-        use_container_width=True,
-    )
+    # déjà trié par priorité puis deadline
+    st.dataframe(view, use_container_width=True)
 
     st.markdown("### ✏️ Mettre à jour une action")
     action_ids = view["id"].tolist()
@@ -168,49 +209,32 @@ def afficher_pda(df_ecarts: pd.DataFrame, params: dict):
         return
 
     selected_id = st.selectbox("Sélectionner une action (id)", action_ids)
-    row = df_actions[df_actions["id"] == selected_id].iloc[0].to_dict()
+    row = get_action(selected_id) or {}
 
+    # clés par action : changer d'action recharge ses valeurs
     u1, u2, u3 = st.columns(3)
     with u1:
-        new_status = st.selectbox(
+        st.selectbox(
             "Nouveau statut",
             STATUSES,
             index=STATUSES.index(row.get("status", "À faire")) if row.get("status") in STATUSES else 0,
+            key=f"pda_status_{selected_id}",
         )
     with u2:
-        new_owner = st.text_input("Owner (maj)", value=row.get("owner", "TL"))
+        st.text_input("Owner (maj)", value=row.get("owner", "TL"), key=f"pda_owner_{selected_id}")
     with u3:
-        new_prio = st.selectbox(
+        st.selectbox(
             "Priorité (maj)",
             PRIORITIES,
             index=PRIORITIES.index(row.get("priority", "P2")) if row.get("priority") in PRIORITIES else 1,
+            key=f"pda_prio_{selected_id}",
         )
 
-    new_preuve = st.text_input("Preuve / lien / note", value=row.get("preuve", ""))
-    new_expected = st.text_input("Impact attendu (maj)", value=row.get("expected_impact", ""))
+    st.text_input("Preuve / lien / note", value=row.get("preuve", ""), key=f"pda_preuve_{selected_id}")
+    st.text_input("Impact attendu (maj)", value=row.get("expected_impact", ""), key=f"pda_expected_{selected_id}")
 
     b1, b2 = st.columns([1, 1])
     with b1:
-        if st.button("✅ Enregistrer la mise à jour"):
-            ok = update_action(
-                selected_id,
-                {
-                    "status": new_status,
-                    "owner": new_owner.strip(),
-                    "priority": new_prio,
-                    "preuve": new_preuve.strip(),
-                    "expected_impact": new_expected.strip(),
-                },
-            )
-            if ok:
-                st.success("Action mise à jour.")
-            else:
-                st.error("Impossible de mettre à jour l’action (id introuvable).")
-
+        st.button("✅ Enregistrer la mise à jour", on_click=_maj_action, args=(selected_id,))
     with b2:
-        if st.button("🗑️ Supprimer l’action"):
-            ok = delete_action(selected_id)
-            if ok:
-                st.warning("Action supprimée.")
-            else:
-                st.error("Impossible de supprimer (id introuvable).")
+        st.button("🗑️ Supprimer l’action", on_click=_suppr_action, args=(selected_id,))
@@ -0,0 +1,520 @@
+# modules/pda_engine.py
+# Logique PDA sans Streamlit : décision (driver, trajectoire, timeline, playbook) + lot.
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from modules.cache_memoire import CacheLRU
+from modules.empreintes import empreinte_df
+
+APP_BRAND_LINE = "PerformTrack 360 | TL Command Center — Intelcia"
+
+SEUIL_TARGET = 0.03  # |écart| au-delà duquel un KPI "target" est à traiter
+
+# (empreinte df_ecarts, KPI) -> matrice des drivers ; partagé par les sessions (CacheLRU est thread-safe)
+_DRIVERS = CacheLRU("drivers", max_entrees=8)
+
+# ------------------------------------------------------------
+# Management playbook (call center oriented)
+# ------------------------------------------------------------
+MANAGEMENT_MODES = {
+    "Coaching (GROW)": {
+        "when": "Si l’agent a la base mais manque de méthode / structure.",
+        "rituals": [
+            "1:1 30 min (GROW) : Goal → Reality → Options → Will",
+            "Micro-feedback quotidien (5 min) : 1 fait + 1 action + 1 objectif",
+            "Proof: 2 écoutes + score + note de coaching",
+        ],
+        "cadence": "Daily 5 min + 2 checkpoints (J+2, J+5).",
+    },
+    "Management directif (S1)": {
+        "when": "Si l’agent est junior ou en dérive forte : besoin d’instructions claires.",
+        "rituals": [
+            "Brief 10 min : règles non négociables + script + timing",
+            "Check-list de traitement (étapes fixes) affichée",
+            "Contrôle 1 appel/jour + correction immédiate",
+        ],
+        "cadence": "Daily + contrôle systématique 5 jours.",
+    },
+    "Situational Leadership (S2/S3)": {
+        "when": "Si l’agent sait faire mais n’est pas régulier (motivation/rigueur).",
+        "rituals": [
+            "S2 (coach) : expliquer + faire pratiquer + feedback",
+            "S3 (support) : laisser faire + enlever les blocages",
+            "Points de suivi : J+3 puis S2",
+        ],
+        "cadence": "2 à 3 points/semaine + 1 shadow.",
+    },
+    "Routine de pilotage (Management by numbers)": {
+        "when": "Si le problème est surtout de discipline de process / suivi KPI.",
+        "rituals": [
+            "Objectif chiffré + trajectoire (ex: DMT 220→190→170→158)",
+            "Daily KPI check (2 min) + action corrective immédiate",
+            "Tableau de bord TL : 1 KPI driver + 1 KPI garde-fou (Qualité)",
+        ],
+        "cadence": "Daily tracking + revue hebdo.",
+    },
+}
+
+# ------------------------------------------------------------
+# KPI playbooks (Intelcia / call center)
+# ------------------------------------------------------------
+PLAYBOOK = {
+    "DMT (sec)": {
+        "theme": "DMT",
+        "root_causes": [
+            "Manque d’écoute active (mauvaise qualification → rework)",
+            "Manque de directivité (l’appel s’étire)",
+            "Manque de concentration / prise de notes inefficace",
+            "Complexité demandes / knowledge peu maîtrisée",
+            "Manque d’autonomie (sollicitation excessive)",
+            "After-call (ACW) trop long / non standardisé",
+            "Mise en attente excessive (recherche, validation tardive)",
+        ],
+        "actions_bank": [
+            "Débrief 1:1 basé sur 2 écoutes (faits → causes → actions)",
+            "Rappel méthode : qualification courte + questions fermées + reformulation",
+            "Template notes ACW (standard) + objectif ACW",
+            "Challenge : réduire le temps moyen par palier (trajectoire)",
+            "Suivi quotidien fin de shift (2 minutes) + correction immédiate",
+        ],
+        "default_owners": ["TL", "CQ", "FORMATEURS"],
+        "guardrail": "Qualité (%)",
+    },
+    "Qualité (%)": {
+        "theme": "Qualité",
+        "root_causes": [
+            "Non-respect script / étapes obligatoires",
+            "Erreurs KO récurrentes (vérifs manquantes / mauvaise info)",
+            "Connaissance produit/process insuffisante",
+            "Vitesse qui dégrade la conformité (pression DMT)",
+        ],
+        "actions_bank": [
+            "Calibration qualité + rappel KO (exemples concrets)",
+            "Coaching sur 3 erreurs récurrentes (preuves à l’appui)",
+            "Simulation 10 min/jour sur cas KO",
+            "Shadowing 1 session avec top performer",
+            "Validation : 2 écoutes de contrôle (objectif : 0 KO)",
+        ],
+        "default_owners": ["TL", "CQ", "FORMATEURS"],
+        "guardrail": "DMT (sec)",
+    },
+    "Prod": {
+        "theme": "Productivité",
+        "root_causes": [
+            "Rythme faible / organisation",
+            "Maîtrise outil/process insuffisante",
+            "Trop de temps sur cas non standard",
+            "Dépendance forte (aide fréquente)",
+        ],
+        "actions_bank": [
+            "Identifier 2 tâches répétitives → standardiser (phrases type / templates)",
+            "Mini-objectifs journaliers + suivi TL",
+            "Accompagnement live 30 min (priorités + méthode)",
+            "Shadowing avec agent performant",
+            "Check garde-fou : Qualité stable",
+        ],
+        "default_owners": ["TL", "FORMATEURS", "OPS"],
+        "guardrail": "Qualité (%)",
+    },
+    "ABS (%)": {
+        "theme": "Absentéisme",
+        "root_causes": [
+            "Problèmes personnels/transport",
+            "Démotivation / climat",
+            "Problème planning / fatigue",
+            "Non-respect règles",
+        ],
+        "actions_bank": [
+            "Entretien TL : cause + engagement + plan concret",
+            "Ajustement planning si possible / plan transport",
+            "Point de présence (pré-shift) si nécessaire",
+            "Escalade RH si répétition selon procédure",
+        ],
+        "default_owners": ["TL", "OPS", "RH"],
+        "guardrail": None,
+    },
+    "TH prod (€)": {
+        "theme": "TH Prod",
+        "root_causes": [
+            "Levier Prod insuffisant",
+            "Qualité génère retours/rework",
+            "DMT trop long",
+        ],
+        "actions_bank": [
+            "Choisir 1 levier prioritaire (Prod ou Qualité ou DMT) — pas 3",
+            "Appliquer le playbook du levier prioritaire",
+            "Contrôle résultat S2 : levier + TH prod",
+        ],
+        "default_owners": ["TL", "OPS"],
+        "guardrail": "Qualité (%)",
+    },
+}
+
+
+# ------------------------------------------------------------
+# Helpers
+# ------------------------------------------------------------
+def _fmt_value(kpi: str, v):
+    if v is None or (isinstance(v, float) and pd.isna(v)):
+        return "-"
+    try:
+        x = float(v)
+        if "sec" in kpi.lower() or "dmt" in kpi.lower():
+            return f"{x:.0f} sec"
+        if "%" in kpi:
+            return f"{x:.2f}%"
+        if "€" in kpi or "eur" in kpi.lower():
+            return f"{x:.2f} €"
+        return f"{x:.2f}"
+    except Exception:
+        return str(v)
+
+
+def _kpi_type(row: pd.Series, kpi: str) -> str:
+    return str(row.get(f"Type_{kpi}", "")).lower().strip()
+
+
+def _is_bad(ecart: float, t: str) -> bool:
+    # Interprétation cohérente avec ton calcul :
+    # - min : ecart > 0 => mauvais (val > obj)
+    # - max : ecart < 0 => mauvais (val < obj)
+    # - target : |écart| > 3% => à traiter
+    if t == "min":
+        return ecart > 0
+    if t == "max":
+        return ecart < 0
+    return abs(ecart) > SEUIL_TARGET
+
+
+def _select_driver(row: pd.Series, kpis: list[str]):
+    bads = []
+    for k in kpis:
+        e = float(row.get(f"Ecart_{k}", 0))
+        t = _kpi_type(row, k)
+        if _is_bad(e, t):
+            bads.append((k, e, t))
+    if not bads:
+        return None, []
+    # driver = plus gros écart en magnitude
+    driver = max(bads, key=lambda x: abs(x[1]))
+    return driver, sorted(bads, key=lambda x: abs(x[1]), reverse=True)
+
+
+def _types_normalises(serie: pd.Series) -> np.ndarray:
+    # Type_ est catégoriel (preprocessing) : on normalise les catégories, pas chaque ligne
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categories = serie.cat.categories.astype("string").str.lower().str.strip()
+        libelles = np.append(categories.to_numpy(dtype=object, na_value=""), "")
+        return libelles[serie.cat.codes.to_numpy()]  # code -1 (NaN) → ""
+    return serie.astype("string").str.lower().str.strip().to_numpy(dtype=object, na_value="")
+
+
+def _bad_vectorise(df: pd.DataFrame, kpi: str) -> np.ndarray:
+    """_is_bad sur toute la colonne Ecart_<kpi> (écart ou type manquant : mêmes règles que _select_driver)."""
+    if f"Ecart_{kpi}" not in df.columns:
+        return np.zeros(len(df), dtype=bool)
+    e = df[f"Ecart_{kpi}"].to_numpy(dtype="float64", na_value=np.nan)
+    t = _types_normalises(df[f"Type_{kpi}"]) if f"Type_{kpi}" in df.columns else np.full(len(df), "", dtype=object)
+    # NaN : toutes les comparaisons sont fausses, comme dans _is_bad
+    with np.errstate(invalid="ignore"):
+        return np.where(t == "min", e > 0, np.where(t == "max", e < 0, np.abs(e) > SEUIL_TARGET))
+
+
+def matrice_drivers(df_ecarts: pd.DataFrame, kpis: list[str]) -> pd.DataFrame:
+    """
+    _select_driver pour toutes les lignes agent-mois en une passe, mémorisé par (données, KPI).
+    Une ligne par ligne de df_ecarts (même index) :
+      Agent, Mois, Bad_<kpi> (booléen), Driver (nom du KPI, chaîne ; NaN si aucune dérive), Ecart_driver,
+      Nb_KPI (KPI à traiter), KPI_a_traiter (tuple trié par |écart| décroissant).
+    """
+    return _DRIVERS.obtenir((empreinte_df(df_ecarts), tuple(kpis)), lambda: _calculer_drivers(df_ecarts, kpis))
+
+
+def _calculer_drivers(df_ecarts, kpis):
+    n = len(df_ecarts)
+    bad = np.array([_bad_vectorise(df_ecarts, k) for k in kpis], dtype=bool).reshape(len(kpis), n).T
+    ecarts = np.array(
+        [df_ecarts[f"Ecart_{k}"].to_numpy(dtype="float64", na_value=np.nan) if f"Ecart_{k}" in df_ecarts.columns
+         else np.zeros(n) for k in kpis],
+        dtype="float64",
+    ).reshape(len(kpis), n).T
+
+    # classement par |écart| décroissant ; tri stable : à égalité, l'ordre des KPI (comme max / sorted)
+    ordre = np.argsort(-np.where(bad, np.abs(ecarts), -1.0), axis=1, kind="stable")
+    nb = bad.sum(axis=1)
+    lignes = np.flatnonzero(nb)
+    noms = np.array(kpis, dtype=object)
+
+    driver = np.full(n, None, dtype=object)
+    ecart_driver = np.full(n, np.nan)
+    a_traiter = np.empty(n, dtype=object)
+    a_traiter[:] = [()] * n
+    if len(lignes):
+        premier = ordre[lignes, 0]
+        driver[lignes] = noms[premier]
+        ecart_driver[lignes] = ecarts[lignes, premier]
+        # peu de classements distincts (permutations des KPI) : un tuple par motif, pas par ligne
+        base = len(kpis) + 1
+        rangs = np.where(np.arange(len(kpis)) < nb[lignes, None], ordre[lignes] + 1, 0)
+        motifs = rangs @ (base ** np.arange(len(kpis), dtype=np.int64))
+        uniques, premieres, inverse = np.unique(motifs, return_index=True, return_inverse=True)
+        tuples = np.empty(len(uniques), dtype=object)
+        tuples[:] = [tuple(noms[rangs[i][rangs[i] > 0] - 1]) for i in premieres]
+        a_traiter[lignes] = tuples[inverse]
+
+    return pd.DataFrame(
+        {
+            "Agent": df_ecarts["Agent"].to_numpy(),
+            "Mois": df_ecarts["Mois"].to_numpy(),
+            **{f"Bad_{k}": bad[:, i] for i, k in enumerate(kpis)},
+            "Driver": driver,
+            "Ecart_driver": ecart_driver,
+            "Nb_KPI": nb,
+            "KPI_a_traiter": a_traiter,
+        },
+        index=df_ecarts.index,
+    )
+
+
+def agents_a_pda(df_ecarts: pd.DataFrame, kpis: list[str], mois=None) -> pd.DataFrame:
+    """
+    Agents en dérive (au moins un KPI à traiter) pour un mois (tous si None),
+    du plus gros écart driver au plus petit.
+    """
+    drivers = matrice_drivers(df_ecarts, kpis)
+    garde = drivers["Nb_KPI"].to_numpy() > 0
+    if mois is not None:
+        garde &= drivers["Mois"].to_numpy() == mois
+    table = drivers.loc[garde, ["Agent", "Mois", "Driver", "Ecart_driver", "Nb_KPI", "KPI_a_traiter"]]
+    table = table.iloc[np.argsort(-np.abs(table["Ecart_driver"].to_numpy()), kind="stable")]
+    return table.reset_index(drop=True)
+
+
+def _trajectory(val, obj, days=10, steps=3):
+    """
+    Trajectoire simple en paliers (utile pour TL).
+    Exemple DMT 220 -> 158 en 10j: palier1, palier2, target
+    """
+    try:
+        v = float(val)
+        o = float(obj)
+        if v == o:
+            return [o]
+        # 3 paliers (Semaine 1)
+        p1 = v + (o - v) * (1 / steps)
+        p2 = v + (o - v) * (2 / steps)
+        return [round(p1, 1), round(p2, 1), round(o, 1)]
+    except Exception:
+        return []
+
+
+def _timeline_dates(start: date):
+    # call center: J0, J+2, J+5, J+10 (typique)
+    return {
+        "J0": start,
+        "J+2": start + timedelta(days=2),
+        "J+5": start + timedelta(days=5),
+        "J+10": start + timedelta(days=10),
+    }
+
+
+OWNER_OPTIONS = ["TL", "CQ", "FORMATEURS", "OPS", "RH"]
+
+
+def owners_par_defaut(driver_kpi: str) -> list[str]:
+    owners_default = PLAYBOOK.get(driver_kpi, {}).get("default_owners", ["TL"])
+    return [o for o in owners_default if o in OWNER_OPTIONS]
+
+
+# ------------------------------------------------------------
+# PDA structuré (pur : aucune sortie UI)
+# ------------------------------------------------------------
+def construire_pda(row, kpis: list[str], start: date, owners=None, mgmt_style=None, agent=None, mois_ref=None):
+    """
+    Construit le PDA d'une ligne agent-mois de df_ecarts (Series ou dict).
+    Retourne None si aucune dérive significative (PDA non requis).
+    """
+    driver, bads = _select_driver(row, kpis)
+    if driver is None:
+        return None
+
+    driver_kpi, driver_ecart, driver_type = driver
+    agent = row.get("Agent") if agent is None else agent
+    mois_ref = row.get("Mois") if mois_ref is None else mois_ref
+
+    if owners is None:
+        owners = owners_par_defaut(driver_kpi)
+    if mgmt_style is None:
+        mgmt_style = next(iter(MANAGEMENT_MODES))
+    mgmt = MANAGEMENT_MODES[mgmt_style]
+
+    # Values & objective
+    val = row.get(f"Val_{driver_kpi}", None)
+    obj = row.get(f"Obj_{driver_kpi}", None)
+    val_txt = _fmt_value(driver_kpi, val)
+    obj_txt = _fmt_value(driver_kpi, obj)
+    ecart_pct = round(float(driver_ecart) * 100, 2)
+
+    # Delta + trajectory
+    delta_txt = ""
+    traj_txt = ""
+    traj = []
+    try:
+        if val is not None and obj not in (None, 0, "-"):
+            dv = float(val) - float(obj)
+            if driver_type == "min":
+                delta_txt = f"Δ = +{_fmt_value(driver_kpi, abs(dv))} au-dessus de l’objectif"
+            elif driver_type == "max":
+                delta_txt = f"Δ = -{_fmt_value(driver_kpi, abs(dv))} sous l’objectif"
+            else:
+                delta_txt = f"Δ = {_fmt_value(driver_kpi, dv)} vs cible"
+
+            traj = _trajectory(val, obj, days=10, steps=3)
+            if traj:
+                # e.g. 220 → 190 → 170 → 158
+                if "sec" in driver_kpi.lower() or "dmt" in driver_kpi.lower():
+                    traj_txt = " → ".join([f"{x:.0f}s" for x in traj])
+                else:
+                    traj_txt = " → ".join([str(x) for x in traj])
+    except Exception:
+        pass
+
+    # Build content
+    play = PLAYBOOK.get(driver_kpi, None)
+    theme = play["theme"] if play else driver_kpi
+    causes = play["root_causes"] if play else ["Cause à qualifier (process / outil / connaissance / comportement)."]
+    actions_bank = play["actions_bank"] if play else ["Diagnostic J0 → Coaching J1 → Checkpoint J+5 → Ajustement."]
+
+    # Timeline datée (simple, TL friendly)
+    tl_dates = _timeline_dates(start)
+    # action lines with dates
+    action_lines = [
+        f"({tl_dates['J0'].isoformat()}) Diagnostic sur 5 interactions + identification du goulot (ACW / hold / qualification)",
+        f"({tl_dates['J+2'].isoformat()}) Coaching ciblé + 2 écoutes + plan correctif écrit",
+        f"({tl_dates['J+5'].isoformat()}) Checkpoint #1 : mesure KPI + correction immédiate",
+        f"({tl_dates['J+10'].isoformat()}) Checkpoint #2 : validation trajectoire + décision (maintenir / escalader)",
+    ]
+
+    # Add KPI-specific actions (max 3) in addition
+    for a in actions_bank[:3]:
+        action_lines.insert(1, f"- {a}")
+
+    # Guardrail KPI
+    guard = play.get("guardrail") if play else None
+    guard_line = ""
+    if guard and f"Val_{guard}" in row and f"Obj_{guard}" in row:
+        guard_line = f"Garde-fou: {guard} (réel {_fmt_value(guard, row.get(f'Val_{guard}'))} vs obj {_fmt_value(guard, row.get(f'Obj_{guard}'))}) — ne pas sacrifier ce KPI."
+
+    return {
+        "agent": agent,
+        "mois_ref": mois_ref,
+        "start": start.isoformat(),
+        "driver_kpi": driver_kpi,
+        "driver_type": driver_type,
+        "ecart_pct": ecart_pct,
+        "kpis_a_traiter": [{"kpi": k, "ecart_pct": round(float(e) * 100, 2), "type": t} for k, e, t in bads],
+        "val_txt": val_txt,
+        "obj_txt": obj_txt,
+        "delta_txt": delta_txt,
+        "trajectoire": traj,
+        "traj_txt": traj_txt,
+        "theme": theme,
+        "causes": causes,
+        "action_lines": action_lines,
+        "guard_line": guard_line,
+        "owners": list(owners),
+        "mgmt_style": mgmt_style,
+        "management": mgmt,
+    }
+
+
+def pda_texte(pda: dict) -> str:
+    """Version texte (Teams / Mail) d'un PDA construit par construire_pda."""
+    text = []
+    text.append(APP_BRAND_LINE)
+    text.append(f"PDA TL — Agent: {pda['agent']} | Période: {pda['mois_ref']}")
+    text.append(
+        f"Driver: {pda['driver_kpi']} | Réel: {pda['val_txt']} | Obj: {pda['obj_txt']} | "
+        f"Écart: {pda['ecart_pct']}% | {pda['delta_txt']}".strip()
+    )
+    if pda["traj_txt"]:
+        text.append(f"Trajectoire 10j: {pda['traj_txt']}")
+    text.append(f"Owners: {', '.join(pda['owners']) if pda['owners'] else 'TL'}")
+    text.append("Causes racines (à vérifier):")
+    for c in pda["causes"][:6]:
+        text.append(f"- {c}")
+    text.append("Actions (timeline):")
+    for a in pda["action_lines"][:10]:
+        text.append(f"- {a}")
+    if pda["guard_line"]:
+        text.append(f"⚠️ {pda['guard_line']}")
+    text.append("Management:")
+    text.append(f"- Style: {pda['mgmt_style']}")
+    text.append(f"- Cadence: {pda['management']['cadence']}")
+    for r in pda["management"]["rituals"]:
+        text.append(f"  - {r}")
+    return "\n".join(text)
+
+
+# ------------------------------------------------------------
+# Mode lot (fin de mois : tous les agents en dérive)
+# ------------------------------------------------------------
+def _pdas_pour_lignes(args):
+    records, kpis, start = args
+    pdas = []
+    for row in records:
+        pda = construire_pda(row, kpis, start)
+        if pda is not None:
+            pdas.append(pda)
+    return pdas
+
+
+def generer_pda_lot(df_ecarts: pd.DataFrame, kpis: list[str], start: date, workers=None, taille_lot=250):
+    """
+    PDA pour toutes les lignes agent-mois de df_ecarts, en parallèle (pool de processus).
+    Retourne {agent: [pda, ...]} (agents sans dérive absents).
+    workers=1 → exécution dans le processus courant.
+    """
+    colonnes = ["Agent", "Mois"] + [
+        f"{p}_{k}" for k in kpis for p in ("Val", "Obj", "Type", "Ecart") if f"{p}_{k}" in df_ecarts.columns
+    ]
+    # seules les lignes avec un driver donnent un PDA
+    en_derive = matrice_drivers(df_ecarts, kpis)["Nb_KPI"].to_numpy() > 0
+    records = df_ecarts.loc[en_derive, colonnes].to_dict("records")
+    lots = [(records[i:i + taille_lot], kpis, start) for i in range(0, len(records), taille_lot)]
+
+    if workers == 1 or len(lots) <= 1:
+        resultats = map(_pdas_pour_lignes, lots)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultats = list(pool.map(_pdas_pour_lignes, lots))
+
+    par_agent = {}
+    for pdas in resultats:
+        for pda in pdas:
+            par_agent.setdefault(pda["agent"], []).append(pda)
+    return par_agent
+
+
+def _nom_fichier(agent) -> str:
+    return re.sub(r"[^\w.-]+", "_", str(agent)).strip("_") or "agent"
+
+
+def ecrire_bundles_pda(par_agent: dict, dossier: str) -> list[str]:
+    """Un bundle par agent : <agent>.json (PDA structurés) + <agent>.txt (version Teams/Mail)."""
+    os.makedirs(dossier, exist_ok=True)
+    chemins = []
+    for agent, pdas in par_agent.items():
+        base = os.path.join(dossier, _nom_fichier(agent))
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump({"agent": agent, "pdas": pdas}, f, ensure_ascii=False, indent=2, default=str)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write("\n\n".join(pda_texte(p) for p in pdas) + "\n")
+        chemins.append(base + ".json")
+    return chemins
@@ -1,59 +1,340 @@
 # modules/pda_store.py
 import json
 import os
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
 from uuid import uuid4
 
 PDA_PATH = os.path.join("data", "pda_actions.json")
+PDA_DB_PATH = os.path.join("data", "pda_actions.sqlite")
 
+# "sqlite" (défaut, transactionnel) ou "json" (fichier historique)
+PDA_BACKEND = os.environ.get("PDA_BACKEND", "sqlite")
 
-def _ensure_store():
-    os.makedirs("data", exist_ok=True)
-    if not os.path.exists(PDA_PATH):
-        with open(PDA_PATH, "w", encoding="utf-8") as f:
-            json.dump([], f, ensure_ascii=False, indent=2)
+# Champs indexés / filtrables directement en base
+FILTER_FIELDS = ("agent", "status", "kpi", "priority", "due_date")
 
 
+def _now():
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def _new_row(payload: dict) -> dict:
+    row = dict(payload)
+    row["id"] = row.get("id") or str(uuid4())
+    row["created_at"] = row.get("created_at") or _now()
+    row.setdefault("updated_at", None)
+    return row
+
+
+# même tri que le suivi TL : priorité puis deadline, valeur absente / None = "" (avant les autres) ;
+# les deux backends trient avec cette même clé (SQLite : SQL_ORDER), à égalité dans l'ordre d'insertion
+SORT_FIELDS = ("priority", "due_date")
+SQL_ORDER = ", ".join(f"COALESCE(CAST({k} AS TEXT), '')" for k in SORT_FIELDS) + ", seq"
+
+
+def _sort_key(a: dict):
+    return tuple("" if a.get(k) is None else str(a.get(k)) for k in SORT_FIELDS)
+
+
+# ------------------------------------------------------------
+# Backend JSON (historique)
+# ------------------------------------------------------------
+class _JsonBackend:
+    def __init__(self, path=PDA_PATH):
+        self.path = path
+
+    def _ensure_store(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump([], f, ensure_ascii=False, indent=2)
+
+    def load(self):
+        self._ensure_store()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, actions):
+        self._ensure_store()
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(actions, f, ensure_ascii=False, indent=2)
+
+    def add(self, row):
+        actions = self.load()
+        actions.append(row)
+        self.save(actions)
+
+    def update(self, action_id, patch):
+        actions = self.load()
+        for a in actions:
+            if a.get("id") == action_id:
+                a.update(patch)
+                a["updated_at"] = _now()
+                self.save(actions)
+                return True
+        return False
+
+    def delete(self, action_id):
+        actions = self.load()
+        new_actions = [a for a in actions if a.get("id") != action_id]
+        if len(new_actions) != len(actions):
+            self.save(new_actions)
+            return True
+        return False
+
+    def get(self, action_id):
+        return next((a for a in self.load() if a.get("id") == action_id), None)
+
+    def query(self, filters):
+        rows = [a for a in self.load() if all(a.get(k) == v for k, v in filters.items())]
+        return sorted(rows, key=_sort_key)
+
+    def distinct(self, field):
+        return sorted({a.get(field) for a in self.load() if a.get(field) is not None})
+
+    def version(self):
+        self._ensure_store()
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size)
+
+
+# ------------------------------------------------------------
+# Backend SQLite (WAL, écritures O(1), pas de perte entre sessions)
+# ------------------------------------------------------------
+class _SqliteBackend:
+    def __init__(self, path=PDA_DB_PATH, json_path=PDA_PATH):
+        self.path = path
+        self.json_path = json_path
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _create_schema(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+CREATE TABLE IF NOT EXISTS actions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    agent TEXT,
+    kpi TEXT,
+    status TEXT,
+    priority TEXT,
+    due_date TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_actions_agent ON actions(agent);
+CREATE INDEX IF NOT EXISTS idx_actions_status ON actions(status);
+CREATE INDEX IF NOT EXISTS idx_actions_kpi ON actions(kpi);
+CREATE INDEX IF NOT EXISTS idx_actions_priority ON actions(priority);
+CREATE INDEX IF NOT EXISTS idx_actions_due_date ON actions(due_date);
+CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (k, v) VALUES ('version', 0);
+                """
+            )
+        finally:
+            conn.close()
+        self._ready = True
+
+    def _ensure_store(self):
+        if self._ready:
+            return
+        is_new = not os.path.exists(self.path)
+        self._create_schema()
+
+        # Première ouverture : reprise automatique du fichier JSON existant
+        if is_new and os.path.exists(self.json_path):
+            migrate_json_to_sqlite(self.json_path, self.path)
+
+    @contextmanager
+    def _transaction(self):
+        self._ensure_store()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            avant = conn.total_changes
+            yield conn
+            # compteur d'écritures (invalide les exports mis en cache) : seulement si une ligne a changé
+            if conn.total_changes > avant:
+                conn.execute("UPDATE meta SET v = v + 1 WHERE k = 'version'")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _read(self):
+        self._ensure_store()
+        conn = self._connect()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _params(row):
+        return (
+            row["id"],
+            row.get("agent"),
+            row.get("kpi"),
+            row.get("status"),
+            row.get("priority"),
+            row.get("due_date"),
+            json.dumps(row, ensure_ascii=False, default=str),
+        )
+
+    def _insert(self, conn, rows):
+        conn.executemany(
+            "INSERT OR IGNORE INTO actions (id, agent, kpi, status, priority, due_date, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [self._params(r) for r in rows],
+        )
+
+    def load(self):
+        with self._read() as conn:
+            return [json.loads(r["payload"]) for r in conn.execute("SELECT payload FROM actions ORDER BY seq")]
+
+    def save(self, actions):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM actions")
+            self._insert(conn, [_new_row(a) for a in actions])
+
+    def add(self, row):
+        with self._transaction() as conn:
+            self._insert(conn, [row])
+
+    def update(self, action_id, patch):
+        with self._transaction() as conn:
+            found = conn.execute("SELECT payload FROM actions WHERE id = ?", (action_id,)).fetchone()
+            if found is None:
+                return False
+            row = json.loads(found["payload"])
+            row.update(patch)
+            row["updated_at"] = _now()
+            params = self._params(row)
+            conn.execute(
+                "UPDATE actions SET agent = ?, kpi = ?, status = ?, priority = ?, due_date = ?, payload = ? "
+                "WHERE id = ?",
+                params[1:] + params[:1],
+            )
+            return True
+
+    def delete(self, action_id):
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM actions WHERE id = ?", (action_id,)).rowcount > 0
+
+    def get(self, action_id):
+        with self._read() as conn:
+            found = conn.execute("SELECT payload FROM actions WHERE id = ?", (action_id,)).fetchone()
+        return json.loads(found["payload"]) if found else None
+
+    def query(self, filters):
+        where = " AND ".join(f"{k} = ?" for k in filters) or "1 = 1"
+        sql = f"SELECT payload FROM actions WHERE {where} ORDER BY {SQL_ORDER}"
+        with self._read() as conn:
+            return [json.loads(r["payload"]) for r in conn.execute(sql, tuple(filters.values()))]
+
+    def distinct(self, field):
+        sql = f"SELECT DISTINCT {field} FROM actions WHERE {field} IS NOT NULL ORDER BY {field}"
+        with self._read() as conn:
+            return [r[0] for r in conn.execute(sql)]
+
+    def version(self):
+        with self._read() as conn:
+            return conn.execute("SELECT v FROM meta WHERE k = 'version'").fetchone()[0]
+
+
+_BACKENDS = {"sqlite": _SqliteBackend, "json": _JsonBackend}
+_backend_instance = None
+
+
+def _backend():
+    global _backend_instance
+    if _backend_instance is None:
+        if PDA_BACKEND not in _BACKENDS:
+            raise ValueError(f"Backend PDA inconnu : {PDA_BACKEND} (attendu : {', '.join(_BACKENDS)})")
+        _backend_instance = _BACKENDS[PDA_BACKEND]()
+    return _backend_instance
+
+
+def migrate_json_to_sqlite(json_path=PDA_PATH, db_path=PDA_DB_PATH) -> int:
+    """
+    Reprise one-shot du fichier JSON vers SQLite (idempotent : les ids déjà présents sont ignorés).
+    Retourne le nombre d'actions insérées.
+    """
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        actions = json.load(f)
+
+    backend = _SqliteBackend(db_path, json_path)
+    backend._create_schema()
+    with backend._transaction() as conn:
+        before = conn.total_changes
+        backend._insert(conn, [_new_row(a) for a in actions])
+        return conn.total_changes - before
+
+
+# ------------------------------------------------------------
+# API publique (signatures inchangées)
+# ------------------------------------------------------------
 def load_actions():
-    _ensure_store()
-    with open(PDA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return _backend().load()
 
 
 def save_actions(actions):
-    _ensure_store()
-    with open(PDA_PATH, "w", encoding="utf-8") as f:
-        json.dump(actions, f, ensure_ascii=False, indent=2)
+    _backend().save(actions)
 
 
 def add_action(payload: dict) -> str:
-    actions = load_actions()
-
-    row = dict(payload)
-    row["id"] = row.get("id") or str(uuid4())
-    row["created_at"] = row.get("created_at") or datetime.utcnow().isoformat(timespec="seconds")
-    row.setdefault("updated_at", None)
-
-    actions.append(row)
-    save_actions(actions)
+    row = _new_row(payload)
+    _backend().add(row)
     return row["id"]
 
 
 def update_action(action_id: str, patch: dict) -> bool:
-    actions = load_actions()
-    for a in actions:
-        if a.get("id") == action_id:
-            a.update(patch)
-            a["updated_at"] = datetime.utcnow().isoformat(timespec="seconds")
-            save_actions(actions)
-            return True
-    return False
+    return _backend().update(action_id, patch)
 
 
 def delete_action(action_id: str) -> bool:
-    actions = load_actions()
-    new_actions = [a for a in actions if a.get("id") != action_id]
-    if len(new_actions) != len(actions):
-        save_actions(new_actions)
-        return True
-    return False
+    return _backend().delete(action_id)
+
+
+def get_action(action_id: str):
+    return _backend().get(action_id)
+
+
+def query_actions(agent=None, status=None, kpi=None, priority=None, due_date=None):
+    """Actions filtrées (None = pas de filtre), triées par priorité puis deadline."""
+    filters = {
+        k: v
+        for k, v in {"agent": agent, "status": status, "kpi": kpi, "priority": priority, "due_date": due_date}.items()
+        if v is not None
+    }
+    return _backend().query(filters)
+
+
+def actions_version():
+    """Change à chaque écriture dans le store (clé de cache des exports)."""
+    return _backend().version()
+
+
+def distinct_values(field: str):
+    if field not in FILTER_FIELDS:
+        raise ValueError(f"Champ non filtrable : {field}")
+    return _backend().distinct(field)
+
+
+if __name__ == "__main__":
+    n = migrate_json_to_sqlite()
+    print(f"{n} action(s) migrée(s) de {PDA_PATH} vers {PDA_DB_PATH}")
@@ -0,0 +1,131 @@
+# modules/perf.py
+# Chronométrage des étapes du pipeline et des onglets (sans dépendance UI).
+#   with mesurer("ecarts"): ...        /   @mesurer("export_excel")
+# Chaque mesure est gardée pour le panneau "perf" du run courant et ajoutée à data/metrics.jsonl,
+# renommé en metrics.jsonl.1 (l'ancien .1 est écrasé) au-delà de PERF_METRICS_MO (défaut : 5 Mo).
+#   python -m modules.perf --heures 24   → p50 / p95 par étape
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from contextlib import ContextDecorator
+from datetime import datetime, timedelta
+
+METRICS_PATH = os.path.join("data", "metrics.jsonl")
+
+# PERF_METRICS=0 : mesures affichées dans le panneau mais pas écrites sur disque
+ECRIRE_METRIQUES = os.environ.get("PERF_METRICS", "1") != "0"
+# taille de metrics.jsonl avant rotation : disque et lecture (panneau perf) bornés à ~2 fois cette taille
+ROTATION_OCTETS = int(float(os.environ.get("PERF_METRICS_MO", 5)) * 1024 * 1024)
+
+_fichier_lock = threading.Lock()
+# un run Streamlit = un thread : mesures du run courant
+_run = threading.local()
+
+
+def debut_run():
+    """Remet à zéro les mesures du run courant (à appeler en tête de script)."""
+    _run.mesures = []
+
+
+def mesures_run():
+    """[(étape, ms, ok)] du run courant, dans l'ordre de fin."""
+    return list(getattr(_run, "mesures", []))
+
+
+def _ecrire(ligne: dict, chemin=None):
+    chemin = chemin or METRICS_PATH
+    os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+    with _fichier_lock:
+        if os.path.exists(chemin) and os.path.getsize(chemin) >= ROTATION_OCTETS:
+            os.replace(chemin, chemin + ".1")
+        with open(chemin, "a", encoding="utf-8") as f:
+            f.write(json.dumps(ligne, ensure_ascii=False) + "\n")
+
+
+class mesurer(ContextDecorator):
+    """Chronomètre une étape (context manager ou décorateur)."""
+
+    def __init__(self, etape: str):
+        self.etape = etape
+
+    def _recreate_cm(self):
+        # décorateur : un chronomètre neuf par appel (appels imbriqués / concurrents)
+        return type(self)(self.etape)
+
+    def __enter__(self):
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self._debut) * 1000
+        # st.stop() / st.rerun() (BaseException) ne sont pas des échecs
+        ok = exc_type is None or not issubclass(exc_type, Exception)
+        if hasattr(_run, "mesures"):
+            _run.mesures.append((self.etape, ms, ok))
+        if ECRIRE_METRIQUES:
+            try:
+                _ecrire({"ts": datetime.now().isoformat(timespec="seconds"), "etape": self.etape, "ms": round(ms, 2), "ok": ok})
+            except OSError:
+                pass  # disque en lecture seule : la mesure reste visible dans le panneau
+        return False
+
+
+def _percentile(valeurs_triees, p):
+    # rang le plus proche (valeur réellement observée)
+    rang = max(1, math.ceil(p / 100 * len(valeurs_triees)))
+    return valeurs_triees[rang - 1]
+
+
+def resume_metriques(chemin=None, depuis=None) -> dict:
+    """
+    {étape: {n, p50_ms, p95_ms, max_ms}} sur les lignes de metrics.jsonl et de sa rotation précédente
+    (optionnellement limitées à celles postérieures à `depuis`, un datetime).
+    """
+    chemin = chemin or METRICS_PATH
+    fichiers = [c for c in (chemin + ".1", chemin) if os.path.exists(c)]
+    if not fichiers:
+        return {}
+    borne = depuis.isoformat(timespec="seconds") if depuis else None
+
+    par_etape = {}
+    for fichier in fichiers:
+        with open(fichier, "r", encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    m = json.loads(ligne)
+                except ValueError:
+                    continue  # ligne tronquée (écriture interrompue)
+                if borne and m.get("ts", "") < borne:
+                    continue
+                par_etape.setdefault(m["etape"], []).append(float(m["ms"]))
+
+    resume = {}
+    for etape, valeurs in sorted(par_etape.items()):
+        valeurs.sort()
+        resume[etape] = {
+            "n": len(valeurs),
+            "p50_ms": round(_percentile(valeurs, 50), 1),
+            "p95_ms": round(_percentile(valeurs, 95), 1),
+            "max_ms": round(valeurs[-1], 1),
+        }
+    return resume
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fichier", default=METRICS_PATH)
+    ap.add_argument("--heures", type=float, help="seulement les mesures des N dernières heures")
+    args = ap.parse_args()
+
+    depuis = datetime.now() - timedelta(hours=args.heures) if args.heures else None
+    resume = resume_metriques(args.fichier, depuis)
+    print(f"{'étape':24s} {'n':>7s} {'p50 ms':>10s} {'p95 ms':>10s} {'max ms':>10s}")
+    for etape, r in resume.items():
+        print(f"{etape:24s} {r['n']:7d} {r['p50_ms']:10.1f} {r['p95_ms']:10.1f} {r['max_ms']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
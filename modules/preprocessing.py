@@ -1,60 +1,279 @@
 # modules/preprocessing.py
 
+import hashlib
+
+import numpy as np
 import pandas as pd
 
-def calcul_ecarts_objectifs(df_resultats, df_objectifs, params):
-    kpis = params["kpi"]
-    agents = params["agents"]
-    mois = params["mois"]
+from modules.cache_memoire import DONNEES, CacheLRU
+from modules.empreintes import (
+    empreinte_cle,
+    empreinte_df,
+    empreintes_mois,
+    marquer_empreinte,
+    marquer_empreintes_mois,
+)
+
+# Écarts en cache dans cache_memoire.DONNEES (partagé entre sessions, borné en octets) :
+#   ("mois", empreinte du mois, empreinte de ses objectifs, KPI) -> base des écarts d'un mois (tous ses agents)
+#   ("base", empreintes données, KPI, mois, agents)              -> (base des écarts, matrices)
+#   ("ecarts", empreinte base + pondérations)                   -> df_ecarts (Pond_ / Score_Global)
+
+# empreinte du fichier d'objectifs -> {mois: empreinte (ligne du mois + ligne "Type")}
+_OBJECTIFS_MOIS = CacheLRU("objectifs_mois", max_entrees=8)
+
+_ATTR_RECALCULES = "_mois_recalcules"
+
+
+def _ecarts_vectorises(val, obj, type_kpi):
+    """
+    Écart (%) calculé colonne entière (pas de boucle par ligne).
+    - min    : plus petit = mieux  → (val - obj) / obj
+    - max    : plus grand = mieux  → (obj - val) / obj
+    - target : (val - obj) / obj
+    Objectif nul ou manquant → écart 0.
+    """
+    val = pd.to_numeric(val, errors="coerce").to_numpy(dtype="float64")
+    obj = pd.to_numeric(obj, errors="coerce").to_numpy(dtype="float64")
+
+    sans_obj = (obj == 0) | np.isnan(obj)
+    denom = np.where(sans_obj, 1.0, obj)
+
+    if type_kpi == "max":
+        ecart = (obj - val) / denom
+    else:  # "min" / "target"
+        ecart = (val - obj) / denom
+
+    ecart[sans_obj] = 0.0
+    return _arrondi_4(ecart)
+
 
+def _arrondi_4(x):
+    """
+    np.round(x, 4) + correction des quasi-égalités (x·10⁴ ≈ k + 0.5) où il peut
+    différer du round() Python (arrondi exact) : seules ces cellules repassent en scalaire.
+    """
+    arrondi = np.round(x, 4)
+    frac = np.abs(np.abs(x * 1e4) % 1.0 - 0.5)
+    for i in np.flatnonzero(frac < 1e-6):
+        arrondi[i] = round(float(x[i]), 4)
+    return arrondi
+
+
+def _categorie(valeurs):
+    """Catégorielle triée comme les chaînes d'origine (ordre d'apparition si types non comparables)."""
+    if isinstance(valeurs, pd.Series) and isinstance(valeurs.dtype, pd.CategoricalDtype):
+        return valeurs.cat.remove_unused_categories().array
+    try:
+        return pd.Categorical(valeurs)
+    except TypeError:
+        return pd.Categorical(valeurs, categories=pd.unique(valeurs))
+
+
+def _float32_si_exact(valeurs):
+    """float64 → float32 seulement si aucune valeur ne change (NaN compris) ; entiers réduits au plus petit type."""
+    valeurs = np.asarray(valeurs)
+    if valeurs.dtype == np.float64:
+        v32 = valeurs.astype(np.float32)
+        if np.array_equal(v32.astype(np.float64), valeurs, equal_nan=True):
+            return v32
+    elif valeurs.dtype.kind == "i" and len(valeurs):
+        return pd.to_numeric(pd.Series(valeurs), downcast="integer").to_numpy()
+    return valeurs
+
+
+def compacter_types(df_base, kpis):
+    """
+    Agent / Mois / Type_ en catégories (un code par ligne au lieu d'une chaîne),
+    Val_ / Obj_ en float32 quand la conversion est exacte. Ecart_ / Pond_ / Score_Global
+    restent en float64 (arrondis à 4 décimales et seuils de tendance à l'identique).
+    """
+    colonnes = {"Agent": _categorie(df_base["Agent"]), "Mois": _categorie(df_base["Mois"])}
+    for kpi in kpis:
+        colonnes[f"Val_{kpi}"] = _float32_si_exact(df_base[f"Val_{kpi}"])
+        colonnes[f"Obj_{kpi}"] = _float32_si_exact(df_base[f"Obj_{kpi}"])
+        colonnes[f"Type_{kpi}"] = _categorie(df_base[f"Type_{kpi}"])
+    df = df_base.copy(deep=False)
+    for col, valeurs in colonnes.items():
+        df[col] = valeurs
+    return df
+
+
+def calcul_base_ecarts(df_resultats, df_objectifs, kpis, mois, agents):
+    """
+    Partie indépendante des pondérations : Agent, Mois + Val_/Obj_/Type_/Ecart_ par KPI.
+    agents=None : pas de filtre sur les agents.
+    """
     # Ligne "Type" pour savoir si KPI est min/max/target
     df_type = df_objectifs[df_objectifs["Mois"] == "Type"]
     df_objectifs = df_objectifs[df_objectifs["Mois"] != "Type"]
 
     type_obj = {k: str(df_type.iloc[0][k]).strip().lower() for k in kpis}
 
-    df_r = df_resultats[df_resultats["Agent"].isin(agents) & df_resultats["Mois"].isin(mois)]
+    df_r = df_resultats[df_resultats["Mois"].isin(mois)]
+    if agents is not None:
+        df_r = df_r[df_r["Agent"].isin(agents)]
     df_o = df_objectifs[df_objectifs["Mois"].isin(mois)]
 
     df = df_r.merge(df_o, on="Mois", suffixes=("", "_obj"))
-    rows = []
 
-    for _, row in df.iterrows():
-        entry = {"Agent": row["Agent"], "Mois": row["Mois"]}
+    # Moteur colonnaire : une opération par KPI sur toute la colonne
+    colonnes = {
+        "Agent": df["Agent"].to_numpy(),
+        "Mois": df["Mois"].to_numpy(),
+    }
+    for kpi in kpis:
+        val = df[kpi]
+        obj = pd.to_numeric(df[f"{kpi}_obj"], errors="coerce")
+        type_kpi = type_obj[kpi]
 
-        for kpi in kpis:
-            val = row[kpi]
-            obj = row[f"{kpi}_obj"]
-            type_kpi = type_obj[kpi]
+        # ✅ Stockage valeurs pour PDA chiffré
+        colonnes[f"Val_{kpi}"] = val.to_numpy()
+        colonnes[f"Obj_{kpi}"] = obj.to_numpy()
+        # une seule catégorie : 1 octet par ligne, pas de chaîne répétée
+        colonnes[f"Type_{kpi}"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), [type_kpi])
 
-            # ✅ Stockage valeurs pour PDA chiffré
-            entry[f"Val_{kpi}"] = val
-            entry[f"Obj_{kpi}"] = obj
-            entry[f"Type_{kpi}"] = type_kpi
+        # Écart (%)
+        colonnes[f"Ecart_{kpi}"] = _ecarts_vectorises(val, obj, type_kpi)
 
-            # Écart (%)
-            if obj == 0 or pd.isna(obj):
-                ecart = 0
-            else:
-                if type_kpi == "min":
-                    # Plus petit = mieux
-                    ecart = (val - obj) / obj
-                elif type_kpi == "max":
-                    # Plus grand = mieux
-                    ecart = (obj - val) / obj
-                else:  # "target"
-                    ecart = (val - obj) / obj
+    return compacter_types(pd.DataFrame(colonnes), kpis)
 
-            entry[f"Ecart_{kpi}"] = round(ecart, 4)
 
-        rows.append(entry)
+def _empreintes_objectifs(df_objectifs):
+    """Empreinte des objectifs de chaque mois : ajouter un mois n'invalide pas les autres."""
+    return _OBJECTIFS_MOIS.obtenir(empreinte_df(df_objectifs), lambda: _calculer_empreintes_objectifs(df_objectifs))
 
-    df_ecarts = pd.DataFrame(rows)
 
-    # Pondérations
-    for kpi in kpis:
-        df_ecarts[f"Pond_{kpi}"] = df_ecarts[f"Ecart_{kpi}"] * params["pondérations"][kpi]
+def _calculer_empreintes_objectifs(df_objectifs):
+    hashes = pd.util.hash_pandas_object(df_objectifs.astype(str), index=False).to_numpy()
+    mois = df_objectifs["Mois"].to_numpy()
+    types = tuple(hashes[mois == "Type"])
+    return {m: empreinte_cle(list(df_objectifs.columns), tuple(hashes[mois == m]), types) for m in pd.unique(mois)}
 
-    df_ecarts["Score_Global"] = df_ecarts[[f"Pond_{k}" for k in kpis]].sum(axis=1)
 
+def _empreintes_resultats(df_resultats):
+    """
+    {mois: empreinte} des lignes de chaque mois (dans l'ordre d'apparition), calculé une fois par objet ;
+    l'entrepôt fournit directement celles de ses partitions.
+    """
+    par_mois = empreintes_mois(df_resultats)
+    if par_mois is not None:
+        return par_mois
+
+    hashes = pd.util.hash_pandas_object(df_resultats, index=False).to_numpy()
+    colonnes = list(df_resultats.columns)
+    par_mois = {
+        m: empreinte_cle(colonnes, hashlib.sha1(hashes[pos].tobytes()).hexdigest())
+        for m, pos in df_resultats.groupby("Mois", sort=False).indices.items()
+    }
+    marquer_empreintes_mois(df_resultats, par_mois)
+    return par_mois
+
+
+def _base_incrementale(df_resultats, df_objectifs, kpis, mois, agents):
+    """
+    Base assemblée mois par mois : seuls les mois dont les lignes (résultats ou objectifs)
+    ont changé sont recalculés, les autres viennent du cache.
+    Retourne (df_base, mois recalculés). Lignes dans l'ordre de df_resultats.
+    """
+    par_mois = _empreintes_resultats(df_resultats)
+    objectifs_mois = _empreintes_objectifs(df_objectifs)
+    positions = df_resultats.groupby("Mois", sort=False).indices
+    choisis = set(mois)
+
+    bases, ordre, recalcules = [], [], []
+    for m, empreinte in par_mois.items():
+        if m not in choisis:
+            continue
+        def calculer(m=m):
+            recalcules.append(m)
+            return calcul_base_ecarts(df_resultats.take(positions[m]), df_objectifs, kpis, [m], agents=None)
+
+        base = DONNEES.obtenir(("mois", empreinte, objectifs_mois.get(m), tuple(kpis)), calculer)
+        if len(base) == 0:
+            continue  # mois sans objectif
+        bases.append(base)
+        ordre.append(positions[m] if len(base) == len(positions[m]) else None)
+
+    if not bases:
+        return calcul_base_ecarts(df_resultats, df_objectifs, kpis, mois, agents), recalcules
+    df_base = pd.concat(bases, ignore_index=True)
+
+    # ordre d'origine des lignes (sauf objectifs en double pour un mois : ordre par mois)
+    if all(o is not None for o in ordre) and len(bases) > 1:
+        df_base = df_base.take(np.argsort(np.concatenate(ordre), kind="stable")).reset_index(drop=True)
+
+    garder = df_base["Agent"].isin(agents).to_numpy()
+    if not garder.all():
+        df_base = df_base[garder].reset_index(drop=True)
+    # catégories fusionnées sur l'ensemble des mois (et sans les agents écartés)
+    return compacter_types(df_base, kpis), recalcules
+
+
+def _base_en_cache(df_resultats, df_objectifs, kpis, mois, agents):
+    cle = (
+        empreinte_df(df_resultats),
+        empreinte_df(df_objectifs),
+        tuple(kpis),
+        tuple(mois),
+        tuple(agents),
+    )
+    recalcules = []
+
+    def calculer():
+        df_base, mois_calcules = _base_incrementale(df_resultats, df_objectifs, kpis, mois, agents)
+        recalcules.extend(mois_calcules)
+        # Matrice des écarts (agent-mois × KPI), NaN → 0 comme le sum(axis=1) historique
+        matrice = df_base[[f"Ecart_{k}" for k in kpis]].to_numpy(dtype="float64")
+        matrice_pleine = np.where(np.isnan(matrice), 0.0, matrice)
+        return (df_base, matrice, matrice_pleine)
+
+    return cle, DONNEES.obtenir(("base",) + cle, calculer), recalcules
+
+
+def appliquer_ponderations(df_base, matrice, matrice_pleine, kpis, ponderations):
+    """
+    Seule étape qui dépend des curseurs : Pond_ = Ecart_ × poids, Score_Global = matrice · poids.
+    """
+    poids = np.array([ponderations[k] for k in kpis], dtype="float64")
+
+    df_ecarts = df_base.copy(deep=False)
+    pond = matrice * poids
+    for i, kpi in enumerate(kpis):
+        df_ecarts[f"Pond_{kpi}"] = pond[:, i]
+    df_ecarts["Score_Global"] = matrice_pleine @ poids
     return df_ecarts
+
+
+def mois_recalcules(df_ecarts) -> list:
+    """Mois dont les écarts ont été recalculés pour produire df_ecarts ([] : tout venait du cache)."""
+    memo = df_ecarts.attrs.get(_ATTR_RECALCULES)
+    if memo and memo[0] == id(df_ecarts):
+        return list(memo[1])
+    return []
+
+
+def calcul_ecarts_objectifs(df_resultats, df_objectifs, params):
+    kpis = params["kpi"]
+
+    # Matrice des écarts construite une fois par (données, KPI, mois, agents), mois par mois ;
+    # un changement de pondération ne refait que le produit matrice-vecteur.
+    cle, (df_base, matrice, matrice_pleine), recalcules = _base_en_cache(
+        df_resultats, df_objectifs, kpis, params["mois"], params["agents"]
+    )
+    poids = [params["pondérations"][k] for k in kpis]
+    empreinte = empreinte_cle(cle, poids)
+    colonnes_session = [f"Pond_{k}" for k in kpis] + ["Score_Global"]
+    partage = DONNEES.obtenir(
+        ("ecarts", empreinte),
+        lambda: appliquer_ponderations(df_base, matrice, matrice_pleine, kpis, params["pondérations"]),
+        # les colonnes de base sont celles de l'entrée "base" : seules Pond_ / Score_Global comptent,
+        # et l'entrée sort du cache avec sa base (taille complète si la base n'y est plus)
+        octets=lambda df: int(df[colonnes_session].memory_usage(index=False).sum()),
+        parent=("base",) + cle,
+    )
+
+    # copie légère par appel : mêmes données (copy-on-write), attrs propres à l'appelant
+    df_ecarts = partage.copy(deep=False)
+    df_ecarts.attrs[_ATTR_RECALCULES] = (id(df_ecarts), recalcules)
+    return marquer_empreinte(df_ecarts, empreinte)
@@ -2,16 +2,19 @@
 
 import streamlit as st
 
+from modules.entrepot import perimetre
+from modules.parametres import KPI_DISPONIBLES, POIDS_DEFAUT, normaliser_ponderations
+
 def config_utilisateur(df_resultats):
     st.sidebar.header("⚙️ Paramètres")
 
-    mois_dispo = df_resultats["Mois"].unique().tolist()
-    agents_dispo = df_resultats["Agent"].unique().tolist()
+    # historique : mois / agents lus dans le manifeste de l'entrepôt
+    mois_dispo, agents_dispo = perimetre(df_resultats)
 
     kpi_choisis = st.sidebar.multiselect(
         "📌 KPI à analyser",
-        ["ABS (%)", "Prod", "Qualité (%)", "DMT (sec)", "TH prod (€)"],
-        default=["ABS (%)", "Prod", "Qualité (%)", "DMT (sec)", "TH prod (€)"]
+        KPI_DISPONIBLES,
+        default=KPI_DISPONIBLES
     )
 
     mois_selection = st.sidebar.multiselect("📅 Mois à inclure", mois_dispo, default=mois_dispo)
@@ -20,13 +23,12 @@ def config_utilisateur(df_resultats):
     st.sidebar.markdown("### ⚖️ Pondérations des KPI")
     pond = {}
     for kpi in kpi_choisis:
-        pond[kpi] = st.sidebar.slider(kpi, 0, 100, 20)
+        pond[kpi] = st.sidebar.slider(kpi, 0, 100, POIDS_DEFAUT)
 
     total = sum(pond.values())
     if total != 100:
         st.sidebar.warning(f"⚠️ Pondérations = {total}%. Elles seront normalisées.")
-    for k in pond:
-        pond[k] = pond[k] / total
+    pond = normaliser_ponderations(pond)
 
     return {
         "kpi": kpi_choisis,
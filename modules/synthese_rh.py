@@ -2,29 +2,140 @@
 
 from docx import Document
 import io
+import re
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
 
-def generer_rapport_rh(df, agent_id, params):
-    doc = Document()
-    doc.add_heading(f"📋 Rapport KPI – Agent {agent_id}", 0)
+from modules.agregats import lignes_agent
 
-    agent_data = df[df["Agent"] == agent_id]
-    if agent_data.empty:
-        doc.add_paragraph("Aucune donnée disponible.")
-        return
+_CHAMP = re.compile(r"§(\w+)§")
+
+
+def _remplir_rapport(doc, titre, lignes_kpi, score_txt):
+    doc.add_heading(titre, 0)
 
     doc.add_heading("📌 Écarts par KPI", level=1)
-    for kpi in params["kpi"]:
-        ecart = round(agent_data[f"Ecart_{kpi}"].mean() * 100, 2)
-        doc.add_paragraph(f"{kpi} : {ecart}%", style="List Bullet")
+    for ligne in lignes_kpi:
+        doc.add_paragraph(ligne, style="List Bullet")
 
-    score = round(agent_data["Score_Global"].mean() * 100, 2)
     doc.add_heading("🎯 Score Global Moyen", level=1)
-    doc.add_paragraph(f"{score}%")
+    doc.add_paragraph(score_txt)
 
     doc.add_heading("✍️ Commentaire", level=1)
     doc.add_paragraph("À compléter...")
 
+
+def _valeurs_rapport(agent_id, kpis, ecarts, score):
+    valeurs = {"TITRE": f"📋 Rapport KPI – Agent {agent_id}", "SCORE": f"{round(score * 100, 2)}%"}
+    for i, (kpi, ecart) in enumerate(zip(kpis, ecarts)):
+        valeurs[f"L{i}"] = f"{kpi} : {round(ecart * 100, 2)}%"
+    return valeurs
+
+
+def generer_rapport_rh(df, agent_id, params):
+    doc = Document()
+
+    agent_data = lignes_agent(df, agent_id)
+    if agent_data.empty:
+        doc.add_heading(f"📋 Rapport KPI – Agent {agent_id}", 0)
+        doc.add_paragraph("Aucune donnée disponible.")
+        return
+
+    ecarts = [agent_data[f"Ecart_{kpi}"].mean() for kpi in params["kpi"]]
+    v = _valeurs_rapport(agent_id, params["kpi"], ecarts, agent_data["Score_Global"].mean())
+    _remplir_rapport(doc, v["TITRE"], [v[f"L{i}"] for i in range(len(ecarts))], v["SCORE"])
+
     buffer = io.BytesIO()
     doc.save(buffer)
     buffer.seek(0)
     return buffer
+
+
+# ------------------------------------------------------------
+# Mode campagne : un .docx par agent dans un ZIP
+# ------------------------------------------------------------
+def _template_campagne(kpis):
+    """
+    Rapport modèle construit une seule fois avec python-docx (styles, titres, puces),
+    avec des champs §...§ à la place des valeurs. Retourne les parties du .docx.
+    """
+    doc = Document()
+    _remplir_rapport(doc, "§TITRE§", [f"§L{i}§" for i in range(len(kpis))], "§SCORE§")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as zf:
+        return [(nom, zf.read(nom)) for nom in zf.namelist()]
+
+
+def _nom_docx(agent_id):
+    nom = re.sub(r"[^\w.-]+", "_", str(agent_id))
+    return f"PerformTrack360_rapport_{nom}.docx"
+
+
+def _noms_docx(agent_ids):
+    """
+    Un nom de fichier par agent, unique dans le ZIP : deux identifiants nettoyés pareil ("A/1", "A 1")
+    ou ne différant que par la casse (dézippage sous Windows) → suffixe _2, _3... pour les suivants.
+    """
+    noms, pris = [], set()
+    for agent_id in agent_ids:
+        nom = _nom_docx(agent_id)
+        n = 1
+        while nom.casefold() in pris:
+            n += 1
+            nom = _nom_docx(f"{agent_id}_{n}")
+        pris.add(nom.casefold())
+        noms.append(nom)
+    return noms
+
+
+def _rapports_lot(args):
+    parties, kpis, lignes = args
+    sortie = []
+    for nom_docx, agent_id, ecarts, score in lignes:
+        valeurs = _valeurs_rapport(agent_id, kpis, ecarts, score)
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+            for nom, contenu in parties:
+                if nom == "word/document.xml":
+                    xml = contenu.decode("utf-8")
+                    contenu = _CHAMP.sub(lambda m: escape(valeurs[m.group(1)]), xml).encode("utf-8")
+                zf.writestr(nom, contenu)
+        sortie.append((nom_docx, buffer.getvalue()))
+    return sortie
+
+
+def generer_rapports_rh_zip(df, params, workers=None, taille_lot=200):
+    """
+    Un .docx par agent dans un ZIP (campagne complète).
+    - une seule passe groupby pour les moyennes par agent
+    - rapport modèle pré-construit, seules les valeurs changent par agent
+    - génération parallèle (pool de processus), écriture du ZIP au fil de l'eau
+    Retourne un fichier temporaire positionné au début.
+    """
+    kpis = params["kpi"]
+    colonnes = [f"Ecart_{k}" for k in kpis] + ["Score_Global"]
+    moyennes = df.groupby("Agent", sort=False)[colonnes].mean()
+
+    noms = _noms_docx(moyennes.index)
+    lignes = [(nom, agent_id, list(v[:-1]), v[-1]) for nom, agent_id, v in zip(noms, moyennes.index, moyennes.to_numpy())]
+    parties = _template_campagne(kpis)
+    lots = [(parties, kpis, lignes[i:i + taille_lot]) for i in range(0, len(lignes), taille_lot)]
+
+    pool = None if workers == 1 or len(lots) <= 1 else ProcessPoolExecutor(max_workers=workers)
+    fichier = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+    try:
+        resultats = pool.map(_rapports_lot, lots) if pool else map(_rapports_lot, lots)
+        # les .docx sont déjà compressés : stockés tels quels dans le ZIP
+        with zipfile.ZipFile(fichier, "w", compression=zipfile.ZIP_STORED) as zf:
+            for docs in resultats:
+                for nom, contenu in docs:
+                    zf.writestr(nom, contenu)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    fichier.seek(0)
+    return fichier
@@ -1,28 +1,86 @@
 # modules/uploader.py
 
 import streamlit as st
-import pandas as pd
+
+from modules.chargement import ErreurChargement, charger_et_valider
+from modules.entrepot import ConflitObjectifs, ajouter, charger, est_vide, libelle, perimetre, verifier_plateau
+
+FORMATS = ["xlsx", "csv", "parquet", "zip"]
+
+def _afficher_perimetre(plateau, df_historique, df_importe=None):
+    # ce que couvre l'historique retourné : il peut contenir plus que les fichiers de cet import
+    mois, agents = perimetre(df_historique)
+    texte = f"🗄️ Historique {libelle(plateau)} : {len(agents)} agents × {len(mois)} mois"
+    if mois:
+        texte += f" ({mois[0]} → {mois[-1]})"
+    if df_importe is not None:
+        hors_import = len(set(agents) - set(df_importe["Agent"].unique().tolist()))
+        texte += f", dont {hors_import} agents hors de cet import" if hors_import else ", tous issus de cet import"
+    st.sidebar.caption(texte)
+
 
 def uploader_fichier():
     st.sidebar.header("📁 Import des fichiers")
 
-    fichier_resultats = st.sidebar.file_uploader("📈 Résultats des agents (kpi_resultats.xlsx)", type=["xlsx"])
-    fichier_objectifs = st.sidebar.file_uploader("🎯 Objectifs mensuels (kpi_objectifs.xlsx)", type=["xlsx"])
-
-    if not fichier_resultats or not fichier_objectifs:
-        st.warning("⏳ Veuillez importer les deux fichiers.")
+    # un historique par site / plateau : l'import d'un TL ne modifie pas celui des autres
+    plateau = st.sidebar.text_input(
+        "🏢 Site / plateau", key="plateau", help="Chaque site / plateau a son propre historique ; vide = historique commun."
+    ).strip()
+    try:
+        verifier_plateau(plateau)
+    except ValueError as e:
+        st.sidebar.error(f"❌ {e}")
         return None, None
 
-    try:
-        df_resultats = pd.read_excel(fichier_resultats)
-        df_objectifs = pd.read_excel(fichier_objectifs)
+    # plusieurs fichiers (un par mois) ou un ZIP ; toutes les feuilles (une par plateau) sont lues
+    fichiers_resultats = st.sidebar.file_uploader(
+        "📈 Résultats des agents (kpi_resultats : xlsx, csv, parquet)", type=FORMATS, accept_multiple_files=True
+    )
+    fichiers_objectifs = st.sidebar.file_uploader(
+        "🎯 Objectifs mensuels (kpi_objectifs : xlsx, csv, parquet)", type=FORMATS, accept_multiple_files=True
+    )
+
+    df_resultats = None
+    if fichiers_resultats and fichiers_objectifs:
+        try:
+            # Les mois importés sont ajoutés / mis à jour dans l'historique du plateau (data/entrepot)
+            df_resultats, df_objectifs, avertissements = charger_et_valider(fichiers_resultats, fichiers_objectifs)
+            for p in avertissements:
+                st.sidebar.warning(f"⚠️ {p['table']} : {p['message']} — {p['lignes']}")
+            mois_maj = ajouter(
+                df_resultats, df_objectifs, plateau=plateau,
+                remplacer_objectifs=st.session_state.get("remplacer_objectifs", False),
+            )
+            if mois_maj:
+                st.sidebar.success(f"🗄️ Historique {libelle(plateau)} mis à jour : {', '.join(map(str, mois_maj))}")
+
+        except ConflitObjectifs as e:
+            # les objectifs stockés s'appliquent à tous les agents de l'historique : pas de remplacement silencieux
+            st.error(
+                f"❌ Import non intégré : objectifs différents de ceux déjà stockés dans l'historique "
+                f"{libelle(plateau)} pour {', '.join(e.mois)}. Vérifiez le site / plateau, "
+                "ou confirmez le remplacement (les scores de tous ses agents seront recalculés)."
+            )
+            st.sidebar.checkbox("Remplacer les objectifs stockés pour ces mois", key="remplacer_objectifs")
+            return None, None
 
-        if "Type" not in df_objectifs["Mois"].values:
-            st.error("❌ Le fichier d'objectifs doit contenir une ligne 'Type'.")
+        except ErreurChargement as e:
+            if e.problemes:
+                # tous les problèmes d'un coup, avec les lignes concernées
+                st.error(f"❌ Import refusé : {sum(p['gravite'] == 'erreur' for p in e.problemes)} problème(s) à corriger.")
+                st.dataframe(e.problemes, hide_index=True, use_container_width=True)
+            else:
+                st.error(f"❌ {e}")
             return None, None
 
-        return df_resultats, df_objectifs
+        except Exception as e:
+            st.error(f"Erreur lors du chargement des fichiers : {e}")
+            return None, None
 
-    except Exception as e:
-        st.error(f"Erreur lors du chargement des fichiers : {e}")
+    if est_vide(plateau):
+        st.warning(f"⏳ Historique {libelle(plateau)} vide : veuillez importer les deux fichiers.")
         return None, None
+
+    historique = charger(plateau)
+    _afficher_perimetre(plateau, historique[0], df_resultats)
+    return historique
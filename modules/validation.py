@@ -0,0 +1,162 @@
+# modules/validation.py
+# Contrôle des tableaux importés avant tout calcul (sans dépendance UI).
+# Tous les contrôles sont colonnaires (linéaires, sans boucle par ligne) et tous les problèmes
+# sont remontés en une fois, avec des références de lignes (fichier / feuille / ligne).
+import numpy as np
+import pandas as pd
+
+from modules.empreintes import empreinte_cle, empreinte_df, marquer_empreinte
+from modules.parametres import KPI_DISPONIBLES
+
+TYPES_KPI = ("min", "max", "target")
+DOUBLONS = ("dedoublonner", "rejeter")
+MAX_REFERENCES = 5  # lignes citées par problème
+
+
+def _probleme(gravite, table, controle, message, positions=(), provenance=None, colonne=None):
+    positions = np.asarray(positions, dtype=np.int64)
+    return {
+        "gravite": gravite,
+        "table": table,
+        "controle": controle,
+        "colonne": colonne,
+        "nb_lignes": int(len(positions)),
+        "lignes": references(positions, provenance),
+        "message": message,
+    }
+
+
+def references(positions, provenance=None, maximum=MAX_REFERENCES) -> str:
+    """
+    "fichier / feuille : ligne 12, 40 (+3)" pour les premières positions (0 = première ligne de données).
+    provenance : [(libellé, position de début)] des tables concaténées ; numéro de ligne = position + 2 (en-tête).
+    """
+    positions = np.asarray(positions, dtype=np.int64)
+    if not len(positions):
+        return ""
+    provenance = provenance or [("", 0)]
+    debuts = np.array([d for _, d in provenance], dtype=np.int64)
+    premieres = positions[:maximum]
+    tables = np.searchsorted(debuts, premieres, side="right") - 1
+
+    morceaux = []
+    for t in dict.fromkeys(tables.tolist()):
+        libelle = provenance[t][0]
+        lignes = ", ".join(str(p - debuts[t] + 2) for p in premieres[tables == t])
+        morceaux.append(f"{libelle} : ligne {lignes}" if libelle else f"ligne {lignes}")
+    reste = len(positions) - len(premieres)
+    return " ; ".join(morceaux) + (f" (+{reste})" if reste else "")
+
+
+def _non_numeriques(serie: pd.Series):
+    """(valeurs converties ou None si déjà numériques, positions des valeurs présentes mais non numériques)."""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return None, np.empty(0, dtype=np.int64)
+    converties = pd.to_numeric(serie, errors="coerce")
+    fautives = np.flatnonzero(converties.isna().to_numpy() & serie.notna().to_numpy())
+    return converties, fautives
+
+
+def valider(df_resultats, df_objectifs, kpis=None, doublons="dedoublonner", provenance_r=None, provenance_o=None):
+    """
+    Contrôle résultats + objectifs bruts : colonnes manquantes, ligne "Type" (min / max / target),
+    doublons Agent/Mois (résultats) et Mois (objectifs), valeurs non numériques, mois sans objectifs.
+    doublons : "dedoublonner" (la dernière ligne est gardée, avertissement) ou "rejeter" (erreur).
+    Retourne (df_resultats, df_objectifs, problemes) ; problemes : liste de dicts
+    {gravite ("erreur" / "avertissement"), table, controle, colonne, nb_lignes, lignes, message}.
+    Les tableaux ne sont retournés corrigés (doublons retirés, KPI convertis) qu'en l'absence d'erreur.
+    """
+    if doublons not in DOUBLONS:
+        raise ValueError(f"doublons : {' / '.join(DOUBLONS)}")
+    kpis = list(KPI_DISPONIBLES if kpis is None else kpis)
+    problemes = []
+
+    # --- Colonnes : sans elles, les autres contrôles n'ont pas de sens ---
+    for table, df, attendues in (
+        ("résultats", df_resultats, ["Agent", "Mois"] + kpis),
+        ("objectifs", df_objectifs, ["Mois"] + kpis),
+    ):
+        manquantes = [c for c in attendues if c not in df.columns]
+        if manquantes:
+            problemes.append(
+                _probleme("erreur", table, "colonnes", f"Colonnes manquantes : {', '.join(manquantes)}")
+            )
+    if problemes:
+        return df_resultats, df_objectifs, problemes
+
+    mois_o = df_objectifs["Mois"]
+    est_type = (mois_o == "Type").to_numpy()
+    lignes_type = np.flatnonzero(est_type)
+    if not len(lignes_type):
+        problemes.append(_probleme("erreur", "objectifs", "type", "Le fichier d'objectifs doit contenir une ligne 'Type'."))
+    else:
+        ligne_type = df_objectifs.iloc[lignes_type[-1]]
+        for kpi in kpis:
+            t = str(ligne_type[kpi]).strip().lower()
+            if t not in TYPES_KPI:
+                problemes.append(
+                    _probleme(
+                        "erreur", "objectifs", "type", f"Type '{ligne_type[kpi]}' inconnu (attendu : {' / '.join(TYPES_KPI)})",
+                        lignes_type[-1:], provenance_o, kpi,
+                    )
+                )
+
+    # --- Doublons : ils multiplient les lignes dans le merge(on="Mois") ---
+    gravite = "avertissement" if doublons == "dedoublonner" else "erreur"
+    suite = "la dernière occurrence est gardée" if doublons == "dedoublonner" else "import refusé"
+    doublons_r = df_resultats.duplicated(["Agent", "Mois"], keep="last").to_numpy()
+    if doublons_r.any():
+        problemes.append(
+            _probleme(
+                gravite, "résultats", "doublons", f"Lignes Agent/Mois en double ({suite})",
+                np.flatnonzero(doublons_r), provenance_r,
+            )
+        )
+    doublons_o = df_objectifs.duplicated("Mois", keep="last").to_numpy() & ~est_type
+    if doublons_o.any():
+        problemes.append(
+            _probleme(gravite, "objectifs", "doublons", f"Mois en double ({suite})", np.flatnonzero(doublons_o), provenance_o)
+        )
+
+    # --- Valeurs non numériques (les cellules vides restent permises) ---
+    converties_r, converties_o = {}, {}
+    for kpi in kpis:
+        converties_r[kpi], fautives = _non_numeriques(df_resultats[kpi])
+        if len(fautives):
+            problemes.append(
+                _probleme("erreur", "résultats", "numerique", "Valeurs non numériques", fautives, provenance_r, kpi)
+            )
+        objectifs = df_objectifs[kpi].where(~est_type)  # la ligne "Type" est textuelle
+        converties_o[kpi], fautives = _non_numeriques(objectifs)
+        if len(fautives):
+            problemes.append(
+                _probleme("erreur", "objectifs", "numerique", "Valeurs non numériques", fautives, provenance_o, kpi)
+            )
+
+    # --- Mois des résultats sans ligne d'objectifs (écartés en silence par le merge) ---
+    sans_objectif = ~df_resultats["Mois"].isin(mois_o[~est_type]).to_numpy()
+    if sans_objectif.any():
+        mois = pd.unique(df_resultats["Mois"].to_numpy()[sans_objectif])
+        problemes.append(
+            _probleme(
+                "erreur", "résultats", "objectifs", f"Mois sans objectifs : {', '.join(map(str, mois))}",
+                np.flatnonzero(sans_objectif), provenance_r,
+            )
+        )
+
+    if any(p["gravite"] == "erreur" for p in problemes):
+        return df_resultats, df_objectifs, problemes
+    return (
+        _corriger(df_resultats, doublons_r, converties_r, "résultats"),
+        _corriger(df_objectifs, doublons_o, {}, "objectifs"),
+        problemes,
+    )
+
+
+def _corriger(df, doublons, converties, nom):
+    """df sans doublons, KPI textuels convertis ; inchangé (même objet, même empreinte) si rien à faire."""
+    a_convertir = {k: v for k, v in converties.items() if v is not None}
+    if not doublons.any() and not a_convertir:
+        return df
+    corrige = df.assign(**a_convertir)[~doublons].reset_index(drop=True)
+    return marquer_empreinte(corrige, empreinte_cle(empreinte_df(df), nom, "valide"))
@@ -1,48 +1,131 @@
 # modules/visualisations.py
 
 import streamlit as st
-import plotly.express as px
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
 
-def afficher_treemaps_par_kpi(df, kpis):
-    st.subheader("🌳 **Treemaps par KPI – Performance des agents**")
+from modules.agregats import cube_agregats, lignes_agent
+from modules.cache_memoire import CacheLRU
+from modules.empreintes import empreinte_df
 
-    for kpi in kpis:
-        taille = df[f"Ecart_{kpi}"].abs() + 0.0001
-        couleur = df[f"Ecart_{kpi}"].round(2)
-        labels = df.apply(lambda r: f"{r['Agent']}<br>{r[f'Ecart_{kpi}']*100:.2f}%", axis=1)
-
-        moyenne = round(couleur.mean() * 100, 2)
-        titre = f"📊 <b>{kpi}</b> — Moyenne : {moyenne:.2f}%"
-
-        fig = px.treemap(
-            df,
-            path=[px.Constant(kpi), "Agent"],
-            values=taille,
-            color=couleur,
-            color_continuous_scale=["#a50026", "#d73027", "#fdae61", "#ffffbf", "#a6d96a", "#1a9850"],
-            custom_data=["Agent", f"Ecart_{kpi}"]
+TREEMAP_COULEURS = ["#a50026", "#d73027", "#fdae61", "#ffffbf", "#a6d96a", "#1a9850"]
+TREEMAP_TOP_N = 150  # agents affichés individuellement, le reste regroupé dans "Autres"
+
+# (type, empreinte données, ...) -> figure déjà construite, en JSON (fig.to_plotly_json())
+# (partagé par les sessions : CacheLRU est thread-safe)
+_FIGURES = CacheLRU("figures", max_entrees=32)
+
+
+def _figure_memoisee(cle, construire):
+    # une figure neuve par appel : une session qui la modifie ne touche pas celle des autres
+    return go.Figure(_FIGURES.obtenir(cle, lambda: construire().to_plotly_json()))
+
+
+def _agreger_treemap(cube, kpi, top_n):
+    """
+    Une ligne par agent (au lieu d'un rectangle par ligne agent-mois), lue dans le cube :
+    taille = somme des |écart| (+0.0001), couleur = écart arrondi moyen pondéré par la taille,
+    comme l'agrégation faite par Plotly sur le chemin [KPI, Agent].
+    """
+    g = cube["par_agent_kpi"][kpi][["moyenne", "n", "taille", "pondere"]].rename(columns={"moyenne": "ecart"})
+
+    if top_n and len(g) > top_n:
+        ordre = g["ecart"].abs().sort_values(ascending=False, kind="stable").index
+        top, reste = g.loc[ordre[:top_n]], g.loc[ordre[top_n:]]
+        autres = pd.DataFrame(
+            {
+                "taille": [reste["taille"].sum()],
+                "pondere": [reste["pondere"].sum()],
+                "ecart": [(reste["ecart"] * reste["n"]).sum() / reste["n"].sum()],
+                "n": [reste["n"].sum()],
+            },
+            index=[f"Autres ({len(reste)} agents)"],
         )
-        fig.update_traces(
+        g = pd.concat([top, autres])
+
+    g = g.copy()
+    g["couleur"] = g["pondere"] / g["taille"]
+    return g
+
+
+def construire_treemap(df, kpi, top_n=TREEMAP_TOP_N, cube=None):
+    """Figure treemap d'un KPI, mémorisée par (données, KPI, top_n). Taille bornée par top_n + 1 rectangles."""
+    return _figure_memoisee(
+        ("treemap", empreinte_df(df), kpi, top_n),
+        lambda: _treemap(df, kpi, top_n, cube),
+    )
+
+
+def _treemap(df, kpi, top_n, cube):
+    if cube is None:
+        cube = cube_agregats(df, [kpi])
+    g = _agreger_treemap(cube, kpi, top_n)
+    moyenne = round(cube["par_kpi"][kpi]["moyenne_arrondie"] * 100, 2)
+    titre = f"📊 <b>{kpi}</b> — Moyenne : {moyenne:.2f}%"
+
+    agents = g.index.astype(str).to_numpy()
+    ecarts = g["ecart"].to_numpy()
+    # Libellés construits en une opération (pas d'apply ligne à ligne)
+    labels = np.char.add(np.char.add(agents.astype(str), "<br>"), np.char.mod("%.2f%%", ecarts * 100))
+
+    total = g["taille"].sum()
+    fig = go.Figure(
+        go.Treemap(
+            ids=[kpi] + [f"{kpi}/{a}" for a in agents],
+            labels=[kpi] + agents.tolist(),
+            parents=[""] + [kpi] * len(agents),
+            values=[total] + g["taille"].tolist(),
+            branchvalues="total",
+            marker=dict(
+                colors=[g["pondere"].sum() / total if total else 0.0] + g["couleur"].tolist(),
+                colorscale=TREEMAP_COULEURS,
+                showscale=True,
+            ),
+            customdata=[[kpi, float("nan")]] + [[a, e] for a, e in zip(agents.tolist(), ecarts.tolist())],
+            text=[kpi] + labels.tolist(),
+            texttemplate="%{text}",
             hovertemplate="<b>%{customdata[0]}</b><br>Écart : %{customdata[1]:.2%}<extra></extra>",
-            texttemplate=labels
         )
-        fig.update_layout(margin=dict(t=40, l=0, r=0, b=10), title=titre)
-        st.plotly_chart(fig, use_container_width=True)
+    )
+    fig.update_layout(margin=dict(t=40, l=0, r=0, b=10), title=titre)
+    return fig
 
-def afficher_courbe_evolution(df, agent, kpis):
-    st.subheader(f"📈 **Évolution des écarts – {agent}**")
 
-    df_agent = df[df["Agent"] == agent]
+def afficher_treemaps_par_kpi(df, kpis, top_n=TREEMAP_TOP_N):
+    st.subheader("🌳 **Treemaps par KPI – Performance des agents**")
+
+    cube = cube_agregats(df, kpis)
+    nb_agents = cube["global"]["n_agents"]
+    if top_n and nb_agents > top_n:
+        st.caption(f"{top_n} agents aux plus forts écarts affichés ; les {nb_agents - top_n} autres sont regroupés.")
+
+    for kpi in kpis:
+        st.plotly_chart(construire_treemap(df, kpi, top_n, cube), use_container_width=True)
+
+def construire_courbe_evolution(df, agent, kpis):
+    """Courbe des écarts d'un agent, mémorisée par (données, agent, KPI)."""
+    return _figure_memoisee(
+        ("courbe", empreinte_df(df), agent, tuple(kpis)),
+        lambda: _courbe_evolution(df, agent, kpis),
+    )
+
+
+def _courbe_evolution(df, agent, kpis):
+    df_agent = lignes_agent(df, agent)
     df_melt = pd.melt(df_agent, id_vars=["Mois"], value_vars=[f"Ecart_{k}" for k in kpis],
                       var_name="KPI", value_name="Écart")
     df_melt["Écart"] = df_melt["Écart"] * 100
     df_melt["KPI"] = df_melt["KPI"].str.replace("Ecart_", "")
 
-    fig = px.line(df_melt, x="Mois", y="Écart", color="KPI", markers=True,
-                  color_discrete_sequence=px.colors.qualitative.Set2)
-    st.plotly_chart(fig, use_container_width=True)
+    import plotly.express as px  # chargé seulement pour la courbe (import lourd)
+
+    return px.line(df_melt, x="Mois", y="Écart", color="KPI", markers=True,
+                   color_discrete_sequence=px.colors.qualitative.Set2)
+
+def afficher_courbe_evolution(df, agent, kpis):
+    st.subheader(f"📈 **Évolution des écarts – {agent}**")
+    st.plotly_chart(construire_courbe_evolution(df, agent, kpis), use_container_width=True)
 
 def afficher_radar_agent(agent_row, kpis):
     st.subheader("🧭 **Radar de performance multi-KPI**")
@@ -62,7 +145,7 @@ def afficher_radar_agent(agent_row, kpis):
 
 def afficher_tableau_detail(df, agent, kpis):
     st.subheader("📋 **Détails chiffrés par KPI et par mois**")
-    df_agent = df[df["Agent"] == agent].copy()
+    df_agent = lignes_agent(df, agent)
     df_agent = df_agent[["Mois"] + [f"Ecart_{k}" for k in kpis] + ["Score_Global"]]
     df_agent = df_agent.sort_values("Mois")
     df_agent[[c for c in df_agent.columns if "Ecart_" in c or "Score" in c]] *= 100
@@ -0,0 +1,87 @@
+# tests/test_cache_memoire.py
+import threading
+
+import numpy as np
+
+from modules.cache_memoire import CacheLRU
+
+
+def test_borne_en_octets():
+    cache = CacheLRU("test", budget_octets=3000)
+    for i in range(5):
+        cache.put(i, np.zeros(100))  # 800 octets
+    assert list(cache._entrees) == [2, 3, 4]
+    assert cache.stats()["evictions"] == 2
+    cache.put("gros", np.zeros(1000))  # plus gros que le budget : gardé seul
+    assert list(cache._entrees) == ["gros"]
+
+
+def test_borne_en_entrees():
+    cache = CacheLRU("test", max_entrees=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" redevient la plus récente
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.stats()["budget_mo"] is None
+
+
+def test_sessions_concurrentes():
+    # lectures, calculs et évictions entrelacés depuis plusieurs threads (une session Streamlit = un thread)
+    cache = CacheLRU("test", max_entrees=4)
+    appels, erreurs = [], []
+
+    def calcul(cle):
+        appels.append(cle)
+        return cle * 2
+
+    def session(graine):
+        rng = np.random.default_rng(graine)
+        try:
+            for cle in rng.integers(0, 12, 2000).tolist():
+                assert cache.obtenir(cle, lambda: calcul(cle)) == cle * 2
+        except Exception as e:  # remonté au thread principal
+            erreurs.append(e)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erreurs
+    assert len(cache) <= 4
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 8 * 2000
+    assert stats["misses"] == len(appels)
+
+
+def test_entree_liee_a_son_parent():
+    cache = CacheLRU("test", budget_octets=10_000)
+    cache.put("base", np.zeros(500))  # 4000 octets
+    cache.put("ecarts", np.zeros(500), octets=800, parent="base")  # partage les données de "base"
+    assert cache._octets == 4800
+    cache.put("autre", np.zeros(500))
+    assert cache.get("ecarts") is not None  # "base" redevient plus récente que "autre"
+    cache.put("encore", np.zeros(500))  # 12 800 > budget : "autre" sort, pas "base"
+    assert "autre" not in cache and "base" in cache and "ecarts" in cache
+
+    cache.put("x", np.zeros(300))
+    cache.put("y", np.zeros(300))  # "base" est la plus ancienne : elle sort avec "ecarts"
+    assert "base" not in cache and "ecarts" not in cache
+    assert cache._octets == sum(t for _, t, _ in cache._entrees.values())
+
+
+def test_parent_absent_taille_complete():
+    cache = CacheLRU("test", budget_octets=10_000)
+    cache.put("ecarts", np.zeros(500), octets=800, parent="base")
+    assert cache._octets == 4000
+
+
+def test_parent_garde_avec_l_entree_la_plus_recente():
+    cache = CacheLRU("test", budget_octets=1000)
+    cache.put("base", np.zeros(500))  # déjà au-delà du budget
+    cache.put("ecarts", np.zeros(500), octets=800, parent="base")
+    assert list(cache._entrees) == ["ecarts", "base"]
+    cache.put("ecarts 2", np.zeros(500), octets=800, parent="base")  # autres pondérations
+    assert list(cache._entrees) == ["ecarts 2", "base"]
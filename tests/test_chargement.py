@@ -0,0 +1,61 @@
+# tests/test_chargement.py
+import io
+
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import parse_cache, preprocessing
+from modules.cache_memoire import DONNEES
+from modules.chargement import ErreurChargement, charger_et_valider
+from modules.parametres import KPI_DISPONIBLES
+
+
+@pytest.fixture(autouse=True)
+def cache_temporaire(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "CACHE_DIR", str(tmp_path / "cache_fichiers"))
+    DONNEES.vider()
+    yield
+    DONNEES.vider()
+
+
+def _csv_fr(df) -> bytes:
+    # export Excel "CSV (séparateur : point-virgule)" : cp1252, ";" et virgule décimale partout
+    texte = df.map(lambda v: str(v).replace(".", ",") if isinstance(v, float) and pd.notna(v) else v)
+    return texte.to_csv(index=False, sep=";", encoding="cp1252").encode("cp1252")
+
+
+def _xlsx(df) -> bytes:
+    tampon = io.BytesIO()
+    df.to_excel(tampon, index=False)
+    return tampon.getvalue()
+
+
+def _params(df_r, df_o):
+    return {
+        "kpi": list(KPI_DISPONIBLES),
+        "agents": list(pd.unique(df_r["Agent"])),
+        "mois": [m for m in df_o["Mois"] if m != "Type"],
+        "pondérations": {k: 0.2 for k in KPI_DISPONIBLES},
+    }
+
+
+def test_objectifs_csv_fr_comme_xlsx():
+    df_r, df_o = generer_donnees(40, 3)
+    r_csv, o_csv, avertissements = charger_et_valider(_csv_fr(df_r), _csv_fr(df_o), workers=1)
+    assert avertissements == []
+    r_xlsx, o_xlsx, _ = charger_et_valider(_xlsx(df_r), _xlsx(df_o), workers=1)
+
+    attendu = preprocessing.calcul_ecarts_objectifs(r_xlsx, o_xlsx, _params(r_xlsx, o_xlsx))
+    obtenu = preprocessing.calcul_ecarts_objectifs(r_csv, o_csv, _params(r_csv, o_csv))
+    pd.testing.assert_frame_equal(obtenu, attendu, check_dtype=False)
+
+
+def test_csv_fr_texte_signale_seul():
+    df_r, df_o = generer_donnees(10, 2)
+    df_r = df_r.astype({"Prod": object})
+    df_r.loc[3, "Prod"] = "abc"
+    with pytest.raises(ErreurChargement) as e:
+        charger_et_valider(_csv_fr(df_r), _csv_fr(df_o), workers=1)
+    erreurs = [p for p in e.value.problemes if p["gravite"] == "erreur"]
+    assert [(p["colonne"], p["nb_lignes"]) for p in erreurs] == [("Prod", 1)]
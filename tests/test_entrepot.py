@@ -0,0 +1,102 @@
+# tests/test_entrepot.py
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import entrepot
+
+
+@pytest.fixture(autouse=True)
+def entrepot_temporaire(tmp_path, monkeypatch):
+    monkeypatch.setattr(entrepot, "ENTREPOT_DIR", str(tmp_path / "entrepot"))
+    monkeypatch.setattr(entrepot, "_charge", {})
+
+
+def _import(n_agents, seed=0, debut=0):
+    df_r, df_o = generer_donnees(n_agents, 3, seed=seed)
+    df_r = df_r.assign(Agent=df_r["Agent"].str.replace("AG", f"AG{debut}-"))
+    return df_r, df_o
+
+
+def test_objectifs_en_conflit_refuses_sans_rien_ecrire():
+    df_r, df_o = _import(10)
+    assert entrepot.ajouter(df_r, df_o) == ["2024-01", "2024-02", "2024-03"]
+    version = entrepot.lire_manifeste()["version"]
+
+    autres_r, autres_o = _import(5, seed=1, debut=1)  # autre TL : ses propres objectifs pour les mêmes mois
+    with pytest.raises(entrepot.ConflitObjectifs) as e:
+        entrepot.ajouter(autres_r, autres_o)
+    assert e.value.mois == ["2024-01", "2024-02", "2024-03"]
+    assert entrepot.lire_manifeste()["version"] == version
+    assert len(entrepot.charger()[0]) == len(df_r)
+
+    # remplacement confirmé
+    assert entrepot.ajouter(autres_r, autres_o, remplacer_objectifs=True)
+    _, objectifs = entrepot.charger()
+    assert objectifs.loc[objectifs["Mois"] == "2024-01", "Prod"].item() == autres_o.loc[0, "Prod"]
+
+
+def test_memes_objectifs_acceptes():
+    df_r, df_o = _import(10)
+    entrepot.ajouter(df_r, df_o)
+    # mêmes valeurs, autres types (flottants au lieu d'objets) : pas de conflit
+    objectifs = df_o[df_o["Mois"] != "Type"].copy()
+    objectifs["Prod"] = pd.to_numeric(objectifs["Prod"]).astype("float64")
+    nouveaux_r, _ = _import(4, seed=2, debut=2)
+    entrepot.ajouter(nouveaux_r, pd.concat([objectifs, df_o[df_o["Mois"] == "Type"]], ignore_index=True))
+    assert len(entrepot.charger()[0]) == len(df_r) + len(nouveaux_r)
+
+
+def test_type_different_en_conflit():
+    df_r, df_o = _import(10)
+    entrepot.ajouter(df_r, df_o)
+    autre = df_o.copy()
+    autre.loc[autre["Mois"] == "Type", "Prod"] = "min"
+    nouveaux_r, _ = _import(4, seed=2, debut=2)
+    with pytest.raises(entrepot.ConflitObjectifs) as e:
+        entrepot.ajouter(nouveaux_r, autre)
+    assert e.value.mois == ["Type"]
+
+
+def test_plateaux_separes():
+    df_r, df_o = _import(10)
+    autres_r, autres_o = _import(5, seed=1, debut=1)
+    entrepot.ajouter(df_r, df_o, plateau="Site A")
+    entrepot.ajouter(autres_r, autres_o, plateau="Site B")  # mêmes mois, autres objectifs : pas de conflit
+
+    assert entrepot.est_vide()
+    r_a, o_a = entrepot.charger("Site A")
+    r_b, o_b = entrepot.charger("Site B")
+    assert set(r_a["Agent"]) == set(df_r["Agent"]) and set(r_b["Agent"]) == set(autres_r["Agent"])
+    assert o_a.loc[0, "Prod"] == df_o.loc[0, "Prod"] and o_b.loc[0, "Prod"] == autres_o.loc[0, "Prod"]
+    assert entrepot.perimetre(r_b) == (["2024-01", "2024-02", "2024-03"], list(pd.unique(autres_r["Agent"])))
+    assert entrepot.plateau_de(r_a) == "Site A"
+
+
+@pytest.mark.parametrize("plateau", [".", "..", "  ", " .. "])
+def test_plateau_invalide(plateau):
+    df_r, df_o = _import(3)
+    with pytest.raises(ValueError):
+        entrepot.ajouter(df_r, df_o, plateau=plateau)
+    with pytest.raises(ValueError):
+        entrepot.charger(plateau)
+
+
+def test_plateau_reste_dans_son_dossier():
+    racine = os.path.realpath(os.path.join(entrepot.ENTREPOT_DIR, "plateaux"))
+    for plateau in ["../..", "a/../../b", "..\\x", "./.", "Site A"]:
+        dossier = os.path.realpath(entrepot._chemin(plateau))
+        assert os.path.dirname(dossier) == racine
+
+
+def test_noms_nettoyes_identiques_separes():
+    df_r, df_o = _import(6)
+    autres_r, autres_o = _import(4, seed=1, debut=1)
+    for a, b in [("Site A", "Site_A"), ("Casa/1", "Casa 1")]:
+        assert entrepot._chemin(a) != entrepot._chemin(b)
+        entrepot.ajouter(df_r, df_o, plateau=a)
+        entrepot.ajouter(autres_r, autres_o, plateau=b)  # pas de conflit d'objectifs : dossiers distincts
+        assert set(entrepot.charger(a)[0]["Agent"]) == set(df_r["Agent"])
+        assert set(entrepot.charger(b)[0]["Agent"]) == set(autres_r["Agent"])
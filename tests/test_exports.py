@@ -0,0 +1,76 @@
+# tests/test_exports.py
+import tempfile
+
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import exports, preprocessing
+from modules.cache_memoire import DONNEES, CacheLRU
+from modules.parametres import KPI_DISPONIBLES
+
+# forme des actions créées par modules.pda (liste "tags" vide)
+ACTION = {
+    "id": "a1",
+    "agent": "AG00001",
+    "kpi": "Prod",
+    "mois_ref": "2024-01",
+    "ecart_pct": 12.5,
+    "action_type": "Coaching",
+    "description": "Écoute croisée",
+    "owner": "TL",
+    "due_date": "2024-02-15",
+    "priority": "Haute",
+    "status": "À faire",
+    "preuve": "",
+    "expected_impact": "",
+    "tags": [],
+    "meta": {"source": "pda"},
+}
+
+
+@pytest.fixture
+def df_ecarts():
+    DONNEES.vider()
+    df_r, df_o = generer_donnees(20, 3)
+    params = {
+        "kpi": list(KPI_DISPONIBLES),
+        "agents": list(pd.unique(df_r["Agent"])),
+        "mois": [m for m in df_o["Mois"] if m != "Type"],
+        "pondérations": {k: 0.2 for k in KPI_DISPONIBLES},
+    }
+    yield preprocessing.calcul_ecarts_objectifs(df_r, df_o, params)
+    DONNEES.vider()
+
+
+@pytest.mark.parametrize("decoupage", [None, "kpi", "mois"])
+def test_export_excel_actions_avec_listes(df_ecarts, monkeypatch, decoupage):
+    monkeypatch.setattr(exports, "load_actions", lambda: [ACTION, {**ACTION, "id": "a2", "tags": ["absences", "suivi"]}])
+    buffer = exports.export_excel(df_ecarts, decoupage=decoupage)
+
+    feuilles = pd.read_excel(buffer, sheet_name=None)
+    pda = feuilles["PDA"]
+    assert pda["tags"].tolist() == ["[]", "['absences', 'suivi']"]  # str(), comme pd.ExcelWriter
+    assert pda["meta"].tolist() == ["{'source': 'pda'}"] * 2
+    assert pda["ecart_pct"].tolist() == [12.5, 12.5]
+    assert sum(len(f) for n, f in feuilles.items() if n != "PDA") == len(df_ecarts) * (1 if decoupage != "kpi" else 5)
+
+
+def test_export_memoise_borne_en_octets(monkeypatch):
+    cache = CacheLRU("exports", 100)
+    monkeypatch.setattr(exports, "EXPORTS", cache)
+
+    assert exports.export_memoise(("a",), lambda: b"x" * 60) == b"x" * 60
+    assert exports.export_memoise(("a",), lambda: b"autre") == b"x" * 60  # servi depuis le cache
+    exports.export_memoise(("b",), lambda: b"y" * 60)
+    assert ("a",) not in cache and ("b",) in cache  # 120 octets > 100 : la plus ancienne sort
+    exports.export_memoise(("c",), lambda: b"z" * 500)
+    assert ("c",) not in cache and ("b",) in cache  # plus gros que le budget : servi, pas gardé
+
+
+def test_export_memoise_ferme_le_fichier_temporaire():
+    fichier = tempfile.SpooledTemporaryFile()
+    fichier.write(b"PK zip")
+    fichier.seek(0)
+    assert exports.export_memoise(("zip", "test-fermeture"), lambda: fichier) == b"PK zip"
+    assert fichier.closed
@@ -0,0 +1,84 @@
+# tests/test_parse_cache.py
+import io
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import parse_cache
+from modules.cache_memoire import DONNEES
+
+
+@pytest.fixture(autouse=True)
+def cache_temporaire(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "CACHE_DIR", str(tmp_path / "cache_fichiers"))
+    DONNEES.vider()
+    yield
+    DONNEES.vider()
+
+
+def _classeur(feuilles) -> bytes:
+    tampon = io.BytesIO()
+    with pd.ExcelWriter(tampon) as w:
+        for nom, df in feuilles.items():
+            df.to_excel(w, sheet_name=nom, index=False)
+    return tampon.getvalue()
+
+
+def test_une_feuille_parquet_par_feuille():
+    df_r, df_o = generer_donnees(30, 2)
+    resultats = _classeur({"Plateau A": df_r.iloc[:30], "Plateau B 2": df_r.iloc[30:]})
+    objectifs = _classeur({"Objectifs": df_o})
+
+    lus = parse_cache.lire_classeurs_cache([resultats, objectifs], workers=1)
+    assert list(lus[0]) == ["Plateau A", "Plateau B 2"]
+
+    fichiers = sorted(
+        os.path.relpath(os.path.join(d, f), parse_cache.CACHE_DIR)
+        for d, _, noms in os.walk(parse_cache.CACHE_DIR) for f in noms
+    )
+    extensions = [os.path.splitext(f)[1] for f in fichiers if not f.endswith("feuilles.json")]
+    # résultats : Parquet ; objectifs (ligne "Type" textuelle dans des colonnes numériques) : pickle
+    assert extensions.count(".parquet") == 2 and extensions.count(".pkl") == 1
+    assert not any(f.endswith(".tmp") for f in fichiers)
+
+    # relecture depuis le disque (RAM vidée) : mêmes feuilles, dans le même ordre
+    DONNEES.vider()
+    relus = parse_cache.lire_classeurs_cache([resultats, objectifs], workers=1)
+    for avant, apres in zip(lus, relus):
+        assert list(avant) == list(apres)
+        for nom in avant:
+            pd.testing.assert_frame_equal(avant[nom], apres[nom])
+
+
+def test_csv_et_parquet():
+    df_r, _ = generer_donnees(10, 2)
+    tampon = io.BytesIO()
+    df_r.to_parquet(tampon, index=False)
+    contenus = [df_r.to_csv(index=False).encode(), tampon.getvalue()]
+    lus = parse_cache.lire_classeurs_cache(contenus, workers=1)
+    DONNEES.vider()
+    relus = parse_cache.lire_classeurs_cache(contenus, workers=1)
+    assert [list(c) for c in relus] == [["csv"], ["parquet"]]
+    for avant, apres in zip(lus, relus):
+        pd.testing.assert_frame_equal(avant[next(iter(avant))], apres[next(iter(apres))])
+
+
+def test_threads_par_defaut_processus_sur_demande(monkeypatch):
+    df_r, df_o = generer_donnees(15, 2)
+    contenus = [df_r.to_csv(index=False).encode(), df_o.to_csv(index=False).encode()]
+
+    def interdit(*args, **kwargs):
+        raise AssertionError("pool de processus lancé depuis l'interface")
+
+    with monkeypatch.context() as m:
+        m.setattr(parse_cache, "ProcessPoolExecutor", interdit)
+        en_threads = parse_cache.lire_classeurs_cache(contenus, workers=2)
+
+    DONNEES.vider()
+    shutil.rmtree(parse_cache.CACHE_DIR)
+    en_processus = parse_cache.lire_classeurs_cache(contenus, workers=2, processus=True)
+    for a, b in zip(en_threads, en_processus):
+        pd.testing.assert_frame_equal(a["csv"], b["csv"])
@@ -0,0 +1,83 @@
+# tests/test_pda_engine.py
+# matrice_drivers (une passe sur toute la table) doit rendre, ligne par ligne, le driver et les KPI
+# à traiter de _select_driver (référence ligne à ligne).
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import preprocessing
+from modules.cache_memoire import DONNEES
+from modules.parametres import KPI_DISPONIBLES
+from modules.pda_engine import SEUIL_TARGET, _select_driver, matrice_drivers
+
+
+@pytest.fixture(autouse=True)
+def _caches_vides():
+    DONNEES.vider()
+    yield
+    DONNEES.vider()
+
+
+def _comparer(df_ecarts, kpis):
+    drivers = matrice_drivers(df_ecarts, kpis)
+    assert drivers.index.equals(df_ecarts.index)
+    for i, (_, row) in enumerate(df_ecarts.iterrows()):
+        driver, bads = _select_driver(row, kpis)
+        ligne = drivers.iloc[i]
+        if driver is None:
+            assert pd.isna(ligne["Driver"]) and ligne["Nb_KPI"] == 0 and ligne["KPI_a_traiter"] == ()
+            assert np.isnan(ligne["Ecart_driver"])
+        else:
+            assert ligne["Driver"] == driver[0]
+            assert ligne["Ecart_driver"] == driver[1]
+            assert ligne["KPI_a_traiter"] == tuple(b[0] for b in bads)
+            assert ligne["Nb_KPI"] == len(bads)
+        for k in kpis:
+            assert ligne[f"Bad_{k}"] == any(b[0] == k for b in bads)
+
+
+def _params(df_r, df_o):
+    return {
+        "kpi": list(KPI_DISPONIBLES),
+        "agents": list(pd.unique(df_r["Agent"])),
+        "mois": [m for m in df_o["Mois"] if m != "Type"],
+        "pondérations": {k: 0.2 for k in KPI_DISPONIBLES},
+    }
+
+
+def test_donnees_generees_manquants_et_objectifs_nuls():
+    df_r, df_o = generer_donnees(120, 4, seed=7, taux_manquants=0.1)
+    df_o = df_o.copy()
+    df_o.loc[0, "Prod"] = 0
+    df_o.loc[1, KPI_DISPONIBLES] = 0
+    df_o.loc[2, "TH prod (€)"] = np.nan
+    df_ecarts = preprocessing.calcul_ecarts_objectifs(df_r, df_o, _params(df_r, df_o))
+    assert df_ecarts[[f"Ecart_{k}" for k in KPI_DISPONIBLES]].isna().any().any()
+    _comparer(df_ecarts, KPI_DISPONIBLES)
+
+
+def test_seuil_target_et_cas_limites():
+    proches = [SEUIL_TARGET, -SEUIL_TARGET, SEUIL_TARGET + 1e-4, -SEUIL_TARGET - 1e-4, SEUIL_TARGET - 1e-4, 0.0]
+    ecarts = proches + [np.nan, np.inf, -np.inf, 0.5]
+    n = len(ecarts)
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "Agent": [f"AG{i}" for i in range(n)],
+            "Mois": ["2024-01"] * n,
+            "Ecart_A": ecarts,
+            "Type_A": pd.Categorical(["target"] * n),
+            "Ecart_B": rng.permutation(ecarts),
+            # types catégoriels avec casse / espaces et valeurs manquantes
+            "Type_B": pd.Categorical([" Min", "MAX ", None, "target"] * 2 + ["min", None]),
+            "Ecart_C": -np.asarray(ecarts),
+            "Type_C": ["max", "min"] * (n // 2),
+            # égalités de |écart| : le premier KPI de la liste l'emporte
+            "Ecart_D": ecarts[::-1],
+        },
+        index=pd.RangeIndex(10, 10 + n),
+    )
+    _comparer(df, ["A", "B", "C", "D"])
+    _comparer(df, ["D", "C", "B", "A"])
+    _comparer(df, ["A", "Absent"])  # colonnes Ecart_ / Type_ absentes : jamais à traiter
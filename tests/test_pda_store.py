@@ -0,0 +1,135 @@
+# tests/test_pda_store.py
+import json
+import threading
+
+import pytest
+
+from modules import pda_store
+
+ACTIONS = [
+    {"id": "a1", "agent": "AG1", "kpi": "Prod", "status": "À faire", "priority": "P2", "due_date": "2024-03-01"},
+    {"id": "a2", "agent": "AG2", "kpi": "DMT (sec)", "status": "En cours", "priority": "P1", "due_date": "2024-02-01"},
+    {"id": "a3", "agent": "AG1", "kpi": "DMT (sec)", "status": "À faire", "priority": "P1"},  # sans deadline
+    {"id": "a4", "agent": "AG3", "kpi": "Prod", "status": "Fait", "due_date": "2024-01-15"},  # sans priorité
+    {"id": "a5", "agent": "AG2", "kpi": "Prod", "status": "À faire", "priority": None, "due_date": "2024-01-10"},
+    {"id": "a6", "agent": "AG1", "kpi": "Prod", "status": "En cours", "priority": "P1", "due_date": "2024-02-01"},
+]
+
+
+@pytest.fixture
+def chemins(tmp_path):
+    return str(tmp_path / "pda_actions.json"), str(tmp_path / "pda_actions.sqlite")
+
+
+@pytest.fixture
+def sqlite(chemins, monkeypatch):
+    backend = pda_store._SqliteBackend(chemins[1], chemins[0])
+    monkeypatch.setattr(pda_store, "_backend_instance", backend)
+    return backend
+
+
+def _ecrire_json(chemin, actions):
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump(actions, f, ensure_ascii=False)
+
+
+def _ids(actions):
+    return [a["id"] for a in actions]
+
+
+def test_migration_idempotente(chemins):
+    chemin_json, chemin_db = chemins
+    _ecrire_json(chemin_json, ACTIONS)
+    assert pda_store.migrate_json_to_sqlite(chemin_json, chemin_db) == len(ACTIONS)
+    backend = pda_store._SqliteBackend(chemin_db, chemin_json)
+    version = backend.version()
+    assert pda_store.migrate_json_to_sqlite(chemin_json, chemin_db) == 0
+    assert backend.version() == version  # rien inséré : les exports en cache restent valides
+    assert _ids(backend.load()) == _ids(ACTIONS)
+
+
+def test_migration_automatique_a_la_creation(chemins):
+    chemin_json, chemin_db = chemins
+    _ecrire_json(chemin_json, ACTIONS)
+    backend = pda_store._SqliteBackend(chemin_db, chemin_json)
+    assert _ids(backend.load()) == _ids(ACTIONS)
+    assert backend.get("a3")["kpi"] == "DMT (sec)"
+
+
+def test_requetes_filtrees(sqlite):
+    for a in ACTIONS:
+        pda_store.add_action(a)
+    assert _ids(pda_store.query_actions(agent="AG1")) == ["a3", "a6", "a1"]
+    assert _ids(pda_store.query_actions(agent="AG1", status="À faire")) == ["a3", "a1"]
+    assert _ids(pda_store.query_actions(kpi="Prod", priority="P1")) == ["a6"]
+    assert _ids(pda_store.query_actions(due_date="2024-02-01")) == ["a2", "a6"]
+    assert pda_store.query_actions(agent="AG9") == []
+    assert pda_store.distinct_values("agent") == ["AG1", "AG2", "AG3"]
+    assert pda_store.distinct_values("priority") == ["P1", "P2"]
+    with pytest.raises(ValueError):
+        pda_store.distinct_values("payload")
+
+
+def test_get_action(sqlite):
+    ident = pda_store.add_action({"agent": "AG1", "kpi": "Prod", "tags": ["suivi"]})
+    action = pda_store.get_action(ident)
+    assert action["agent"] == "AG1" and action["tags"] == ["suivi"] and action["created_at"]
+    assert pda_store.get_action("inconnu") is None
+
+
+def test_version_inchangee_sans_ecriture(sqlite):
+    ident = pda_store.add_action(ACTIONS[0])
+    version = pda_store.actions_version()
+    assert pda_store.update_action("inconnu", {"status": "Fait"}) is False
+    assert pda_store.delete_action("inconnu") is False
+    assert pda_store.actions_version() == version
+    assert pda_store.update_action(ident, {"status": "Fait"}) is True
+    assert pda_store.actions_version() == version + 1
+    assert pda_store.delete_action(ident) is True
+    assert pda_store.actions_version() == version + 2
+
+
+def test_sessions_concurrentes_wal(chemins):
+    chemin_json, chemin_db = chemins
+    pda_store._SqliteBackend(chemin_db, chemin_json).load()  # schéma créé, mode WAL
+    erreurs, n = [], 50
+
+    def session(nom):
+        backend = pda_store._SqliteBackend(chemin_db, chemin_json)  # une connexion par opération, comme l'app
+        try:
+            for i in range(n):
+                ident = f"{nom}-{i}"
+                backend.add(pda_store._new_row({"id": ident, "agent": nom, "status": "À faire"}))
+                assert backend.update(ident, {"status": "En cours"})
+        except Exception as e:  # remonté au thread principal
+            erreurs.append(e)
+
+    threads = [threading.Thread(target=session, args=(nom,)) for nom in ("TL1", "TL2")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not erreurs
+    backend = pda_store._SqliteBackend(chemin_db, chemin_json)
+    actions = backend.load()
+    assert len(actions) == 2 * n and {a["status"] for a in actions} == {"En cours"}
+    assert backend.version() == 4 * n
+    with backend._read() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+@pytest.mark.parametrize(
+    "filtres", [{}, {"agent": "AG1"}, {"status": "À faire"}, {"kpi": "Prod"}, {"priority": "P1"}, {"due_date": "2024-02-01"}]
+)
+def test_parite_json_sqlite(chemins, filtres):
+    chemin_json, chemin_db = chemins
+    json_backend = pda_store._JsonBackend(chemin_json)
+    sqlite_backend = pda_store._SqliteBackend(chemin_db, chemin_json + ".absent")
+    for a in ACTIONS:
+        json_backend.add(pda_store._new_row(a))
+        sqlite_backend.add(pda_store._new_row(a))
+
+    assert _ids(json_backend.query(filtres)) == _ids(sqlite_backend.query(filtres))
+    for champ in pda_store.FILTER_FIELDS:
+        assert json_backend.distinct(champ) == sqlite_backend.distinct(champ)
@@ -0,0 +1,24 @@
+# tests/test_perf.py
+import os
+from datetime import datetime, timedelta
+
+from modules import perf
+
+
+def test_rotation_et_resume(tmp_path, monkeypatch):
+    chemin = str(tmp_path / "metrics.jsonl")
+    monkeypatch.setattr(perf, "METRICS_PATH", chemin)
+    monkeypatch.setattr(perf, "ECRIRE_METRIQUES", True)
+    monkeypatch.setattr(perf, "ROTATION_OCTETS", 2000)
+
+    for i in range(100):
+        with perf.mesurer("ecarts" if i % 2 else "import"):
+            pass
+
+    # fichier courant et rotation précédente bornés, les plus anciennes mesures abandonnées
+    assert os.path.getsize(chemin) < 2000 + 200 and os.path.getsize(chemin + ".1") < 2000 + 200
+    resume = perf.resume_metriques()
+    n = resume["ecarts"]["n"] + resume["import"]["n"]
+    with open(chemin, encoding="utf-8") as f, open(chemin + ".1", encoding="utf-8") as g:
+        assert n == len(f.readlines()) + len(g.readlines()) < 100
+    assert perf.resume_metriques(depuis=datetime.now() + timedelta(hours=1)) == {}
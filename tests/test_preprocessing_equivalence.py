@@ -0,0 +1,174 @@
+# tests/test_preprocessing_equivalence.py
+# Le moteur vectorisé (modules.preprocessing) doit produire exactement le tableau de l'implémentation
+# d'origine (iterrows), conservée ici comme référence, une fois ramené aux mêmes types.
+#   python -m pytest -q tests
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules import preprocessing
+
+# type (ligne "Type"), objectif de base, dispersion relative, décimales
+PROFILS = {
+    "ABS (%)": ("min", 6.0, 0.45, 2),
+    "Prod": ("max", 120.0, 0.12, 0),
+    "Qualité (%)": ("max", 90.0, 0.05, 2),
+    "DMT (sec)": ("min", 210.0, 0.15, 0),
+    "TH prod (€)": ("target", 24.0, 0.10, 2),
+}
+KPIS = list(PROFILS)
+
+
+def reference_ecarts_objectifs(df_resultats, df_objectifs, params):
+    """Implémentation d'origine de calcul_ecarts_objectifs (une ligne à la fois)."""
+    kpis = params["kpi"]
+    agents = params["agents"]
+    mois = params["mois"]
+
+    df_type = df_objectifs[df_objectifs["Mois"] == "Type"]
+    df_objectifs = df_objectifs[df_objectifs["Mois"] != "Type"]
+
+    type_obj = {k: str(df_type.iloc[0][k]).strip().lower() for k in kpis}
+
+    df_r = df_resultats[df_resultats["Agent"].isin(agents) & df_resultats["Mois"].isin(mois)]
+    df_o = df_objectifs[df_objectifs["Mois"].isin(mois)]
+
+    df = df_r.merge(df_o, on="Mois", suffixes=("", "_obj"))
+    rows = []
+
+    for _, row in df.iterrows():
+        entry = {"Agent": row["Agent"], "Mois": row["Mois"]}
+
+        for kpi in kpis:
+            val = row[kpi]
+            obj = row[f"{kpi}_obj"]
+            type_kpi = type_obj[kpi]
+
+            entry[f"Val_{kpi}"] = val
+            entry[f"Obj_{kpi}"] = obj
+            entry[f"Type_{kpi}"] = type_kpi
+
+            if obj == 0 or pd.isna(obj):
+                ecart = 0
+            else:
+                if type_kpi == "min":
+                    ecart = (val - obj) / obj
+                elif type_kpi == "max":
+                    ecart = (obj - val) / obj
+                else:
+                    ecart = (val - obj) / obj
+
+            entry[f"Ecart_{kpi}"] = round(ecart, 4)
+
+        rows.append(entry)
+
+    df_ecarts = pd.DataFrame(rows)
+
+    for kpi in kpis:
+        df_ecarts[f"Pond_{kpi}"] = df_ecarts[f"Ecart_{kpi}"] * params["pondérations"][kpi]
+
+    df_ecarts["Score_Global"] = df_ecarts[[f"Pond_{k}" for k in kpis]].sum(axis=1)
+
+    return df_ecarts
+
+
+def generer_donnees(n_agents, n_mois, seed=0, taux_manquants=0.01):
+    """(df_resultats, df_objectifs) : une ligne par Agent × Mois ; objectifs par Mois + ligne "Type"."""
+    rng = np.random.default_rng(seed)
+    mois = [f"2024-{m:02d}" for m in range(1, n_mois + 1)]
+    agents = [f"AG{i:05d}" for i in range(n_agents)]
+
+    df_resultats = pd.DataFrame({"Agent": np.repeat(agents, n_mois), "Mois": np.tile(mois, n_agents)})
+    objectifs = {"Mois": mois}
+    for kpi, (_, base, dispersion, dec) in PROFILS.items():
+        obj_mois = base * (1 + rng.normal(0, 0.02, n_mois))
+        valeurs = np.tile(obj_mois, n_agents) * rng.normal(1.0, dispersion, n_agents * n_mois)
+        valeurs = np.clip(valeurs, 0, None).round(dec)
+        valeurs[rng.random(len(valeurs)) < taux_manquants] = np.nan
+        df_resultats[kpi] = valeurs
+        objectifs[kpi] = obj_mois.round(dec)
+
+    ligne_type = pd.DataFrame([{"Mois": "Type", **{k: p[0] for k, p in PROFILS.items()}}])
+    return df_resultats, pd.concat([pd.DataFrame(objectifs).astype(object), ligne_type], ignore_index=True)
+
+
+def _types_communs(df):
+    """Texte et catégories → objet, nombres (float32, entiers) → float64 : compare les valeurs, pas le stockage."""
+    colonnes = {}
+    for col in df.columns:
+        s = df[col]
+        numerique = pd.api.types.is_numeric_dtype(s) and not isinstance(s.dtype, pd.CategoricalDtype)
+        colonnes[col] = s.astype("float64") if numerique else s.astype(object)
+    return pd.DataFrame(colonnes, index=df.index)
+
+
+def _params(df_resultats, df_objectifs, kpis=KPIS, agents=None, mois=None, poids=None):
+    mois_dispo = [m for m in df_objectifs["Mois"] if m != "Type"]
+    return {
+        "kpi": list(kpis),
+        "agents": list(pd.unique(df_resultats["Agent"])) if agents is None else list(agents),
+        "mois": mois_dispo if mois is None else list(mois),
+        "pondérations": poids or {k: round(1 / len(kpis), 4) for k in kpis},
+    }
+
+
+def _comparer(df_resultats, df_objectifs, params):
+    attendu = _types_communs(reference_ecarts_objectifs(df_resultats, df_objectifs, params))
+    obtenu = _types_communs(preprocessing.calcul_ecarts_objectifs(df_resultats, df_objectifs, params))
+    ecarts = [f"Ecart_{k}" for k in params["kpi"]]
+    # écarts arrondis : égalité exacte ; pondérations / score : à l'ordre de sommation près
+    pd.testing.assert_frame_equal(obtenu[ecarts], attendu[ecarts], check_exact=True)
+    pd.testing.assert_frame_equal(obtenu, attendu, check_exact=False, rtol=1e-12, atol=1e-15)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_donnees_generees(seed):
+    df_r, df_o = generer_donnees(200, 6, seed=seed, taux_manquants=0.05)
+    _comparer(df_r, df_o, _params(df_r, df_o))
+
+
+def test_objectifs_nuls_et_manquants():
+    df_r, df_o = generer_donnees(100, 6, seed=3)
+    df_o = df_o.copy()
+    df_o.loc[0, "Prod"] = 0
+    df_o.loc[1, "ABS (%)"] = np.nan
+    df_o.loc[2, KPIS] = 0
+    df_o.loc[3, "TH prod (€)"] = None
+    _comparer(df_r, df_o, _params(df_r, df_o))
+
+
+def test_sous_ensembles_agents_et_mois():
+    df_r, df_o = generer_donnees(150, 8, seed=4)
+    agents = list(pd.unique(df_r["Agent"]))
+    mois = [m for m in df_o["Mois"] if m != "Type"]
+    _comparer(df_r, df_o, _params(df_r, df_o, agents=agents[10:60:3], mois=mois[2:5]))
+    _comparer(df_r, df_o, _params(df_r, df_o, agents=agents[::-7], mois=mois[::-2]))
+    _comparer(df_r, df_o, _params(df_r, df_o, kpis=["DMT (sec)", "Prod"], agents=agents[:1], mois=mois[-1:]))
+
+
+def test_changement_de_ponderations():
+    df_r, df_o = generer_donnees(100, 4, seed=5)
+    _comparer(df_r, df_o, _params(df_r, df_o))
+    poids = {"ABS (%)": 0.4, "Prod": 0.1, "Qualité (%)": 0.3, "DMT (sec)": 0.15, "TH prod (€)": 0.05}
+    _comparer(df_r, df_o, _params(df_r, df_o, poids=poids))
+
+
+def test_arrondis_a_mi_chemin():
+    # écarts dont x·10⁴ tombe (à la représentation binaire près) sur k + 0.5 : np.round et round()
+    # peuvent y diverger, _arrondi_4 doit rendre le résultat de round()
+    k = np.arange(-2000, 2000)
+    objectifs = np.array([1.0, 3.0, 7.0, 100.0, 240.0])
+    val = (objectifs[:, None] * (1 + (k + 0.5) / 1e4)).ravel()
+    obj = np.repeat(objectifs, len(k))
+    mois = [f"2024-{m:02d}" for m in range(1, len(objectifs) + 1)]
+
+    df_r = pd.DataFrame({"Agent": np.tile([f"AG{i:05d}" for i in range(len(k))], len(objectifs)), "Mois": np.repeat(mois, len(k))})
+    types = {"ABS (%)": "min", "Prod": "max", "Qualité (%)": "max", "DMT (sec)": "min", "TH prod (€)": "target"}
+    for i, kpi in enumerate(KPIS):
+        df_r[kpi] = val * (1 + i * 1e-9) if i % 2 else val
+    df_o = pd.DataFrame({"Mois": mois, **{kpi: objectifs for kpi in KPIS}})
+    df_o = pd.concat([df_o.astype(object), pd.DataFrame([{"Mois": "Type", **types}])], ignore_index=True)
+
+    x = (val - obj) / obj
+    assert (np.round(x, 4) != [round(float(v), 4) for v in x]).any()  # le cas limite est bien couvert
+    _comparer(df_r, df_o, _params(df_r, df_o))
@@ -0,0 +1,91 @@
+# tests/test_preprocessing_incremental.py
+# Recalcul mois par mois (_base_incrementale) : seuls les mois modifiés sont recalculés,
+# et le tableau obtenu est celui d'un calcul complet sur cache vide.
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import preprocessing
+from modules.cache_memoire import DONNEES
+from modules.parametres import KPI_DISPONIBLES
+
+MOIS = ["2024-01", "2024-02", "2024-03", "2024-04", "2024-05"]
+
+
+@pytest.fixture(autouse=True)
+def _caches_vides():
+    DONNEES.vider()
+    yield
+    DONNEES.vider()
+
+
+def _params(df_r, agents=None, mois=MOIS):
+    return {
+        "kpi": list(KPI_DISPONIBLES),
+        "agents": list(pd.unique(df_r["Agent"])) if agents is None else list(agents),
+        "mois": list(mois),
+        "pondérations": {k: 0.2 for k in KPI_DISPONIBLES},
+    }
+
+
+def _calculer(df_r, df_o, params, recalcules):
+    """Écarts via le cache, mois recalculés vérifiés, puis comparés à un calcul complet sur cache vide."""
+    df_ecarts = preprocessing.calcul_ecarts_objectifs(df_r, df_o, params)
+    assert preprocessing.mois_recalcules(df_ecarts) == recalcules
+
+    DONNEES.vider()
+    complet = preprocessing.calcul_ecarts_objectifs(df_r.copy(), df_o.copy(), params)
+    assert preprocessing.mois_recalcules(complet) == params["mois"]
+    pd.testing.assert_frame_equal(df_ecarts, complet)
+    # cache de nouveau rempli (tous agents, tous mois) pour l'appel suivant
+    DONNEES.vider()
+    preprocessing.calcul_ecarts_objectifs(df_r, df_o, _params(df_r))
+
+
+@pytest.fixture
+def donnees():
+    df_r, df_o = generer_donnees(80, len(MOIS), seed=6, taux_manquants=0.02)
+    preprocessing.calcul_ecarts_objectifs(df_r, df_o, _params(df_r))
+    return df_r, df_o
+
+
+def test_rien_de_change(donnees):
+    df_r, df_o = donnees
+    _calculer(df_r.copy(), df_o.copy(), _params(df_r), [])
+
+
+def test_resultats_d_un_mois(donnees):
+    df_r, df_o = donnees
+    df_r = df_r.copy()
+    df_r.loc[df_r["Mois"] == "2024-03", "Prod"] += 5
+    _calculer(df_r, df_o, _params(df_r), ["2024-03"])
+
+
+def test_mois_ajoute(donnees):
+    df_r, df_o = donnees
+    df_r6, df_o6 = generer_donnees(80, len(MOIS) + 1, seed=6, taux_manquants=0.02)
+    nouveau = df_r6[df_r6["Mois"] == "2024-06"]
+    df_r = pd.concat([df_r, nouveau], ignore_index=True)
+    df_o = pd.concat([df_o.iloc[:-1], df_o6[df_o6["Mois"] == "2024-06"], df_o.iloc[-1:]], ignore_index=True)
+    _calculer(df_r, df_o, _params(df_r, mois=MOIS + ["2024-06"]), ["2024-06"])
+
+
+def test_objectifs_d_un_mois(donnees):
+    df_r, df_o = donnees
+    df_o = df_o.copy()
+    df_o.loc[df_o["Mois"] == "2024-02", "DMT (sec)"] = 180.0
+    _calculer(df_r, df_o, _params(df_r), ["2024-02"])
+
+
+def test_ligne_type_recalcule_tout(donnees):
+    df_r, df_o = donnees
+    df_o = df_o.copy()
+    df_o.loc[df_o["Mois"] == "Type", "TH prod (€)"] = "max"
+    _calculer(df_r, df_o, _params(df_r), MOIS)
+
+
+def test_sous_ensemble_agents_et_mois(donnees):
+    df_r, df_o = donnees
+    agents = list(pd.unique(df_r["Agent"]))
+    _calculer(df_r, df_o, _params(df_r, agents=agents[5:40:3]), [])
+    _calculer(df_r, df_o, _params(df_r, agents=agents[::-4], mois=MOIS[1:4]), [])
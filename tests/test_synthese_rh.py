@@ -0,0 +1,34 @@
+# tests/test_synthese_rh.py
+import zipfile
+
+import pandas as pd
+
+from modules.synthese_rh import generer_rapports_rh_zip
+
+AGENTS = ["A/1", "A 1", "a 1", "A_1_2", "B", "A:1"]
+
+
+def test_noms_uniques_dans_le_zip():
+    df = pd.DataFrame(
+        {
+            "Agent": AGENTS * 2,
+            "Mois": ["2024-01"] * len(AGENTS) + ["2024-02"] * len(AGENTS),
+            "Ecart_Prod": [0.1, -0.2, 0.05, 0.0, 0.3, -0.1] * 2,
+            "Score_Global": [0.02] * (2 * len(AGENTS)),
+        }
+    )
+    with generer_rapports_rh_zip(df, {"kpi": ["Prod"]}, workers=1, taille_lot=2) as fichier:
+        with zipfile.ZipFile(fichier) as zf:
+            noms = zf.namelist()
+            documents = [zipfile.ZipFile(zf.open(n)).read("word/document.xml").decode("utf-8") for n in noms]
+
+    assert len(noms) == len(AGENTS)
+    assert len({n.casefold() for n in noms}) == len(AGENTS)  # dézippage sous Windows compris
+    assert noms[:3] == [
+        "PerformTrack360_rapport_A_1.docx",
+        "PerformTrack360_rapport_A_1_2.docx",
+        "PerformTrack360_rapport_a_1_3.docx",
+    ]
+    # chaque fichier garde le rapport de son agent
+    for agent, xml in zip(AGENTS, documents):
+        assert f"Agent {agent}<" in xml
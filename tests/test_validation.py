@@ -0,0 +1,154 @@
+# tests/test_validation.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.donnees_synthetiques import generer_donnees
+from modules import parse_cache
+from modules.cache_memoire import DONNEES
+from modules.chargement import ErreurChargement, charger_et_valider
+from modules.validation import references, valider
+
+
+@pytest.fixture(autouse=True)
+def cache_temporaire(tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache, "CACHE_DIR", str(tmp_path / "cache_fichiers"))
+    DONNEES.vider()
+    yield
+    DONNEES.vider()
+
+
+@pytest.fixture
+def donnees():
+    df_r, df_o = generer_donnees(20, 3, seed=1, taux_manquants=0.05)
+    return df_r, df_o
+
+
+def _resume(problemes):
+    return [(p["gravite"], p["table"], p["controle"], p["colonne"], p["nb_lignes"]) for p in problemes]
+
+
+def test_donnees_propres_inchangees(donnees):
+    df_r, df_o = donnees
+    r, o, problemes = valider(df_r, df_o)
+    assert problemes == [] and r is df_r and o is df_o
+
+
+def test_colonnes_manquantes(donnees):
+    df_r, df_o = donnees
+    r, o, problemes = valider(df_r.drop(columns=["Prod", "Agent"]), df_o.drop(columns=["DMT (sec)"]))
+    assert _resume(problemes) == [
+        ("erreur", "résultats", "colonnes", None, 0),
+        ("erreur", "objectifs", "colonnes", None, 0),
+    ]
+    assert "Agent, Prod" in problemes[0]["message"] and "DMT (sec)" in problemes[1]["message"]
+    # KPI choisis : seules leurs colonnes sont exigées
+    assert valider(df_r.drop(columns=["Prod"]), df_o, kpis=["DMT (sec)"])[2] == []
+
+
+def test_ligne_type_manquante(donnees):
+    df_r, df_o = donnees
+    _, _, problemes = valider(df_r, df_o[df_o["Mois"] != "Type"])
+    assert _resume(problemes) == [("erreur", "objectifs", "type", None, 0)]
+
+
+def test_type_inconnu(donnees):
+    df_r, df_o = donnees
+    df_o = df_o.copy()
+    df_o.loc[df_o["Mois"] == "Type", "Prod"] = " MAX "  # casse / espaces tolérés
+    df_o.loc[df_o["Mois"] == "Type", "ABS (%)"] = "minimum"
+    r, o, problemes = valider(df_r, df_o)
+    assert _resume(problemes) == [("erreur", "objectifs", "type", "ABS (%)", 1)]
+    assert problemes[0]["lignes"] == "ligne 5"  # 3 mois puis la ligne "Type", après l'en-tête
+    assert r is df_r and o is df_o  # pas de correction en cas d'erreur
+
+
+def test_doublons_dedoublonnes(donnees):
+    df_r, df_o = donnees
+    df_r = pd.concat([df_r, df_r.iloc[[4]].assign(Prod=999.0)], ignore_index=True)
+    df_o = pd.concat([df_o.iloc[:1], df_o], ignore_index=True)
+    r, o, problemes = valider(df_r, df_o)
+    assert _resume(problemes) == [
+        ("avertissement", "résultats", "doublons", None, 1),
+        ("avertissement", "objectifs", "doublons", None, 1),
+    ]
+    assert problemes[0]["lignes"] == "ligne 6"
+    assert len(r) == len(df_r) - 1 and not r.duplicated(["Agent", "Mois"]).any()
+    # la dernière occurrence est gardée
+    ligne = r[(r["Agent"] == df_r.loc[4, "Agent"]) & (r["Mois"] == df_r.loc[4, "Mois"])]
+    assert ligne["Prod"].tolist() == [999.0]
+    assert len(o) == len(df_o) - 1 and (o["Mois"] == "Type").sum() == 1
+
+
+def test_doublons_rejetes(donnees):
+    df_r, df_o = donnees
+    df_r = pd.concat([df_r, df_r.iloc[[4, 7]]], ignore_index=True)
+    r, o, problemes = valider(df_r, df_o, doublons="rejeter")
+    assert _resume(problemes) == [("erreur", "résultats", "doublons", None, 2)]
+    assert "import refusé" in problemes[0]["message"]
+    assert r is df_r
+    with pytest.raises(ValueError):
+        valider(df_r, df_o, doublons="ignorer")
+
+
+def test_valeurs_non_numeriques(donnees):
+    df_r, df_o = donnees
+    df_r = df_r.astype({"Prod": object, "DMT (sec)": object})
+    df_r.loc[2, "Prod"] = "abc"
+    df_r.loc[[5, 9], "DMT (sec)"] = "12,5 s"
+    df_o = df_o.copy()
+    df_o.loc[1, "Qualité (%)"] = "?"
+    _, _, problemes = valider(df_r, df_o)
+    assert _resume(problemes) == [
+        ("erreur", "résultats", "numerique", "Prod", 1),
+        ("erreur", "objectifs", "numerique", "Qualité (%)", 1),  # la ligne "Type" n'est pas contrôlée
+        ("erreur", "résultats", "numerique", "DMT (sec)", 2),
+    ]
+    assert problemes[2]["lignes"] == "ligne 7, 11"
+
+
+def test_nombres_en_texte_convertis(donnees):
+    df_r, df_o = donnees
+    df_r = df_r.astype({"Prod": object})
+    df_r["Prod"] = df_r["Prod"].map(lambda v: v if pd.isna(v) else str(v))
+    r, _, problemes = valider(df_r, df_o)
+    assert problemes == []
+    assert pd.api.types.is_float_dtype(r["Prod"])
+    np.testing.assert_array_equal(r["Prod"].to_numpy(dtype=float), df_r["Prod"].astype(float).to_numpy())
+
+
+def test_mois_sans_objectifs(donnees):
+    df_r, df_o = donnees
+    df_o = df_o[df_o["Mois"] != "2024-02"]
+    _, _, problemes = valider(df_r, df_o)
+    assert _resume(problemes) == [("erreur", "résultats", "objectifs", None, 20)]
+    assert problemes[0]["message"] == "Mois sans objectifs : 2024-02"
+    assert problemes[0]["lignes"] == "ligne 3, 6, 9, 12, 15 (+15)"
+
+
+def test_references_provenance():
+    provenance = [("a.csv / Feuille1", 0), ("b.xlsx / Site A", 10), ("b.xlsx / Site B", 25)]
+    assert references([], provenance) == ""
+    assert references([0, 12, 26, 30]) == "ligne 2, 14, 28, 32"
+    assert references([3, 12, 13, 26], provenance) == "a.csv / Feuille1 : ligne 5 ; b.xlsx / Site A : ligne 4, 5 ; b.xlsx / Site B : ligne 3"
+    assert references(range(10, 20), provenance, maximum=2) == "b.xlsx / Site A : ligne 2, 3 (+8)"
+
+
+def test_references_import_multi_fichiers(tmp_path):
+    df_r, df_o = generer_donnees(6, 3, seed=2)
+    chemins = []
+    for mois, groupe in df_r.groupby("Mois"):  # un fichier de résultats par mois
+        groupe = groupe.reset_index(drop=True).astype({"Prod": object})
+        if mois == "2024-03":
+            groupe.loc[4, "Prod"] = "abc"
+        chemin = tmp_path / f"resultats_{mois}.csv"
+        groupe.to_csv(chemin, index=False)
+        chemins.append(str(chemin))
+    chemin_o = tmp_path / "objectifs.xlsx"
+    df_o.to_excel(chemin_o, index=False, sheet_name="Objectifs")
+
+    with pytest.raises(ErreurChargement) as e:
+        charger_et_valider(chemins, str(chemin_o), workers=1)
+    (probleme,) = e.value.problemes
+    assert (probleme["colonne"], probleme["nb_lignes"]) == ("Prod", 1)
+    assert probleme["lignes"].startswith("resultats_2024-03.csv / ") and probleme["lignes"].endswith(" : ligne 6")